@@ -0,0 +1,278 @@
+"""
+Deterministic synthetic AMEX statement CSVs
+
+Produces files in the layout of an AMEX "Download your activity" CSV as
+read by `erpnext_amex.utils.csv_parser.parse_amex_csv`, with the
+properties that matter for performance:
+
+- merchants repeat with a Zipf distribution (a few merchants make up most
+  rows, with a long tail), each with its own category, amount range,
+  ERPNext vendor, expense account and cost center
+- descriptions carry store numbers and state codes, as on real statements
+- multi-line quoted fields (`Extended Details`, `Address`, `City/State`)
+- card payments and refunds (negative amounts) and re-exported duplicate
+  rows (same reference)
+
+The same rows and seed always give the same file.
+
+Usage (from the repository root):
+
+	python benchmarks/amex_statement.py --rows 100000 --output statement.csv [--seed 0]
+"""
+
+import argparse
+import csv
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+CSV_COLUMNS = [
+	'Date', 'Description', 'Card Member', 'Account #', 'Amount', 'Extended Details',
+	'Appears On Your Statement As', 'Address', 'City/State', 'Zip Code', 'Country',
+	'Reference', 'Category'
+]
+
+Merchant = namedtuple('Merchant', [
+	'description', 'category', 'typical_amount', 'vendor', 'expense_account', 'cost_center',
+	'address', 'city', 'state', 'zip_code', 'phone'
+])
+
+# (statement name, category, typical amount, expense account, cost center)
+KNOWN_MERCHANTS = [
+	('GOOGLE *ADS', 'Business Services-Advertising Services', 1500, 'Advertising - Online', 'Marketing - Paid Ads - Google'),
+	('FACEBK *ADS', 'Business Services-Advertising Services', 1200, 'Advertising - Online', 'Marketing - Paid Ads - Meta'),
+	('TIKTOK ADS', 'Business Services-Advertising Services', 800, 'Advertising - Online', 'Marketing - Paid Ads - TikTok'),
+	('AMAZON WEB SERVICES', 'Business Services-Internet Services', 2400, 'Software & Hosting', 'Engineering'),
+	('SHOPIFY *APP', 'Business Services-Internet Services', 90, 'Software & Hosting', 'Operations'),
+	('SLACK T0123ABCD', 'Business Services-Internet Services', 250, 'Software & Hosting', 'Operations'),
+	('ZOOM.US', 'Business Services-Internet Services', 150, 'Software & Hosting', 'Operations'),
+	('UBER   *TRIP', 'Transportation-Taxis & Coach', 28, 'Travel', 'Operations'),
+	('LYFT   *RIDE', 'Transportation-Taxis & Coach', 24, 'Travel', 'Operations'),
+	('DELTA AIR LINES', 'Travel-Airline', 480, 'Travel', 'Operations'),
+	('MARRIOTT HOTELS', 'Travel-Lodging', 320, 'Travel', 'Operations'),
+	('STARBUCKS STORE', 'Restaurant-Restaurant', 9, 'Meals & Entertainment', 'Operations'),
+	('DOORDASH*ORDER', 'Restaurant-Restaurant', 42, 'Meals & Entertainment', 'Operations'),
+	('FEDEX OFFICE', 'Business Services-Mailing & Shipping', 65, 'Shipping', 'Operations - Logistics'),
+	('UPS*SHIPPING', 'Business Services-Mailing & Shipping', 85, 'Shipping', 'Operations - Logistics'),
+	('STAPLES', 'Merchandise & Supplies-Office Supplies', 60, 'Office Expenses', 'Finance'),
+	('COMCAST BUSINESS', 'Communications-Cable & Internet Comm', 210, 'Utilities', 'Finance'),
+	('VERIZON WIRELESS', 'Communications-Telephone Comm', 340, 'Utilities', 'Finance'),
+]
+
+CATEGORIES = sorted({merchant[1] for merchant in KNOWN_MERCHANTS} | {
+	'Merchandise & Supplies-Wholesale Stores', 'Merchandise & Supplies-Hardware Supplies',
+	'Business Services-Professional Services', 'Other-Miscellaneous'
+})
+
+EXPENSE_ACCOUNTS = sorted({merchant[3] for merchant in KNOWN_MERCHANTS} | {'Miscellaneous Expenses', 'Professional Fees'})
+COST_CENTERS = sorted({merchant[4] for merchant in KNOWN_MERCHANTS} | {'Main'})
+
+WORDS = [
+	'ACME', 'BLUE', 'CEDAR', 'DELTA', 'EAGLE', 'FOX', 'GLOBAL', 'HARBOR', 'IRON', 'JADE',
+	'KING', 'LIBERTY', 'METRO', 'NORTH', 'OAK', 'PACIFIC', 'QUANTUM', 'RIVER', 'SUMMIT', 'TOWER',
+	'UNION', 'VALLEY', 'WEST', 'YORK', 'ZENITH'
+]
+SUFFIXES = ['SUPPLY', 'SERVICES', 'MARKET', 'CAFE', 'PRINTING', 'LOGISTICS', 'SOFTWARE', 'DESIGN', 'HARDWARE', 'CONSULTING']
+
+CITIES = [
+	('NEW YORK', 'NY', '10001'), ('SAN FRANCISCO', 'CA', '94105'), ('SEATTLE', 'WA', '98101'),
+	('AUSTIN', 'TX', '78701'), ('CHICAGO', 'IL', '60601'), ('MIAMI', 'FL', '33101'),
+	('DENVER', 'CO', '80202'), ('BOSTON', 'MA', '02108'), ('ATLANTA', 'GA', '30303')
+]
+
+FIRST_NAMES = ['JOHN', 'MARIA', 'WEI', 'PRIYA', 'CARLOS', 'AISHA', 'SAM', 'ELENA', 'KENJI', 'FATIMA', 'LUCAS', 'NORA']
+LAST_NAMES = ['SMITH', 'GARCIA', 'CHEN', 'PATEL', 'JOHNSON', 'OKAFOR', 'MULLER', 'ROSSI', 'TANAKA', 'KHAN']
+
+PAYMENT_DESCRIPTION = 'ONLINE PAYMENT - THANK YOU'
+
+# Share of rows that are card payments, refunds and re-exported duplicates
+PAYMENT_RATE = 0.01
+REFUND_RATE = 0.01
+DUPLICATE_RATE = 0.005
+
+# Zipf exponent of merchant popularity
+MERCHANT_ZIPF = 1.3
+
+STATEMENT_END = np.datetime64('2025-06-30')
+STATEMENT_DAYS = 365
+
+
+def make_merchants(count=5000, seed=0):
+	"""
+	The merchant table, most popular first
+
+	The known merchants come first (so they are the most frequent), the
+	rest are generated from word combinations.
+
+	Returns:
+		list: Merchant tuples
+	"""
+	rng = np.random.default_rng(seed)
+	merchants = []
+
+	for i in range(count):
+		if i < len(KNOWN_MERCHANTS):
+			description, category, typical_amount, expense_account, cost_center = KNOWN_MERCHANTS[i]
+			vendor = description.split('*')[0].split('  ')[0].strip().title()
+		else:
+			name = f"{WORDS[rng.integers(len(WORDS))]} {WORDS[rng.integers(len(WORDS))]} {SUFFIXES[rng.integers(len(SUFFIXES))]}"
+			if rng.random() < 0.3:
+				name = f"{name} {i}"
+			description = name
+			category = CATEGORIES[rng.integers(len(CATEGORIES))]
+			typical_amount = float(np.round(np.exp(rng.uniform(np.log(5), np.log(3000))), 2))
+			expense_account = EXPENSE_ACCOUNTS[rng.integers(len(EXPENSE_ACCOUNTS))]
+			cost_center = COST_CENTERS[rng.integers(len(COST_CENTERS))]
+			vendor = name.title()
+
+		city, state, zip_code = CITIES[rng.integers(len(CITIES))]
+		merchants.append(Merchant(
+			description=description,
+			category=category,
+			typical_amount=typical_amount,
+			vendor=vendor,
+			expense_account=expense_account,
+			cost_center=cost_center,
+			address=f"{rng.integers(1, 9999)} {WORDS[rng.integers(len(WORDS))]} ST",
+			city=city,
+			state=state,
+			zip_code=zip_code,
+			phone=f"{rng.integers(200, 999)}-{rng.integers(200, 999)}-{rng.integers(1000, 9999)}"
+		))
+
+	return merchants
+
+
+def make_card_members(count=25, seed=0):
+	"""(card member name, account number suffix) pairs"""
+	rng = np.random.default_rng(seed + 1)
+	return [
+		(f"{FIRST_NAMES[rng.integers(len(FIRST_NAMES))]} {LAST_NAMES[rng.integers(len(LAST_NAMES))]}", f"-{rng.integers(10000, 99999)}")
+		for _ in range(count)
+	]
+
+
+def make_statement(rows, seed=0, merchants=None):
+	"""
+	Synthetic statement rows
+
+	Args:
+		rows: Number of rows (duplicates included)
+		seed: Random seed
+		merchants: Merchant table (defaults to `make_merchants(seed=seed)`)
+
+	Returns:
+		DataFrame: CSV_COLUMNS, plus `merchant` (index into the merchant
+		table, -1 for payments) for deriving labels; newest first, like
+		the AMEX export
+	"""
+	rng = np.random.default_rng(seed)
+	merchants = merchants or make_merchants(seed=seed)
+	card_members = make_card_members(seed=seed)
+
+	unique_rows = rows - int(rows * DUPLICATE_RATE)
+
+	# Truncated Zipf over the merchant table (rank 1 most frequent)
+	popularity = 1.0 / np.arange(1, len(merchants) + 1) ** MERCHANT_ZIPF
+	merchant = rng.choice(len(merchants), size=unique_rows, p=popularity / popularity.sum())
+
+	kind = rng.random(unique_rows)
+	is_payment = kind < PAYMENT_RATE
+	is_refund = (kind >= PAYMENT_RATE) & (kind < PAYMENT_RATE + REFUND_RATE)
+	merchant[is_payment] = -1
+
+	typical = np.array([m.typical_amount for m in merchants])
+	amount = np.round(typical[np.maximum(merchant, 0)] * rng.lognormal(0, 0.35, unique_rows), 2)
+	amount[is_payment] = -np.round(rng.uniform(1000, 50000, is_payment.sum()), 2)
+	amount[is_refund] = -amount[is_refund]
+
+	dates = STATEMENT_END - rng.integers(0, STATEMENT_DAYS, unique_rows).astype('timedelta64[D]')
+	member = rng.integers(len(card_members), size=unique_rows)
+	store = rng.integers(100, 99999, unique_rows)
+	reference = rng.integers(10 ** 17, 10 ** 18, unique_rows, dtype=np.int64)
+
+	# Per-row merchant attribute; payments (-1) take the trailing payment_value
+	def merchant_field(field, payment_value=''):
+		values = np.array([getattr(m, field) for m in merchants] + [payment_value], dtype=object)
+		return values[merchant]
+
+	names, city, state = merchant_field('description'), merchant_field('city'), merchant_field('state')
+	address, phone = merchant_field('address'), merchant_field('phone')
+
+	description = np.array([
+		f"{name} {number:05d} {town[:13]} {code}" if name else PAYMENT_DESCRIPTION
+		for name, number, town, code in zip(names, store, city, state)
+	], dtype=object)
+
+	columns = {
+		'Date': pd.DatetimeIndex(dates).strftime('%m/%d/%Y'),
+		'Description': description,
+		'Card Member': np.array([name for name, _ in card_members], dtype=object)[member],
+		'Account #': np.array([account for _, account in card_members], dtype=object)[member],
+		'Amount': [f"{value:.2f}" for value in amount],
+		'Extended Details': [
+			f"{number:010d}\n{name}\n{phone_number}\n{street}\n{town}\n{code}" if name else ''
+			for name, number, phone_number, street, town, code in zip(names, store, phone, address, city, state)
+		],
+		'Appears On Your Statement As': description,
+		'Address': [f"{street}\n{town}" if street else '' for street, town in zip(address, city)],
+		'City/State': [f"{town}\n{code}" if town else '' for town, code in zip(city, state)],
+		'Zip Code': merchant_field('zip_code'),
+		'Country': np.where(merchant >= 0, 'UNITED STATES', ''),
+		'Reference': [f"'{value}'" for value in reference],
+		'Category': merchant_field('category')
+	}
+
+	statement = pd.DataFrame(columns)
+	statement['merchant'] = merchant
+	statement['_date'] = dates
+
+	# Re-exported rows: exact copies (same reference) of random earlier rows
+	if rows > unique_rows:
+		duplicates = statement.iloc[rng.integers(0, unique_rows, rows - unique_rows)]
+		statement = pd.concat([statement, duplicates], ignore_index=True)
+
+	statement = statement.sort_values('_date', ascending=False, kind='stable').drop(columns='_date')
+	return statement.reset_index(drop=True)
+
+
+def write_statement(statement, path):
+	"""Write statement rows as an AMEX CSV (multi-line fields quoted)"""
+	statement[CSV_COLUMNS].to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL, lineterminator='\n')
+
+
+def get_labels(statement, merchants):
+	"""
+	Classification labels of statement rows, as the training data has them
+
+	Returns:
+		DataFrame: vendor, expense_account, cost_center ('American Express'
+		/ 'Unknown' for payments)
+	"""
+	index = statement['merchant'].to_numpy()
+	known = index >= 0
+
+	labels = {}
+	for field in ('vendor', 'expense_account', 'cost_center'):
+		values = np.array([getattr(m, field) for m in merchants], dtype=object)
+		labels[field] = np.where(known, values[np.maximum(index, 0)], 'Unknown')
+	labels['vendor'] = np.where(known, labels['vendor'], 'American Express')
+
+	return pd.DataFrame(labels)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+	parser.add_argument('--rows', type=int, default=10000)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', required=True, help='CSV file to write')
+	args = parser.parse_args()
+
+	write_statement(make_statement(args.rows, seed=args.seed), args.output)
+	print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,120 @@
+"""
+Benchmark model bundle compression: size, save time and load time
+
+Saves one trained model with each compression choice and measures how
+long `load_model` plus the first single-row prediction take (the cold
+start an endpoint pays once its imports are done), in a fresh process
+per load so nothing is shared between runs. `load_model` only creates
+lazy handles, so compare compressions on the first predict column.
+
+Uses a model directory if given, otherwise trains a forest on synthetic
+features shaped like the real ones (1,000 description + 3 numeric
+columns, hundreds of vendors).
+
+Usage (from the repository root):
+
+	python benchmarks/model_bundle.py [--model-dir model] [--rows 20000] [--repeat 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAGEMAKER_DIR = os.path.join(ROOT, 'sagemaker')
+sys.path.insert(0, SAGEMAKER_DIR)
+
+from model_bundle import COMPRESSION_CHOICES, ModelBundleError, check_compression  # noqa: E402
+from train import AMEXClassificationModel  # noqa: E402
+
+
+LOAD_SCRIPT = """
+import sys, time
+sys.path.insert(0, {sagemaker_dir!r})
+from scipy import sparse
+from train import AMEXClassificationModel
+start = time.perf_counter()
+model = AMEXClassificationModel.load_model({model_dir!r})
+loaded = time.perf_counter()
+forest = model.model
+model.predict_proba(sparse.csr_matrix((1, {features})))
+print(loaded - start, time.perf_counter() - start)
+"""
+
+
+def make_model(rows, seed=3):
+	"""A model trained on synthetic sparse features with skewed labels"""
+	rng = np.random.default_rng(seed)
+	X = sparse.random(rows, 1000, density=0.004, random_state=seed, format='csr')
+	X = sparse.hstack([X, rng.integers(0, 12, (rows, 3))], format='csr')
+
+	vendors = np.minimum(rng.zipf(1.4, rows), 500)
+	y = np.column_stack([vendors, vendors % 40, vendors % 12])
+
+	model = AMEXClassificationModel()
+	for encoder, column in zip((model.vendor_encoder, model.account_encoder, model.cost_center_encoder), y.T):
+		encoder.fit([f"label {value}" for value in column])
+
+	model.description_vectorizer.fit([f"vendor {i}" for i in range(50)])
+	model.train(X, y)
+	return model, X.shape[1]
+
+
+def available_compressions():
+	choices = []
+	for name in COMPRESSION_CHOICES:
+		try:
+			check_compression(name)
+		except ModelBundleError:
+			continue
+		choices.append(name)
+	return choices
+
+
+def time_load(model_dir, features, repeat):
+	"""Median (load_model, load + first prediction) seconds over fresh processes"""
+	script = LOAD_SCRIPT.format(sagemaker_dir=SAGEMAKER_DIR, model_dir=model_dir, features=features)
+	runs = []
+	for _ in range(repeat):
+		output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+		runs.append([float(value) for value in output.split()[-2:]])
+	return np.median(runs, axis=0)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+	parser.add_argument('--model-dir', help='Existing model bundle (or legacy model directory) to re-save')
+	parser.add_argument('--rows', type=int, default=20000, help='Synthetic training rows (without --model-dir)')
+	parser.add_argument('--repeat', type=int, default=3)
+	args = parser.parse_args()
+
+	if args.model_dir:
+		model = AMEXClassificationModel.load_model(args.model_dir)
+		features = model.model.estimators_[0].n_features_in_
+	else:
+		model, features = make_model(args.rows)
+
+	print(f"{'compression':<12}{'size MB':>10}{'save s':>9}{'handles s':>11}{'first predict s':>17}")
+
+	with tempfile.TemporaryDirectory() as tmp:
+		for compression in available_compressions():
+			model_dir = os.path.join(tmp, compression)
+			start = time.perf_counter()
+			model.save_model(model_dir, compression=compression)
+			save_seconds = time.perf_counter() - start
+
+			size = sum(entry['bytes'] for entry in model.manifest['components'].values())
+			load_seconds, first_predict_seconds = time_load(model_dir, features, args.repeat)
+
+			print(f"{compression:<12}{size / 1024 / 1024:>10.1f}{save_seconds:>9.2f}"
+				f"{load_seconds:>11.2f}{first_predict_seconds:>17.2f}")
+
+
+if __name__ == '__main__':
+	main()
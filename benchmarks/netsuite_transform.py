@@ -0,0 +1,108 @@
+"""
+Benchmark the NetSuite transform: per-record vs DataFrame path
+
+Generates a synthetic NetSuite export (repeated vendors, departments and
+accounts, some missing or malformed fields), checks that
+`transform_frame` matches `transform_transaction` on a sample, then
+times both.
+
+Usage (from the repository root):
+
+	python benchmarks/netsuite_transform.py [--rows 1000000] [--loop-rows 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from transform_netsuite_to_erpnext import (  # noqa: E402
+	LocalDirectorySource, NetSuiteToERPNextTransformer, frame_row_to_transaction
+)
+
+
+def make_records(rows, seed=7):
+	"""Synthetic NetSuite records with a realistic amount of repetition"""
+	rng = np.random.default_rng(seed)
+	today = datetime(2025, 6, 30)
+
+	vendors = [f"Vendor {i} {suffix}" for i in range(2000) for suffix in ('Inc', 'LLC.', 'Corp', '')][:5000]
+	departments = ['Marketing', 'Marketing - Meta', 'marketing - tiktok ads', 'Operations',
+		'Operations - Logistics', 'Finance', '']
+	accounts = ['6100 - Advertising', '6200 - Travel & Entertainment', '6900 - Office Rent',
+		'7000 - Marketing Events', '7100 - Travel Other', '']
+
+	vendor_idx = np.minimum(rng.zipf(1.3, rows) - 1, len(vendors) - 1)
+	days = rng.integers(0, 720, rows)
+	amounts = np.round(rng.lognormal(4, 1.2, rows), 2)
+
+	records = []
+	for i in range(rows):
+		record = {
+			'vendor': vendors[vendor_idx[i]] if i % 11 else '',
+			'payee': vendors[vendor_idx[i]],
+			'memo': f"Invoice {i}",
+			'amount': amounts[i] if i % 97 else '',
+			'date': (today - timedelta(days=int(days[i]))).strftime('%Y-%m-%d') if i % 53 else 'n/a',
+			'department': departments[i % len(departments)],
+			'class': 'Brand A',
+			'account': accounts[i % len(accounts)]
+		}
+		records.append(record)
+
+	return records
+
+
+def make_transformer():
+	transformer = NetSuiteToERPNextTransformer(source=LocalDirectorySource(ROOT), output_dir=tempfile.mkdtemp())
+	transformer.load_mapping_config(os.path.join(ROOT, 'scripts', 'mapping_config.example.json'))
+	return transformer
+
+
+def check_equivalence(transformer, records, now):
+	frame_rows = [frame_row_to_transaction(row) for row in transformer.transform_frame(pd.DataFrame(records), now=now).to_dict('records')]
+	loop_rows = [row for row in (transformer.transform_transaction(record) for record in records) if row]
+
+	assert len(frame_rows) == len(loop_rows), (len(frame_rows), len(loop_rows))
+	for frame_row, loop_row in zip(frame_rows, loop_rows):
+		assert frame_row == loop_row, (frame_row, loop_row)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+	parser.add_argument('--rows', type=int, default=1000000)
+	parser.add_argument('--loop-rows', type=int, default=100000, help='rows for the per-record baseline')
+	args = parser.parse_args()
+
+	transformer = make_transformer()
+	records = make_records(args.rows)
+
+	check_equivalence(transformer, records[:5000], now=datetime.now())
+
+	loop_records = records[:args.loop_rows]
+	start = time.perf_counter()
+	for record in loop_records:
+		transformer.transform_transaction(record)
+	loop_rate = len(loop_records) / (time.perf_counter() - start)
+
+	df = pd.DataFrame(records)
+	start = time.perf_counter()
+	out = transformer.transform_frame(df)
+	frame_time = time.perf_counter() - start
+	frame_rate = len(records) / frame_time
+
+	print(f"per-record:      {loop_rate:12,.0f} rows/s ({len(loop_records):,} rows)")
+	print(f"transform_frame: {frame_rate:12,.0f} rows/s ({len(records):,} rows in {frame_time:.2f} s, {len(out):,} kept)")
+	print(f"speedup:         {frame_rate / loop_rate:12.1f}x")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,84 @@
+"""
+Benchmark the cost center split allocation engine
+
+Allocates a synthetic batch (default 10,000 transactions x 5 splits, a mix
+of percentage-only, amount-only and mixed split sets) with the vectorized
+batch function and, for comparison, one transaction at a time.
+
+Usage (from the repository root, no Frappe site needed):
+
+	python benchmarks/split_allocation.py [--transactions 10000] [--splits 5] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from erpnext_amex.utils.split_allocation import allocate_batch, allocate_splits  # noqa: E402
+
+
+def make_batch(transactions, splits, seed=42):
+	"""Random totals and splits that allocate the full amount"""
+	rng = np.random.default_rng(seed)
+
+	totals = np.round(rng.uniform(1, 5000, transactions), 2)
+	parents = np.repeat(np.arange(transactions), splits)
+
+	weights = rng.uniform(1, 10, (transactions, splits))
+	percentages = np.round(weights / weights.sum(axis=1, keepdims=True) * 100, 2)
+	percentages[:, -1] = np.round(100 - percentages[:, :-1].sum(axis=1), 2)
+
+	# A third of the transactions use explicit amounts instead
+	amounts = np.zeros((transactions, splits))
+	use_amounts = rng.random(transactions) < 1 / 3
+	shares = np.floor(totals[:, None] * percentages / 100 * 100) / 100
+	shares[:, -1] = np.round(totals - shares[:, :-1].sum(axis=1), 2)
+	amounts[use_amounts] = shares[use_amounts]
+	percentages[use_amounts] = 0
+
+	return totals, parents, amounts.ravel(), percentages.ravel()
+
+
+def time_call(func, repeat):
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = func()
+		timings.append(time.perf_counter() - start)
+	return min(timings), result
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+	parser.add_argument('--transactions', type=int, default=10000)
+	parser.add_argument('--splits', type=int, default=5)
+	parser.add_argument('--repeat', type=int, default=5)
+	args = parser.parse_args()
+
+	totals, parents, amounts, percentages = make_batch(args.transactions, args.splits)
+
+	batch_time, (split_cents, unallocated) = time_call(
+		lambda: allocate_batch(totals, parents, amounts, percentages), args.repeat
+	)
+
+	rows = [
+		[{'amount': amounts[i], 'percentage': percentages[i]} for i in range(t * args.splits, (t + 1) * args.splits)]
+		for t in range(args.transactions)
+	]
+	single_time, _ = time_call(
+		lambda: [allocate_splits(totals[t], rows[t]) for t in range(args.transactions)], 1
+	)
+
+	print(f"{args.transactions} transactions x {args.splits} splits")
+	print(f"  batch:       {batch_time * 1000:8.2f} ms (best of {args.repeat})")
+	print(f"  one by one:  {single_time * 1000:8.2f} ms")
+	print(f"  unallocated: {int(np.count_nonzero(unallocated))} transactions")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,580 @@
+"""
+Benchmark suite: AMEX import, classification and posting paths
+
+Times each scenario on synthetic statements (see amex_statement.py) of
+every requested size and writes the results as JSON, so runs on two
+commits can be compared with `--compare`.
+
+Scenarios and what they need:
+
+	parse_amex_csv         a site (--site): parse a statement CSV and insert its transactions
+	normalize_vendor_name  frappe importable: normalize every description
+	suggestion_lookup      a site: rules for the top merchants, then
+	                       get_classification_suggestions over the descriptions
+	journal_entries        a site: build, insert and submit Journal Entries
+	                       (every fifth one split 60/40 over two cost centers)
+	prepare_features       sagemaker dependencies: features for the statement
+	predict_fn             sagemaker dependencies: endpoint predictions in
+	                       batches of --predict-batch rows
+
+Site scenarios run with `frappe.db.commit` disabled and are rolled back
+after every repetition, so the site is left unchanged; they use at most
+--site-rows rows (--je-rows for journal entries) of each statement.
+Scenarios whose requirements are missing are recorded as skipped.
+
+The model for prepare_features/predict_fn is a bundle from --model-dir, or
+is trained on a separate synthetic statement (with a split head).
+
+Usage (from the repository root; site scenarios from frappe-bench/sites
+with the bench's Python):
+
+	python benchmarks/suite.py [--sizes 1k,10k,100k,1M] [--scenarios prepare_features,predict_fn]
+		[--repeat 3] [--output results.json] [--compare benchmarks/results/<commit>.json]
+	../env/bin/python ../apps/erpnext_amex/benchmarks/suite.py --site mysite.local
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+# sagemaker/ goes ahead of benchmarks/ (the script's own directory), whose
+# model_bundle.py would otherwise shadow sagemaker/model_bundle.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'sagemaker'))
+
+from amex_statement import get_labels, make_merchants, make_statement, write_statement  # noqa: E402
+
+
+DEFAULT_SIZES = '1k,10k,100k'
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Median time change (either way) reported as slower/faster by --compare
+DEFAULT_TOLERANCE = 0.1
+
+# Rules seeded for suggestion_lookup (top merchants by frequency)
+SUGGESTION_RULES = 500
+
+# Synthetic model for prepare_features/predict_fn
+TRAIN_ROWS = 20000
+TRAIN_PARAMS = {'n_estimators': 50}
+
+# Merchants (by popularity rank) whose training rows are split, and how
+SPLIT_MERCHANTS = {1: [{'cost_center': 'Marketing', 'percentage': 60}, {'cost_center': 'Operations', 'percentage': 40}]}
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+class Requirement(Exception):
+	"""A scenario's requirements are not met; the message says which"""
+
+
+def parse_size(value):
+	"""'10k' -> 10000, '1M' -> 1000000, '2500' -> 2500"""
+	value = value.strip().lower()
+	if value[-1:] in SIZE_SUFFIXES:
+		return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+	return int(value)
+
+
+def format_size(rows):
+	for suffix, factor in (('M', 1000000), ('k', 1000)):
+		if rows >= factor and rows % factor == 0:
+			return f"{rows // factor}{suffix}"
+	return str(rows)
+
+
+def get_commit():
+	"""(commit hash, whether the working tree has changes), or (None, None) outside git"""
+	try:
+		commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+		status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+			capture_output=True, text=True, check=True).stdout
+		return commit, bool(status.strip())
+	except (OSError, subprocess.CalledProcessError):
+		return None, None
+
+
+def to_request_frame(statement):
+	"""Statement rows as the endpoint receives them from ml_classifier"""
+	return pd.DataFrame({
+		'vendor_description': statement['Description'],
+		'amount': statement['Amount'].astype(float),
+		'amex_category': statement['Category'],
+		'date': pd.to_datetime(statement['Date'], format='%m/%d/%Y').dt.strftime('%Y-%m-%d'),
+		'card_member': statement['Card Member']
+	})
+
+
+class SuiteContext:
+	"""Inputs shared by the scenarios of one run"""
+
+	def __init__(self, args):
+		self.args = args
+		self.merchants = make_merchants(seed=args.seed)
+		self.tmp_dir = tempfile.mkdtemp(prefix='amex_benchmark_')
+		self.site_connected = False
+		self._model = None
+
+		self.size = None
+		self.statement = None
+		self._frame = None
+		self._site_csv = None
+
+	def set_size(self, size):
+		self.size = size
+		start = time.perf_counter()
+		self.statement = make_statement(size, seed=self.args.seed, merchants=self.merchants)
+		self._frame = None
+		self._site_csv = None
+		print(f"\n{format_size(size)} rows (generated in {time.perf_counter() - start:.1f}s)")
+
+	@property
+	def frame(self):
+		if self._frame is None:
+			self._frame = to_request_frame(self.statement)
+		return self._frame
+
+	@property
+	def site_rows(self):
+		return min(self.size, self.args.site_rows)
+
+	@property
+	def site_csv(self):
+		"""The first `site_rows` rows written as a CSV"""
+		if self._site_csv is None:
+			self._site_csv = os.path.join(self.tmp_dir, f"statement_{self.site_rows}.csv")
+			write_statement(self.statement.head(self.site_rows), self._site_csv)
+		return self._site_csv
+
+	@property
+	def model(self):
+		if self._model is None:
+			self._model = load_benchmark_model(self)
+		return self._model
+
+	def require_frappe(self):
+		try:
+			import frappe  # noqa: F401
+		except ImportError:
+			raise Requirement("frappe is not installed")
+
+	def require_site(self):
+		self.require_frappe()
+		if not self.site_connected:
+			raise Requirement("needs --site")
+
+
+def require_sagemaker():
+	try:
+		import sklearn  # noqa: F401
+		import train  # noqa: F401
+	except ImportError as e:
+		raise Requirement(f"sagemaker dependencies missing ({e.name})")
+
+
+def load_benchmark_model(context):
+	"""The model bundle from --model-dir, or one trained on a synthetic statement"""
+	from split_model import SplitRecommender, get_split_pattern
+	from train import AMEXClassificationModel
+
+	if context.args.model_dir:
+		model = AMEXClassificationModel.load_model(context.args.model_dir)
+		print(f"Using model {model.model_version or 'unversioned'} from {context.args.model_dir}")
+		return model
+
+	start = time.perf_counter()
+	statement = make_statement(context.args.train_rows, seed=context.args.seed + 1, merchants=context.merchants)
+	df = pd.concat([to_request_frame(statement), get_labels(statement, context.merchants)], axis=1)
+
+	model = AMEXClassificationModel()
+	X = model.prepare_features(df, fit=True)
+	y, _ = model.prepare_labels(df, fit=True)
+
+	calibration_rows = len(df) // 5
+	model.train(X[calibration_rows:], y[calibration_rows:], params=TRAIN_PARAMS)
+	model.calibrate(X[:calibration_rows], y[:calibration_rows])
+
+	patterns = [get_split_pattern(SPLIT_MERCHANTS.get(merchant)) for merchant in statement['merchant']]
+	model.split_model = SplitRecommender(TRAIN_PARAMS).fit(X, patterns)
+
+	print(f"Trained benchmark model on {len(df)} rows in {time.perf_counter() - start:.1f}s")
+	return model
+
+
+@contextmanager
+def rolled_back():
+	"""Run with frappe.db.commit disabled and roll everything back afterwards"""
+	import frappe
+
+	commit = frappe.db.commit
+	frappe.db.commit = lambda *args, **kwargs: None
+	try:
+		yield
+	finally:
+		frappe.db.commit = commit
+		frappe.db.rollback()
+
+
+def scenario_parse_amex_csv(context):
+	context.require_site()
+	import frappe
+	from frappe.utils import nowdate
+	from erpnext_amex.utils.csv_parser import parse_amex_csv
+
+	path = context.site_csv
+	settings = frappe.get_single('AMEX Integration Settings')
+	if not settings.amex_liability_account:
+		raise Requirement("AMEX Integration Settings has no AMEX liability account")
+
+	def setup():
+		# No csv_file, so inserting the batch does not import anything itself
+		batch = frappe.get_doc({
+			'doctype': 'AMEX Import Batch',
+			'import_date': nowdate(),
+			'uploaded_by': 'Administrator',
+			'status': 'Draft',
+			'amex_card_account': settings.amex_liability_account
+		})
+		batch.insert(ignore_permissions=True, ignore_mandatory=True)
+		return batch.name
+
+	def run(batch_name):
+		parse_amex_csv(path, batch_name)
+
+	return setup, run, context.site_rows
+
+
+def scenario_normalize_vendor_name(context):
+	context.require_frappe()
+	from erpnext_amex.utils.classification_memory import normalize_vendor_name
+
+	descriptions = context.statement['Description'].tolist()
+
+	def run(_):
+		for description in descriptions:
+			normalize_vendor_name(description)
+
+	return lambda: None, run, len(descriptions)
+
+
+def scenario_suggestion_lookup(context):
+	context.require_site()
+	import frappe
+	from erpnext_amex.utils.classification_memory import get_classification_suggestions, normalize_vendor_name
+
+	descriptions = context.statement['Description'].head(context.site_rows).tolist()
+
+	counts = context.statement['merchant'].value_counts()
+	top = [index for index in counts.index if index >= 0][:SUGGESTION_RULES]
+	first_description = context.statement.drop_duplicates('merchant').set_index('merchant')['Description']
+	patterns = sorted({normalize_vendor_name(first_description[index]) for index in top} - {''})
+
+	def setup():
+		for pattern in patterns:
+			if not frappe.db.exists('AMEX Vendor Classification Rule', pattern):
+				frappe.get_doc({
+					'doctype': 'AMEX Vendor Classification Rule',
+					'vendor_pattern': pattern,
+					'enabled': 1
+				}).insert(ignore_permissions=True)
+
+	def run(_):
+		get_classification_suggestions(descriptions)
+
+	return setup, run, len(descriptions)
+
+
+def scenario_journal_entries(context):
+	context.require_site()
+	import frappe
+	from frappe.utils import nowdate
+	from erpnext_amex.utils.journal_entry_creator import create_journal_entry_from_transaction
+	from erpnext_amex.utils.posting_context import clear_posting_context, get_posting_context
+
+	settings = frappe.get_single('AMEX Integration Settings')
+	company = get_posting_context().company
+	if not settings.amex_liability_account or not company:
+		raise Requirement("AMEX Integration Settings needs an AMEX liability account and company")
+
+	expense_account = frappe.get_all('Account', filters={'root_type': 'Expense', 'is_group': 0, 'company': company}, limit=1)
+	cost_centers = frappe.get_all('Cost Center', filters={'is_group': 0, 'company': company}, limit=2)
+	if not expense_account or not cost_centers:
+		raise Requirement(f"{company} needs an expense account and a cost center")
+
+	vendor = None
+	if settings.require_vendor_for_posting:
+		suppliers = frappe.get_all('Supplier', filters={'disabled': 0}, limit=1)
+		if not suppliers:
+			raise Requirement("vendors are required for posting and there is no supplier")
+		vendor = suppliers[0].name
+
+	rows = context.statement[context.statement['merchant'] >= 0].head(min(context.size, context.args.je_rows))
+
+	def setup():
+		clear_posting_context()
+		transactions = []
+		for i, (description, card_member, amount, reference) in enumerate(
+			zip(rows['Description'], rows['Card Member'], rows['Amount'], rows['Reference'])
+		):
+			transaction = frappe.get_doc({
+				'doctype': 'AMEX Transaction',
+				'transaction_date': nowdate(),
+				'description': description,
+				'card_member': card_member,
+				'amount': abs(float(amount)),
+				'reference': reference.strip("'"),
+				'amex_card_account': settings.amex_liability_account,
+				'vendor': vendor,
+				'expense_account': expense_account[0].name,
+				'cost_center': cost_centers[0].name,
+				'status': 'Approved'
+			})
+			if i % 5 == 0 and len(cost_centers) > 1:
+				transaction.cost_center = None
+				transaction.append('cost_center_splits', {'cost_center': cost_centers[0].name, 'percentage': 60})
+				transaction.append('cost_center_splits', {'cost_center': cost_centers[1].name, 'percentage': 40})
+			transactions.append(transaction)
+		return transactions
+
+	def run(transactions):
+		for transaction in transactions:
+			create_journal_entry_from_transaction(transaction)
+
+	return setup, run, len(rows)
+
+
+def scenario_prepare_features(context):
+	require_sagemaker()
+	model = context.model
+
+	def run(frame):
+		model.prepare_features(frame, fit=False)
+
+	# prepare_features adds columns to its input; every repetition gets a fresh copy
+	return lambda: context.frame.copy(), run, len(context.frame)
+
+
+def scenario_predict_fn(context):
+	require_sagemaker()
+	import inference
+
+	model = context.model
+	batch_size = context.args.predict_batch
+
+	def setup():
+		frame = context.frame
+		return [frame.iloc[start:start + batch_size].reset_index(drop=True) for start in range(0, len(frame), batch_size)]
+
+	def run(batches):
+		for batch in batches:
+			inference.predict_fn(batch, model)
+
+	return setup, run, len(context.frame)
+
+
+SCENARIOS = {
+	'parse_amex_csv': (scenario_parse_amex_csv, True),
+	'normalize_vendor_name': (scenario_normalize_vendor_name, False),
+	'suggestion_lookup': (scenario_suggestion_lookup, True),
+	'journal_entries': (scenario_journal_entries, True),
+	'prepare_features': (scenario_prepare_features, False),
+	'predict_fn': (scenario_predict_fn, False)
+}
+
+
+def run_scenario(context, name, repeat):
+	"""
+	Time one scenario at the current size
+
+	Returns:
+		dict: Result row (times in seconds), or one with `skipped`
+	"""
+	scenario, uses_site = SCENARIOS[name]
+	result = {'scenario': name, 'size': context.size}
+
+	try:
+		setup, run, rows = scenario(context)
+	except Requirement as e:
+		result['skipped'] = str(e)
+		print(f"  {name:<24}skipped: {e}")
+		return result
+
+	times = []
+	for _ in range(repeat):
+		with rolled_back() if uses_site else nullcontext():
+			state = setup()
+			start = time.perf_counter()
+			run(state)
+			times.append(time.perf_counter() - start)
+
+	median = float(np.median(times))
+	result.update({
+		'rows': rows,
+		'times': times,
+		'min_seconds': min(times),
+		'median_seconds': median,
+		'rows_per_second': rows / median if median else None
+	})
+
+	print(f"  {name:<24}{rows:>9} rows {median:>10.3f}s median {result['rows_per_second'] or 0:>14,.0f} rows/s")
+	return result
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+	"""
+	Median time ratios against a baseline run, per (scenario, size)
+
+	Returns:
+		list: dicts with scenario, size, baseline/current median seconds,
+		ratio (current / baseline) and change (slower/faster/same)
+	"""
+	previous = {
+		(row['scenario'], row['size']): row
+		for row in baseline.get('results', [])
+		if 'median_seconds' in row
+	}
+
+	rows = []
+	for row in results:
+		before = previous.get((row['scenario'], row['size']))
+		if before is None or 'median_seconds' not in row or before.get('rows') != row['rows']:
+			continue
+
+		ratio = row['median_seconds'] / before['median_seconds'] if before['median_seconds'] else None
+		change = 'same'
+		if ratio is not None and ratio > 1 + tolerance:
+			change = 'slower'
+		elif ratio is not None and ratio < 1 - tolerance:
+			change = 'faster'
+
+		rows.append({
+			'scenario': row['scenario'],
+			'size': row['size'],
+			'baseline_seconds': before['median_seconds'],
+			'seconds': row['median_seconds'],
+			'ratio': ratio,
+			'change': change
+		})
+
+	return rows
+
+
+def format_comparison(comparison, baseline_commit):
+	lines = [f"\nCompared with {baseline_commit or 'baseline'}:",
+		f"{'scenario':<24}{'size':>6}{'before s':>11}{'after s':>11}{'ratio':>8}"]
+	for row in comparison:
+		ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else '-'
+		flag = '' if row['change'] == 'same' else f"  {row['change']}"
+		lines.append(f"{row['scenario']:<24}{format_size(row['size']):>6}{row['baseline_seconds']:>11.3f}"
+			f"{row['seconds']:>11.3f}{ratio:>8}{flag}")
+	return "\n".join(lines)
+
+
+def connect_site(site, sites_path):
+	import frappe
+
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	frappe.set_user('Administrator')
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+	parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Statement sizes, e.g. 1k,10k,100k,1M')
+	parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated scenarios to run')
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', help='Results JSON (default: benchmarks/results/<commit>.json)')
+	parser.add_argument('--compare', help='Earlier results JSON to compare with')
+	parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+		help='Median change reported as slower/faster by --compare')
+	parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if --compare finds a slower scenario')
+	parser.add_argument('--site', help='Frappe site for the site scenarios')
+	parser.add_argument('--sites-path', default='.', help='frappe-bench/sites directory')
+	parser.add_argument('--site-rows', type=int, default=10000, help='Rows per statement used by site scenarios')
+	parser.add_argument('--je-rows', type=int, default=200, help='Journal entries posted per repetition')
+	parser.add_argument('--model-dir', help='Model bundle for prepare_features/predict_fn (default: train one)')
+	parser.add_argument('--train-rows', type=int, default=TRAIN_ROWS)
+	parser.add_argument('--predict-batch', type=int, default=1000, help='Rows per predict_fn call')
+	args = parser.parse_args()
+
+	scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+	unknown = set(scenarios) - set(SCENARIOS)
+	if unknown:
+		parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))} (choose from {', '.join(SCENARIOS)})")
+
+	sizes = [parse_size(size) for size in args.sizes.split(',')]
+	commit, dirty = get_commit()
+
+	context = SuiteContext(args)
+	if args.site:
+		connect_site(args.site, args.sites_path)
+		context.site_connected = True
+
+	results = []
+	try:
+		for size in sizes:
+			context.set_size(size)
+			for name in scenarios:
+				results.append(run_scenario(context, name, args.repeat))
+	finally:
+		if context.site_connected:
+			import frappe
+			frappe.destroy()
+
+	report = {
+		'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+		'commit': commit,
+		'dirty': dirty,
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'cpu_count': os.cpu_count(),
+		'seed': args.seed,
+		'repeat': args.repeat,
+		'options': {
+			'site': bool(args.site),
+			'site_rows': args.site_rows,
+			'je_rows': args.je_rows,
+			'model_dir': args.model_dir,
+			'train_rows': None if args.model_dir else args.train_rows,
+			'predict_batch': args.predict_batch
+		},
+		'results': results
+	}
+
+	regressions = False
+	if args.compare:
+		with open(args.compare, 'r') as f:
+			baseline = json.load(f)
+		comparison = compare_results(results, baseline, args.tolerance)
+		report['comparison'] = {'baseline_commit': baseline.get('commit'), 'tolerance': args.tolerance, 'rows': comparison}
+		print(format_comparison(comparison, baseline.get('commit')))
+		regressions = any(row['change'] == 'slower' for row in comparison)
+
+	output = args.output
+	if not output:
+		os.makedirs(RESULTS_DIR, exist_ok=True)
+		name = (commit or 'uncommitted')[:12] + ('-dirty' if dirty else '')
+		output = os.path.join(RESULTS_DIR, f"{name}.json")
+
+	with open(output, 'w') as f:
+		json.dump(report, f, indent=2)
+	print(f"\nResults saved to {output}")
+
+	if regressions and args.fail_on_regression:
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -4,6 +4,7 @@
 import frappe
 from frappe.model.document import Document
 from erpnext_amex.utils.csv_parser import parse_amex_csv, create_import_batch
+from erpnext_amex.utils.batch_counters import BATCH_COUNTER_FIELDS
 
 
 class AMEXImportBatch(Document):
@@ -29,15 +30,12 @@ class AMEXImportBatch(Document):
 			file_path = file_doc.get_full_path()
 			
 			# Parse CSV and create transactions
-			result = parse_amex_csv(file_path, self.name)
+			parse_amex_csv(file_path, self.name)
 			
-			# Update batch summary
-			self.total_transactions = result.get("total", 0)
-			self.duplicate_count = result.get("duplicates", 0)
-			self.excluded_count = result.get("excluded", 0)
-			self.pending_count = result.get("pending", 0)
-			self.status = "In Review"
-			self.save()
+			# Counters are maintained by AMEX Transaction as rows are inserted;
+			# only the status is written so concurrent increments are kept
+			self.update(frappe.db.get_value("AMEX Import Batch", self.name, BATCH_COUNTER_FIELDS, as_dict=True))
+			self.db_set("status", "In Review")
 			
 			frappe.msgprint(f"Imported {self.total_transactions} transactions. {self.duplicate_count} duplicates, {self.excluded_count} payments excluded.")
 			
@@ -4,6 +4,11 @@
 import frappe
 from frappe.model.document import Document
 from frappe.utils import nowdate, now
+from erpnext_amex.utils.batch_counters import update_batch_counters
+from erpnext_amex.utils.reference_cache import register_card_member
+from erpnext_amex.utils.split_allocation import allocate_splits, get_allocation_error
+from erpnext_amex.utils.review_updates import has_review_changes, queue_review_update
+from erpnext_amex.utils.transaction_search import add_search_index
 
 
 class AMEXTransaction(Document):
@@ -13,23 +18,42 @@ class AMEXTransaction(Document):
 		self.check_duplicate()
 		self.detect_amex_payment()
 	
+	def on_update(self):
+		"""Keep batch counters, cached filter options and open review pages in step with changes"""
+		self.update_batch_counters()
+		
+		if self.has_value_changed("card_member"):
+			register_card_member(self.card_member)
+		
+		if has_review_changes(self):
+			queue_review_update(self)
+	
+	def on_trash(self):
+		"""Remove this transaction from its batch counters and open review pages"""
+		update_batch_counters(self.batch_id, old_status=self.status, total_delta=-1)
+		queue_review_update({'name': self.name, 'status': None})
+	
+	def update_batch_counters(self):
+		"""Apply this save's batch/status transition to AMEX Import Batch counters"""
+		before = self.get_doc_before_save()
+		
+		if not before:
+			update_batch_counters(self.batch_id, new_status=self.status, total_delta=1)
+		elif before.batch_id != self.batch_id:
+			update_batch_counters(before.batch_id, old_status=before.status, total_delta=-1)
+			update_batch_counters(self.batch_id, new_status=self.status, total_delta=1)
+		elif before.status != self.status:
+			update_batch_counters(self.batch_id, before.status, self.status)
+	
 	def validate_cost_center_splits(self):
-		"""Ensure cost center splits total correctly"""
+		"""Ensure cost center splits allocate the full transaction amount"""
 		if not self.cost_center_splits:
 			return
 		
-		total_amount = sum([split.amount or 0 for split in self.cost_center_splits])
-		total_percentage = sum([split.percentage or 0 for split in self.cost_center_splits])
-		
-		# Check if using amounts
-		if any([split.amount for split in self.cost_center_splits]):
-			if abs(total_amount - self.amount) > 0.01:  # Allow for rounding errors
-				frappe.throw(f"Cost center split amounts ({total_amount}) must equal transaction amount ({self.amount})")
-		
-		# Check if using percentages
-		if any([split.percentage for split in self.cost_center_splits]):
-			if abs(total_percentage - 100) > 0.01:  # Allow for rounding errors
-				frappe.throw(f"Cost center split percentages ({total_percentage}%) must total 100%")
+		allocation = allocate_splits(self.amount, self.cost_center_splits)
+		error = get_allocation_error(self.amount, allocation)
+		if error:
+			frappe.throw(error)
 	
 	def check_duplicate(self):
 		"""Check if this is a duplicate transaction"""
@@ -113,3 +137,18 @@ class AMEXTransaction(Document):
 		
 		return je
 
+
+def on_doctype_update():
+	"""Composite indexes for the review page and reports"""
+	frappe.db.add_index("AMEX Transaction", ["status", "transaction_date", "name"])
+	frappe.db.add_index("AMEX Transaction", ["status", "modified"])
+	frappe.db.add_index("AMEX Transaction", ["card_member", "status"])
+	frappe.db.add_index("AMEX Transaction", ["batch_id", "status"])
+	# Daily rollup slices (see transaction_rollup.get_slice_condition)
+	frappe.db.add_index("AMEX Transaction", ["transaction_date", "card_member"])
+	# Review list sort orders (see amex_review.SORT_FIELDS)
+	frappe.db.add_index("AMEX Transaction", ["status", "amount", "name"])
+	frappe.db.add_index("AMEX Transaction", ["status", "card_member", "name"])
+	frappe.db.add_index("AMEX Transaction", ["status", "description", "name"])
+	# Keyword search
+	add_search_index()
@@ -0,0 +1,15 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class AMEXTransactionDailyRollup(Document):
+	pass
+
+
+def on_doctype_update():
+	"""Indexes for the AMEX Backlog Aging report"""
+	frappe.db.add_index("AMEX Transaction Daily Rollup", ["rollup_date", "card_member"])
+	frappe.db.add_index("AMEX Transaction Daily Rollup", ["status", "rollup_date"])
@@ -31,40 +31,73 @@ class AMEXReviewPage {
 		this.keyword_debounce_timer = null;
 		this.sort_field = 'transaction_date';
 		this.sort_order = 'desc';
+		this.client_sorted = false; // true once rows are re-sorted locally
+		this.total_count = null;
+		this.has_more = false;
+		this.page_length = 500;
+		this.active_filters = null; // filters the loaded rows were fetched with
+		this.list_request = null; // in-flight list request, aborted when superseded
+		this.list_request_sequence = 0;
+
+		// Virtualized grid state
+		this.view = []; // indexes into this.transactions, in display order
+		this.sort_index_cache = {};
+		this.row_index = new Map(); // transaction name -> index in this.transactions
+		this.rendered_rows = new Map(); // transaction name -> <tr> currently in the DOM
+		this.active_row = null;
+		this.row_height = 41;
+		this.row_height_measured = false;
+		this.overscan = 10;
+		this.render_frame = null;
+		this.top_spacer = this.make_spacer_row();
+		this.bottom_spacer = this.make_spacer_row();
 		this.current_transaction_amount = 0;
 		this.split_row_counter = 0;
 		this.split_fields = {}; // Store Frappe Link field instances for splits
+		this.split_sources = {}; // Field the user typed per split row: 'amount' or 'percentage'
+		this.split_preview_timer = null;
+		this.split_allocation_error = null;
 		this.amex_company = null; // Company filter from settings
 		
 		// Load the HTML
 		$(frappe.render_template("amex_review", {})).appendTo(this.page.body);
 		
-		// Load company from settings first, then setup fields
-		this.load_company_setting().then(() => {
-			this.setup_events();
-			this.setup_autocomplete_fields();
-			this.load_filter_options();
-			this.load_transactions();
-		});
+		// Link field queries read amex_company lazily, so the fields can be
+		// built before the bootstrap response arrives
+		this.setup_events();
+		this.setup_autocomplete_fields();
+		this.setup_realtime();
+		this.bootstrap();
 	}
 	
-	load_company_setting() {
+	bootstrap() {
+		// Settings, filter options and the first page in a single GET; the
+		// server sends an ETag so unchanged reloads are answered with 304
 		const me = this;
-		return new Promise((resolve) => {
-			frappe.call({
-				method: 'frappe.client.get_single_value',
-				args: {
-					doctype: 'AMEX Integration Settings',
-					field: 'default_company'
-				},
-				async: false,
-				callback: function(r) {
-					if (r.message) {
-						me.amex_company = r.message;
-					}
-					resolve();
-				}
-			});
+
+		this.active_filters = this.get_filters();
+
+		$('#loading-transactions').show();
+		$('#no-transactions').hide();
+
+		frappe.call({
+			method: 'erpnext_amex.amex_integration.page.amex_review.amex_review.bootstrap',
+			type: 'GET',
+			args: {
+				filters: JSON.stringify(this.active_filters),
+				sort_by: this.sort_field,
+				sort_order: this.sort_order
+			},
+			callback: (r) => {
+				$('#loading-transactions').hide();
+
+				if (!r.message) return;
+
+				me.amex_company = r.message.settings.default_company;
+				me.page_length = r.message.page_length;
+				me.populate_filter_options(r.message.filter_options);
+				me.show_transactions(r.message.transactions, r.message.total_count);
+			}
 		});
 	}
 
@@ -229,15 +262,23 @@ class AMEXReviewPage {
 		// Keyword filter with debounce
 		$('#filter-keyword').on('input', function() {
 			clearTimeout(me.keyword_debounce_timer);
+			// Results for the previous keyword are no longer wanted
+			me.abort_list_request();
 			me.keyword_debounce_timer = setTimeout(() => {
 				me.load_transactions();
 			}, 500);
 		});
 
-		// Select all checkbox
+		// Select all checkbox (covers every loaded row, not just the rendered window)
 		$('#select-all-transactions').change(function() {
 			const checked = $(this).is(':checked');
-			$('.transaction-checkbox').prop('checked', checked);
+			me.selected_transactions.clear();
+			if (checked) {
+				me.transactions.forEach(trans => me.selected_transactions.add(trans.name));
+			}
+			me.rendered_rows.forEach(row => {
+				row.querySelector('.transaction-checkbox').checked = checked;
+			});
 			me.update_selected_transactions();
 		});
 
@@ -245,17 +286,25 @@ class AMEXReviewPage {
 		$(document).on('click', '.transaction-row', function(e) {
 			if ($(e.target).is('input[type="checkbox"]')) return;
 			
-			const name = $(this).data('name');
+			const name = this.dataset.name;
 			me.load_transaction_details(name);
-			$('.transaction-row').removeClass('table-active');
-			$(this).addClass('table-active');
+			me.set_active_row(name);
 		});
 
 		// Transaction checkbox
 		$(document).on('change', '.transaction-checkbox', function() {
+			if (this.checked) {
+				me.selected_transactions.add(this.value);
+			} else {
+				me.selected_transactions.delete(this.value);
+			}
 			me.update_selected_transactions();
 		});
 
+		// Render the rows under the viewport at most once per frame
+		$('#transaction-scroll').on('scroll', () => me.schedule_render());
+		$(window).on('resize', () => me.schedule_render());
+
 		// Sortable column headers
 		$(document).on('click', '.sortable-header', function() {
 			const field = $(this).data('field');
@@ -273,6 +322,17 @@ class AMEXReviewPage {
 		$(document).on('click', '.remove-split-btn', function() {
 			$(this).closest('tr').remove();
 			me.calculate_split_totals();
+			me.queue_split_preview();
+		});
+
+		// ML candidate: fill the field without a Link search
+		$(document).on('click', '.ml-candidate', function() {
+			me.apply_ml_candidate(this.dataset.field, this.dataset.value);
+		});
+
+		// ML split proposal: fill the split table
+		$(document).on('click', '.ml-split-candidate', function() {
+			me.apply_ml_split(me.ml_split_proposal);
 		});
 
 		// Split amount/percentage change
@@ -302,55 +362,118 @@ class AMEXReviewPage {
 		$('#save-vendor-btn').click(() => me.create_vendor());
 	}
 
-	load_filter_options() {
-		frappe.call({
-			method: 'erpnext_amex.amex_integration.page.amex_review.amex_review.get_filter_options',
-			callback: (r) => {
-				if (r.message) {
-					// Populate batch filter
-					r.message.batches.forEach(batch => {
-						$('#filter-batch').append(`<option value="${batch.name}">${batch.name} (${batch.import_date})</option>`);
-					});
+	populate_filter_options(options) {
+		// Populate batch filter
+		options.batches.forEach(batch => {
+			$('#filter-batch').append(`<option value="${batch.name}">${batch.name} (${batch.import_date})</option>`);
+		});
 
-					// Populate card member filter
-					r.message.card_members.forEach(member => {
-						$('#filter-card-member').append(`<option value="${member}">${member}</option>`);
-					});
-				}
-			}
+		// Populate card member filter
+		options.card_members.forEach(member => {
+			$('#filter-card-member').append(`<option value="${member}">${member}</option>`);
 		});
 	}
 
-	load_transactions() {
-		const me = this;
-		const filters = {
+	get_filters() {
+		return {
 			batch_id: $('#filter-batch').val(),
 			card_member: $('#filter-card-member').val(),
 			from_date: $('#filter-from-date').val(),
 			to_date: $('#filter-to-date').val(),
 			keyword: $('#filter-keyword').val()
 		};
+	}
+
+	load_transactions() {
+		// Reload the first page for the current filters and sort. Any request
+		// still in flight is for superseded filters, so it is aborted.
+		const me = this;
+
+		this.active_filters = this.get_filters();
 
 		$('#loading-transactions').show();
 		$('#no-transactions').hide();
-		$('#transaction-list').empty();
 
-		frappe.call({
+		this.request_list_page(0, (rows) => {
+			$('#loading-transactions').hide();
+			$('#transaction-scroll').scrollTop(0);
+			me.show_transactions(rows);
+		});
+	}
+
+	load_next_page() {
+		// Append the next server page when the viewport nears the end of the loaded rows
+		const me = this;
+
+		if (this.list_request || !this.has_more) return;
+
+		this.request_list_page(this.transactions.length, (rows) => {
+			me.has_more = rows.length === me.page_length;
+			me.set_transactions(me.transactions.concat(rows));
+		});
+	}
+
+	request_list_page(start, callback) {
+		const me = this;
+		const sequence = ++this.list_request_sequence;
+
+		this.abort_list_request();
+
+		this.list_request = frappe.call({
 			method: 'erpnext_amex.amex_integration.page.amex_review.amex_review.get_pending_transactions',
-			args: { filters: JSON.stringify(filters) },
+			args: {
+				filters: JSON.stringify(this.active_filters || this.get_filters()),
+				start: start,
+				page_length: this.page_length,
+				sort_by: this.sort_field,
+				sort_order: this.sort_order
+			},
 			callback: (r) => {
-				$('#loading-transactions').hide();
-				
-				if (r.message && r.message.length > 0) {
-					me.transactions = r.message;
-					me.render_transactions();
-				} else {
-					$('#no-transactions').show();
+				// Ignore responses for requests that have since been superseded
+				if (sequence !== me.list_request_sequence) return;
+				callback(r.message || []);
+			},
+			always: () => {
+				if (sequence === me.list_request_sequence) {
+					me.list_request = null;
 				}
 			}
 		});
 	}
 
+	abort_list_request() {
+		if (this.list_request && this.list_request.abort) {
+			this.list_request.abort();
+		}
+		this.list_request = null;
+	}
+
+	show_transactions(transactions, total_count) {
+		// Rows arrive in the requested sort order
+		transactions = transactions || [];
+		this.client_sorted = false;
+		this.has_more = transactions.length === this.page_length;
+		this.total_count = total_count === undefined ? null : total_count;
+		this.set_transactions(transactions);
+	}
+
+	set_transactions(transactions) {
+		// Replace the loaded rows and rebuild the indexes the grid renders from
+		this.transactions = transactions;
+		this.row_index = new Map(transactions.map((trans, i) => [trans.name, i]));
+		this.sort_index_cache = {};
+
+		// Drop selections for rows that are no longer loaded
+		this.selected_transactions.forEach(name => {
+			if (!this.row_index.has(name)) this.selected_transactions.delete(name);
+		});
+
+		$('#no-transactions').toggle(transactions.length === 0);
+		this.apply_sort();
+		this.update_totals();
+		this.render_transactions();
+	}
+
 	sort_transactions(field) {
 		// Toggle sort order if clicking same field
 		if (this.sort_field === field) {
@@ -360,36 +483,64 @@ class AMEXReviewPage {
 			this.sort_order = 'asc';
 		}
 
-		// Sort transactions
-		this.transactions.sort((a, b) => {
-			let aVal = a[field];
-			let bVal = b[field];
+		if (this.has_more) {
+			// Only part of the result is loaded, so the server has to sort
+			this.update_sort_indicators();
+			this.load_transactions();
+			return;
+		}
 
-			// Handle nulls
-			if (aVal === null || aVal === undefined) aVal = '';
-			if (bVal === null || bVal === undefined) bVal = '';
+		// Everything is loaded; sort locally from the cached index
+		this.client_sorted = true;
+		this.apply_sort();
+		this.render_transactions();
+	}
 
-			// Compare based on type
-			if (field === 'amount') {
-				aVal = Number(aVal);
-				bVal = Number(bVal);
-			} else if (field === 'transaction_date') {
-				aVal = new Date(aVal);
-				bVal = new Date(bVal);
-			} else {
-				aVal = String(aVal).toLowerCase();
-				bVal = String(bVal).toLowerCase();
+	apply_sort() {
+		if (this.client_sorted) {
+			this.view = this.get_sort_index(this.sort_field, this.sort_order);
+		} else {
+			this.view = this.transactions.map((trans, i) => i);
+		}
+	}
+
+	get_sort_index(field, order) {
+		// Sort indexes are computed once per field and loaded data set; the
+		// descending order is the ascending index reversed
+		const key = `${field}:${order}`;
+
+		if (!this.sort_index_cache[key]) {
+			const asc_key = `${field}:asc`;
+
+			if (!this.sort_index_cache[asc_key]) {
+				const keys = this.transactions.map(trans => this.get_sort_key(trans, field));
+				this.sort_index_cache[asc_key] = keys.map((value, i) => i).sort((a, b) => {
+					if (keys[a] < keys[b]) return -1;
+					if (keys[a] > keys[b]) return 1;
+					return a - b;
+				});
 			}
 
-			if (this.sort_order === 'asc') {
-				return aVal > bVal ? 1 : -1;
-			} else {
-				return aVal < bVal ? 1 : -1;
+			if (order === 'desc') {
+				this.sort_index_cache[key] = this.sort_index_cache[asc_key].slice().reverse();
 			}
-		});
+		}
 
-		this.render_transactions();
-		this.update_sort_indicators();
+		return this.sort_index_cache[key];
+	}
+
+	get_sort_key(trans, field) {
+		let value = trans[field];
+
+		// Handle nulls
+		if (value === null || value === undefined) value = '';
+
+		if (field === 'amount') {
+			return Number(value) || 0;
+		}
+
+		// Dates arrive as YYYY-MM-DD, which already sort as strings
+		return String(value).toLowerCase();
 	}
 
 	update_sort_indicators() {
@@ -402,10 +553,7 @@ class AMEXReviewPage {
 			.append(`<i class="fa ${icon} sort-indicator" style="margin-left: 5px;"></i>`);
 	}
 
-	render_transactions() {
-		const tbody = $('#transaction-list');
-		tbody.empty();
-
+	update_totals() {
 		// Calculate total pending amount
 		let total_pending = 0;
 		this.transactions.forEach(trans => {
@@ -415,45 +563,199 @@ class AMEXReviewPage {
 		});
 
 		// Update total display
+		let count = this.transactions.length;
+		if (this.total_count !== null) {
+			count = this.total_count;
+		} else if (this.has_more) {
+			count = `${count}+`;
+		}
+
 		$('#total-pending-amount').text(`$${total_pending.toFixed(2)}`);
-		$('#total-pending-count').text(this.transactions.length);
+		$('#total-pending-count').text(count);
+	}
 
-		this.transactions.forEach(trans => {
-			const statusClass = {
-				'Pending': 'badge-warning',
-				'Classified': 'badge-info',
-				'Approved': 'badge-success',
-				'Posted': 'badge-secondary'
-			}[trans.status] || 'badge-secondary';
-
-			const row = `
-				<tr class="transaction-row" data-name="${trans.name}">
-					<td>
-						<input type="checkbox" class="transaction-checkbox" value="${trans.name}">
-					</td>
-					<td>${frappe.datetime.str_to_user(trans.transaction_date)}</td>
-					<td>${trans.description || ''}</td>
-					<td>${trans.card_member || ''}</td>
-					<td>$${Number(trans.amount).toFixed(2)}</td>
-					<td><span class="badge ${statusClass}">${trans.status}</span></td>
-				</tr>
-			`;
-			tbody.append(row);
+	render_transactions() {
+		// Full refresh after the data or sort order changes. Rows already in
+		// the DOM are reused by name, so this only builds newly visible rows.
+		this.render_window();
+		this.update_sort_indicators();
+	}
+
+	schedule_render() {
+		if (this.render_frame) return;
+
+		this.render_frame = requestAnimationFrame(() => {
+			this.render_frame = null;
+			this.render_window();
+		});
+	}
+
+	render_window() {
+		const container = document.getElementById('transaction-scroll');
+		const tbody = document.getElementById('transaction-list');
+		if (!container || !tbody) return;
+
+		const total = this.view.length;
+		const first = Math.max(0, Math.floor(container.scrollTop / this.row_height) - this.overscan);
+		const visible = Math.ceil(container.clientHeight / this.row_height) + 2 * this.overscan;
+		const last = Math.min(total, first + visible);
+
+		const rows = [];
+		const rendered_rows = new Map();
+
+		for (let i = first; i < last; i++) {
+			const trans = this.transactions[this.view[i]];
+			const row = this.rendered_rows.get(trans.name) || this.build_row(trans);
+			rendered_rows.set(trans.name, row);
+			rows.push(row);
+		}
+
+		this.top_spacer.firstChild.style.height = `${first * this.row_height}px`;
+		this.bottom_spacer.firstChild.style.height = `${(total - last) * this.row_height}px`;
+		tbody.replaceChildren(this.top_spacer, ...rows, this.bottom_spacer);
+		this.rendered_rows = rendered_rows;
+
+		// Row height depends on the theme's font size, so measure it once
+		// from a real row and re-render if the estimate was off
+		if (!this.row_height_measured && rows.length) {
+			this.row_height_measured = true;
+			const height = rows[0].getBoundingClientRect().height;
+			if (height && Math.abs(height - this.row_height) > 0.5) {
+				this.row_height = height;
+				this.render_window();
+				return;
+			}
+		}
+
+		if (this.has_more && last >= total - this.overscan) {
+			this.load_next_page();
+		}
+	}
+
+	make_spacer_row() {
+		const row = document.createElement('tr');
+		row.className = 'virtual-spacer';
+		row.innerHTML = '<td colspan="6"></td>';
+		return row;
+	}
+
+	build_row(trans) {
+		const statusClass = {
+			'Pending': 'badge-warning',
+			'Classified': 'badge-info',
+			'Approved': 'badge-success',
+			'Posted': 'badge-secondary'
+		}[trans.status] || 'badge-secondary';
+
+		const description = frappe.utils.escape_html(trans.description || '');
+		const card_member = frappe.utils.escape_html(trans.card_member || '');
+
+		const row = document.createElement('tr');
+		row.className = 'transaction-row';
+		row.dataset.name = trans.name;
+		row.innerHTML = `
+			<td>
+				<input type="checkbox" class="transaction-checkbox" value="${trans.name}">
+			</td>
+			<td>${frappe.datetime.str_to_user(trans.transaction_date)}</td>
+			<td title="${description}">${description}</td>
+			<td>${card_member}</td>
+			<td>$${Number(trans.amount).toFixed(2)}</td>
+			<td><span class="badge ${statusClass}">${trans.status}</span></td>
+		`;
+
+		row.querySelector('.transaction-checkbox').checked = this.selected_transactions.has(trans.name);
+		if (trans.name === this.active_row) {
+			row.classList.add('table-active');
+		}
+
+		return row;
+	}
+
+	update_transaction(name, changes) {
+		// Patch one loaded row in place; only its <tr> is rebuilt
+		const index = this.row_index.get(name);
+		if (index === undefined) return;
+
+		const trans = Object.assign(this.transactions[index], changes);
+
+		// Sort indexes over the changed fields are stale
+		Object.keys(changes).forEach(field => {
+			delete this.sort_index_cache[`${field}:asc`];
+			delete this.sort_index_cache[`${field}:desc`];
 		});
 
-		this.update_sort_indicators();
+		const row = this.rendered_rows.get(name);
+		if (row) {
+			const fresh = this.build_row(trans);
+			row.replaceWith(fresh);
+			this.rendered_rows.set(name, fresh);
+		}
+
+		this.update_totals();
 	}
 
-	update_selected_transactions() {
-		const me = this;
-		this.selected_transactions.clear();
-		
-		$('.transaction-checkbox:checked').each(function() {
-			me.selected_transactions.add($(this).val());
+	remove_transactions(names) {
+		// Drop rows that have left the review queue (posted, duplicate, deleted)
+		const removed = new Set(names.filter(name => this.row_index.has(name)));
+		if (!removed.size) return;
+
+		let selection_changed = false;
+		removed.forEach(name => {
+			selection_changed = this.selected_transactions.delete(name) || selection_changed;
+		});
+
+		if (this.total_count !== null) this.total_count -= removed.size;
+		if (removed.has(this.selected_transaction)) $('#classification-panel').hide();
+
+		this.set_transactions(this.transactions.filter(trans => !removed.has(trans.name)));
+		if (selection_changed) this.update_selected_transactions();
+	}
+
+	setup_realtime() {
+		// Row deltas published by AMEX Transaction after each commit, from
+		// this reviewer's actions and everyone else's. They are sent to the
+		// AMEX Transaction doctype room, joined after a read permission check
+		frappe.realtime.doctype_subscribe('AMEX Transaction');
+		frappe.realtime.off('amex_review_update');
+		frappe.realtime.on('amex_review_update', (data) => this.apply_row_deltas(data.rows || []));
+	}
+
+	apply_row_deltas(rows) {
+		const removed = [];
+
+		rows.forEach(row => {
+			if (row.removed) {
+				removed.push(row.name);
+			} else if (this.row_index.has(row.name)) {
+				const changes = Object.assign({}, row);
+				delete changes.name;
+				this.update_transaction(row.name, changes);
+			}
+			// Rows not loaded here (new imports, other pages or filters) are
+			// picked up on the next reload
 		});
 
+		this.remove_transactions(removed);
+	}
+
+	set_active_row(name) {
+		const previous = this.rendered_rows.get(this.active_row);
+		if (previous) previous.classList.remove('table-active');
+
+		const row = this.rendered_rows.get(name);
+		if (row) row.classList.add('table-active');
+
+		this.active_row = name;
+	}
+
+	update_selected_transactions() {
+		// Selection is tracked in this.selected_transactions as checkboxes
+		// change, since most rows are not in the DOM
+		const me = this;
 		const count = this.selected_transactions.size;
 		$('#selected-count').text(count);
+		$('#select-all-transactions').prop('checked', count > 0 && count === this.transactions.length);
 
 		if (count > 1) {
 			$('#bulk-panel').show();
@@ -515,12 +817,12 @@ class AMEXReviewPage {
 						Total: ${result.total}
 					`);
 					
-					// Clear selections and reload
+					// Clear selections; the rows themselves update from realtime deltas
 					me.selected_transactions.clear();
-					$('.transaction-checkbox').prop('checked', false);
-					$('#select-all-transactions').prop('checked', false);
+					me.rendered_rows.forEach(row => {
+						row.querySelector('.transaction-checkbox').checked = false;
+					});
 					me.update_selected_transactions();
-					me.load_transactions();
 				}
 			}
 		});
@@ -536,6 +838,7 @@ class AMEXReviewPage {
 			callback: (r) => {
 				if (r.message) {
 					me.render_transaction_details(r.message.transaction);
+					me.render_ml_candidates(r.message.ml_candidates || {}, r.message.transaction);
 					$('#classification-panel').show();
 				}
 			}
@@ -617,11 +920,80 @@ class AMEXReviewPage {
 				if (split.percentage) {
 					$(`.split-percentage[data-row-id="${row_id}"]`).val(split.percentage);
 				}
+				// An explicit amount wins over the percentage, as in the allocation engine
+				this.split_sources[row_id] = split.amount ? 'amount' : 'percentage';
 			});
 			this.calculate_split_totals();
+			this.queue_split_preview();
 		}
 	}
 
+	get_candidate_field(field) {
+		return {
+			vendor: this.vendor_field,
+			expense_account: this.expense_account_field,
+			cost_center: this.cost_center_field
+		}[field];
+	}
+
+	render_ml_candidates(candidates, trans) {
+		$('.amex-classification-panel .ml-candidates').each((i, container) => {
+			const field = container.dataset.field;
+			const current = trans[field];
+
+			container.innerHTML = (candidates[field] || []).map(candidate => {
+				const value = frappe.utils.escape_html(candidate.value);
+				const label = frappe.utils.escape_html(candidate.label || candidate.value);
+				const score = Math.round((candidate.score || 0) * 100);
+				return `<button type="button" class="btn btn-xs btn-default ml-candidate${candidate.value === current ? ' active' : ''}"
+					data-field="${field}" data-value="${value}" title="${label}">${label}<span class="ml-candidate-score">${score}%</span></button>`;
+			}).join('');
+		});
+
+		// Only offered while the transaction has no splits of its own
+		const has_splits = trans.cost_center_splits && trans.cost_center_splits.length > 0;
+		this.ml_split_proposal = has_splits ? null : candidates.split || null;
+
+		const label = (this.ml_split_proposal || [])
+			.map(split => `${frappe.utils.escape_html(split.cost_center)} ${split.percentage}%`)
+			.join(' / ');
+		$('.amex-classification-panel .ml-split-proposal').html(this.ml_split_proposal
+			? `<button type="button" class="btn btn-xs btn-default ml-split-candidate" title="${label}">${__('Split')}: ${label}</button>`
+			: '');
+	}
+
+	apply_ml_split(splits) {
+		if (!splits) {
+			return;
+		}
+
+		this.toggle_cost_center_type('split');
+		this.clear_split_rows();
+
+		// Proposals are whole percentages; they are sent as percentages only,
+		// so the server hands out the cents (e.g. 50/50 of $100.01)
+		splits.forEach(split => {
+			this.add_split_row();
+			const row_id = this.split_row_counter;
+
+			this.split_fields[`cc_${row_id}`].set_value(split.cost_center);
+			this.split_sources[row_id] = 'percentage';
+			$(`.split-percentage[data-row-id="${row_id}"]`).val(split.percentage);
+			$(`.split-amount[data-row-id="${row_id}"]`)
+				.val((this.current_transaction_amount * split.percentage / 100).toFixed(2));
+		});
+		this.calculate_split_totals();
+		this.queue_split_preview(0);
+	}
+
+	apply_ml_candidate(field, value) {
+		this.get_candidate_field(field).set_value(value);
+
+		$(`.ml-candidates[data-field="${field}"] .ml-candidate`).each((i, button) => {
+			button.classList.toggle('active', button.dataset.value === value);
+		});
+	}
+
 	toggle_cost_center_type(type) {
 		if (type === 'single') {
 			$('#single-cc-btn').addClass('active');
@@ -709,22 +1081,27 @@ class AMEXReviewPage {
 			render_input: true
 		});
 		
-		// Bind percentage change to auto-calculate amount
+		// Bind percentage change to estimate the amount; the server preview
+		// replaces the estimate with the cents actually posted
 		$(`.split-percentage[data-row-id="${row_id}"]`).on('input', function() {
 			const pct = parseFloat($(this).val()) || 0;
 			const amount = (me.current_transaction_amount * pct / 100).toFixed(2);
+			me.split_sources[row_id] = 'percentage';
 			$(`.split-amount[data-row-id="${row_id}"]`).val(amount);
 			me.calculate_split_totals();
+			me.queue_split_preview();
 		});
 		
 		// Bind amount change to auto-calculate percentage
 		$(`.split-amount[data-row-id="${row_id}"]`).on('input', function() {
 			const amt = parseFloat($(this).val()) || 0;
+			me.split_sources[row_id] = 'amount';
 			if (me.current_transaction_amount > 0) {
 				const pct = (amt / me.current_transaction_amount * 100).toFixed(2);
 				$(`.split-percentage[data-row-id="${row_id}"]`).val(pct);
 			}
 			me.calculate_split_totals();
+			me.queue_split_preview();
 		});
 	}
 
@@ -743,11 +1120,15 @@ class AMEXReviewPage {
 		$('#split-total-amount').text(`$${total_amount.toFixed(2)}`);
 		$('#split-total-percent').text(`${total_percent.toFixed(1)}%`);
 		
-		// Validate totals
-		const is_valid = Math.abs(total_amount - this.current_transaction_amount) < 0.01 || 
-		                 Math.abs(total_percent - 100) < 0.1;
+		// Validate totals; once the server preview is in, its verdict is used
+		const is_valid = this.split_allocation_error !== null
+			? !this.split_allocation_error
+			: Math.abs(total_amount - this.current_transaction_amount) < 0.01 || 
+			  Math.abs(total_percent - 100) < 0.1;
 		
-		if (!is_valid && total_amount > 0) {
+		if (!is_valid && this.split_allocation_error) {
+			$('#split-validation-msg').text(this.split_allocation_error).show();
+		} else if (!is_valid && total_amount > 0) {
 			const remaining = this.current_transaction_amount - total_amount;
 			$('#split-validation-msg')
 				.text(`Remaining: $${remaining.toFixed(2)} (${(100 - total_percent).toFixed(1)}%)`)
@@ -759,28 +1140,77 @@ class AMEXReviewPage {
 		return is_valid;
 	}
 
-	get_split_data() {
-		const splits = [];
+	get_split_rows() {
+		// Every split row with only the field the user typed, so percentage
+		// rows are allocated to the cent by the server (largest remainder)
+		const rows = [];
 		const me = this;
 		
 		$('.split-row').each(function() {
 			const row_id = $(this).data('row-id');
-			const cost_center = me.split_fields[`cc_${row_id}`]?.get_value();
-			const accounting_class = me.split_fields[`class_${row_id}`]?.get_value();
-			const amount = parseFloat($(`.split-amount[data-row-id="${row_id}"]`).val()) || 0;
-			const percentage = parseFloat($(`.split-percentage[data-row-id="${row_id}"]`).val()) || 0;
+			const source = me.split_sources[row_id] || 'percentage';
+			const value = parseFloat($(`.split-${source}[data-row-id="${row_id}"]`).val()) || 0;
 			
-			if (cost_center && (amount > 0 || percentage > 0)) {
-				splits.push({
-					cost_center: cost_center,
-					accounting_class: accounting_class || null,
-					amount: amount,
-					percentage: percentage
+			rows.push({
+				row_id: row_id,
+				cost_center: me.split_fields[`cc_${row_id}`]?.get_value(),
+				accounting_class: me.split_fields[`class_${row_id}`]?.get_value() || null,
+				amount: source === 'amount' ? value : 0,
+				percentage: source === 'percentage' ? value : 0
+			});
+		});
+		
+		return rows;
+	}
+
+	get_split_data() {
+		return this.get_split_rows()
+			.filter(row => row.cost_center && (row.amount > 0 || row.percentage > 0))
+			.map(row => ({
+				cost_center: row.cost_center,
+				accounting_class: row.accounting_class,
+				amount: row.amount,
+				percentage: row.percentage
+			}));
+	}
+
+	queue_split_preview(delay = 250) {
+		// Invalidate the last verdict until the new preview arrives
+		this.split_allocation_error = null;
+		clearTimeout(this.split_preview_timer);
+		this.split_preview_timer = setTimeout(() => this.preview_split_allocation(), delay);
+	}
+
+	preview_split_allocation() {
+		const rows = this.get_split_rows();
+		const transaction = this.selected_transaction;
+		
+		if (!rows.length) {
+			return;
+		}
+		
+		frappe.call({
+			method: 'erpnext_amex.amex_integration.page.amex_review.amex_review.preview_split_allocation',
+			args: {
+				amount: this.current_transaction_amount,
+				cost_center_splits: JSON.stringify(rows)
+			},
+			callback: (r) => {
+				// Stale if the rows or the transaction changed in the meantime
+				if (!r.message || transaction !== this.selected_transaction ||
+					JSON.stringify(rows) !== JSON.stringify(this.get_split_rows())) {
+					return;
+				}
+				
+				rows.forEach((row, i) => {
+					if (this.split_sources[row.row_id] !== 'amount') {
+						$(`.split-amount[data-row-id="${row.row_id}"]`).val(r.message.amounts[i].toFixed(2));
+					}
 				});
+				this.split_allocation_error = r.message.error || '';
+				this.calculate_split_totals();
 			}
 		});
-		
-		return splits;
 	}
 
 	clear_split_rows() {
@@ -791,7 +1221,10 @@ class AMEXReviewPage {
 			}
 		}
 		this.split_fields = {};
+		this.split_sources = {};
 		this.split_row_counter = 0;
+		this.split_allocation_error = null;
+		clearTimeout(this.split_preview_timer);
 		$('#split-table-body').empty();
 		$('#split-total-amount').text('$0.00');
 		$('#split-total-percent').text('0%');
@@ -855,7 +1288,13 @@ class AMEXReviewPage {
 			callback: (r) => {
 				if (r.message) {
 					frappe.show_alert({message: 'Transaction classified', indicator: 'green'});
-					me.load_transactions();
+					const trans = r.message.transaction;
+					me.update_transaction(trans.name, {
+						status: trans.status,
+						vendor: trans.vendor,
+						expense_account: trans.expense_account,
+						cost_center: trans.cost_center
+					});
 				}
 			}
 		});
@@ -874,7 +1313,7 @@ class AMEXReviewPage {
 			callback: (r) => {
 				if (r.message) {
 					frappe.show_alert({message: 'Posted to Journal Entry', indicator: 'green'});
-					me.load_transactions();
+					me.remove_transactions([me.selected_transaction]);
 					$('#classification-panel').hide();
 				}
 			}
@@ -889,7 +1328,7 @@ class AMEXReviewPage {
 			callback: (r) => {
 				if (r.message) {
 					frappe.show_alert({message: 'Marked as duplicate', indicator: 'orange'});
-					me.load_transactions();
+					me.remove_transactions([me.selected_transaction]);
 					$('#classification-panel').hide();
 				}
 			}
@@ -913,9 +1352,12 @@ class AMEXReviewPage {
 					args: { transaction_names: JSON.stringify(selected) },
 					callback: (r) => {
 						if (r.message) {
-							frappe.msgprint(`Posted ${r.message.success_count} transactions`);
 							me.selected_transactions.clear();
-							me.load_transactions();
+							me.rendered_rows.forEach(row => {
+								row.querySelector('.transaction-checkbox').checked = false;
+							});
+							me.update_selected_transactions();
+							me.poll_bulk_post_progress(r.message.job_group);
 						}
 					}
 				});
@@ -923,6 +1365,46 @@ class AMEXReviewPage {
 		);
 	}
 
+	poll_bulk_post_progress(job_group) {
+		// Posting runs in background jobs; rows drop out of the grid through
+		// realtime deltas as each one commits
+		const me = this;
+
+		frappe.call({
+			method: 'erpnext_amex.amex_integration.page.amex_review.amex_review.get_bulk_post_progress',
+			args: { job_group: job_group },
+			callback: (r) => {
+				const progress = r.message;
+				if (!progress) {
+					frappe.hide_progress();
+					return;
+				}
+
+				frappe.show_progress(
+					'Posting Transactions',
+					progress.done,
+					progress.total,
+					`${progress.posted} posted, ${progress.failed} failed`
+				);
+
+				if (!progress.complete) {
+					setTimeout(() => me.poll_bulk_post_progress(job_group), 2000);
+					return;
+				}
+
+				frappe.hide_progress();
+
+				let message = `Posted ${progress.posted} of ${progress.total} transactions`;
+				if (progress.errors.length) {
+					message += '<br><br><strong>Errors</strong><br>' + progress.errors.map(
+						e => `${e.transaction}: ${frappe.utils.escape_html(e.error)}`
+					).join('<br>');
+				}
+				frappe.msgprint(message);
+			}
+		});
+	}
+
 	create_vendor() {
 		const vendor_name = $('#new-vendor-name').val();
 		const supplier_group = $('#new-vendor-group').val();
@@ -3,69 +3,218 @@
 
 import frappe
 from frappe import _
+from frappe.utils import cint, flt
+import hashlib
 import json
-from erpnext_amex.utils.classification_memory import get_classification_suggestion, learn_from_transaction
+from werkzeug.wrappers import Response
+from erpnext_amex.utils.bulk_classification import apply_bulk_classification
+from erpnext_amex.utils.bulk_posting import start_bulk_posting, get_progress as get_bulk_posting_progress
+from erpnext_amex.utils.classification_memory import get_classification_suggestion, get_classification_suggestions, learn_from_transaction
 from erpnext_amex.utils.journal_entry_creator import create_journal_entry_from_transaction, create_bulk_journal_entries
+from erpnext_amex.utils.ml_classifier import get_prediction_candidates
+from erpnext_amex.utils.split_allocation import allocate_splits, get_allocation_error
+from erpnext_amex.utils.reference_cache import get_card_members, get_card_members_version, get_permitted_list
+from erpnext_amex.utils.transaction_search import escape_like, get_search_condition
 
 
-@frappe.whitelist()
-def get_pending_transactions(filters=None):
-	"""Get list of pending transactions for review"""
+DEFAULT_PAGE_LENGTH = 500
+MAX_PAGE_LENGTH = 2000
+
+TRANSACTION_LIST_FIELDS = [
+	'name', 'transaction_date', 'description', 'card_member',
+	'amount', 'status', 'vendor', 'expense_account', 'cost_center',
+	'reference', 'amex_category', 'is_duplicate', 'is_amex_payment',
+	'ml_confidence_score', 'ml_predicted_vendor'
+]
+
+# Columns the review list may be sorted by. Each is indexed together with
+# status (see AMEX Transaction on_doctype_update); anything else falls back
+# to the default order rather than reaching the SQL.
+SORT_FIELDS = ('transaction_date', 'amount', 'card_member', 'description', 'status')
+
+
+def parse_filters(filters):
 	if filters is None:
-		filters = {}
-	elif isinstance(filters, str):
-		filters = json.loads(filters)
+		return {}
+	if isinstance(filters, str):
+		return json.loads(filters)
+	return filters
+
+
+def get_transaction_conditions(filters):
+	"""
+	Build the WHERE clause for the review list
 	
-	# Build filter conditions
+	Returns:
+		tuple: (where_clause, values) with all filter values bound as parameters
+	"""
 	conditions = ["status IN ('Pending', 'Classified')"]
+	values = {}
 	
 	if filters.get('batch_id'):
-		conditions.append(f"batch_id = '{filters['batch_id']}'")
+		conditions.append("batch_id = %(batch_id)s")
+		values['batch_id'] = filters['batch_id']
 	
 	if filters.get('card_member'):
-		conditions.append(f"card_member LIKE '%{filters['card_member']}%'")
+		conditions.append("card_member LIKE %(card_member)s")
+		values['card_member'] = f"%{escape_like(filters['card_member'])}%"
 	
 	if filters.get('from_date'):
-		conditions.append(f"transaction_date >= '{filters['from_date']}'")
+		conditions.append("transaction_date >= %(from_date)s")
+		values['from_date'] = filters['from_date']
 	
 	if filters.get('to_date'):
-		conditions.append(f"transaction_date <= '{filters['to_date']}'")
+		conditions.append("transaction_date <= %(to_date)s")
+		values['to_date'] = filters['to_date']
 	
 	if filters.get('min_amount'):
-		conditions.append(f"amount >= {filters['min_amount']}")
+		conditions.append("amount >= %(min_amount)s")
+		values['min_amount'] = flt(filters['min_amount'])
 	
 	if filters.get('max_amount'):
-		conditions.append(f"amount <= {filters['max_amount']}")
+		conditions.append("amount <= %(max_amount)s")
+		values['max_amount'] = flt(filters['max_amount'])
 	
 	# Keyword/description filter for bulk operations
 	if filters.get('keyword'):
-		# Escape the keyword but remove the quotes that frappe.db.escape adds
-		keyword = filters['keyword'].replace('%', '%%').replace('_', '\\_')
-		conditions.append(f"(description LIKE '%{keyword}%' OR statement_description LIKE '%{keyword}%')")
+		keyword_condition, keyword_values, _relevance = get_search_condition(filters['keyword'])
+		if keyword_condition:
+			conditions.append(keyword_condition)
+			values.update(keyword_values)
+	
+	return " AND ".join(conditions), values
+
+
+def get_page_length(page_length):
+	return max(1, min(cint(page_length) or DEFAULT_PAGE_LENGTH, MAX_PAGE_LENGTH))
+
+
+def get_order_by(sort_by=None, sort_order=None):
+	"""
+	Build the ORDER BY clause from whitelisted sort options
+	
+	`name` is appended as a tiebreaker so OFFSET paging is stable.
+	"""
+	if sort_by not in SORT_FIELDS:
+		sort_by = 'transaction_date'
+	
+	direction = 'ASC' if str(sort_order).lower() == 'asc' else 'DESC'
+	
+	return f"`{sort_by}` {direction}, name {direction}"
+
+
+@frappe.whitelist()
+def get_pending_transactions(filters=None, start=0, page_length=DEFAULT_PAGE_LENGTH,
+		sort_by='transaction_date', sort_order='desc'):
+	"""
+	Get a page of pending transactions for review
 	
-	where_clause = " AND ".join(conditions) if conditions else "1=1"
+	Args:
+		filters: Dict or JSON string of list filters
+		start: Offset of the first row
+		page_length: Number of rows to return (max 2000)
+		sort_by: One of SORT_FIELDS (defaults to transaction_date)
+		sort_order: 'asc' or 'desc'
+	"""
+	filters = parse_filters(filters)
+	where_clause, values = get_transaction_conditions(filters)
+	values.update({'start': cint(start), 'page_length': get_page_length(page_length)})
 	
 	transactions = frappe.db.sql(f"""
 		SELECT 
-			name, transaction_date, description, card_member, 
-			amount, status, vendor, expense_account, cost_center,
-			reference, amex_category, is_duplicate, is_amex_payment,
-			ml_confidence_score, ml_predicted_vendor
+			{", ".join(TRANSACTION_LIST_FIELDS)}
 		FROM `tabAMEX Transaction`
 		WHERE {where_clause}
-		ORDER BY transaction_date DESC, name DESC
-		LIMIT 500
-	""", as_dict=True)
+		ORDER BY {get_order_by(sort_by, sort_order)}
+		LIMIT %(page_length)s OFFSET %(start)s
+	""", values, as_dict=True)
 	
-	# Get suggestions for each transaction
+	# Get suggestions for the whole page at once
+	suggestions = get_classification_suggestions(trans.description for trans in transactions)
 	for trans in transactions:
-		suggestion = get_classification_suggestion(trans.description, trans.amount)
+		suggestion = suggestions.get(trans.description)
 		if suggestion:
 			trans['suggestion'] = suggestion
 	
 	return transactions
 
 
+def get_pending_transaction_count(filters):
+	where_clause, values = get_transaction_conditions(filters)
+	
+	return frappe.db.sql(f"""
+		SELECT COUNT(*)
+		FROM `tabAMEX Transaction`
+		WHERE {where_clause}
+	""", values)[0][0]
+
+
+@frappe.whitelist()
+def bootstrap(filters=None, page_length=DEFAULT_PAGE_LENGTH, sort_by='transaction_date', sort_order='desc'):
+	"""
+	Everything the review page needs to render, in one request
+	
+	Returns settings, filter options and the first page of transactions
+	with suggestions. The response carries an ETag built from cheap
+	change markers; a request whose If-None-Match matches gets an empty
+	304 without running the list queries.
+	"""
+	filters = parse_filters(filters)
+	page_length = get_page_length(page_length)
+	etag = get_bootstrap_etag(filters, page_length, get_order_by(sort_by, sort_order))
+	
+	if frappe.get_request_header('If-None-Match') == etag:
+		return Response(status=304, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+	
+	settings = frappe.get_cached_doc('AMEX Integration Settings')
+	
+	data = {
+		'settings': {
+			'default_company': settings.default_company,
+			'require_vendor_for_posting': settings.require_vendor_for_posting
+		},
+		'filter_options': get_filter_options(),
+		'transactions': get_pending_transactions(filters, 0, page_length, sort_by, sort_order),
+		'total_count': get_pending_transaction_count(filters),
+		'page_length': page_length
+	}
+	
+	return Response(
+		frappe.as_json({'message': data}),
+		mimetype='application/json',
+		headers={'ETag': etag, 'Cache-Control': 'private, no-cache'}
+	)
+
+
+def get_bootstrap_etag(filters, page_length, order_by):
+	"""
+	Fingerprint of everything the bootstrap payload depends on
+	
+	Uses aggregate reads served from indexes plus cache version tokens,
+	so it is much cheaper than building the payload.
+	"""
+	pending = frappe.db.sql("""
+		SELECT COUNT(*), MAX(modified)
+		FROM `tabAMEX Transaction`
+		WHERE status IN ('Pending', 'Classified')
+	""")[0]
+	
+	markers = [
+		frappe.session.user,
+		json.dumps(filters, sort_keys=True, default=str),
+		page_length,
+		order_by,
+		pending[0],
+		pending[1],
+		frappe.db.sql("SELECT MAX(modified) FROM `tabAMEX Vendor Classification Rule`")[0][0],
+		frappe.db.sql("SELECT MAX(modified) FROM `tabAMEX Import Batch`")[0][0],
+		frappe.get_cached_doc('AMEX Integration Settings').modified,
+		get_card_members_version()
+	]
+	
+	return '"{}"'.format(hashlib.sha1(json.dumps(markers, default=str).encode()).hexdigest())
+
+
 @frappe.whitelist()
 def get_transaction_details(transaction_name):
 	"""Get full details of a transaction"""
@@ -76,7 +225,8 @@ def get_transaction_details(transaction_name):
 	
 	return {
 		'transaction': transaction.as_dict(),
-		'suggestion': suggestion
+		'suggestion': suggestion,
+		'ml_candidates': get_prediction_candidates(transaction)
 	}
 
 
@@ -149,6 +299,30 @@ def classify_transaction(transaction_name, vendor=None, expense_account=None, co
 	return {'status': 'success', 'transaction': transaction.as_dict()}
 
 
+@frappe.whitelist()
+def preview_split_allocation(amount, cost_center_splits):
+	"""
+	Preview how splits would be posted, using the same engine as posting
+	
+	Args:
+		amount: Transaction amount
+		cost_center_splits: JSON string or list of splits with amount/percentage
+	
+	Returns:
+		Dict with amounts (one per split), unallocated and error (None if valid)
+	"""
+	if isinstance(cost_center_splits, str):
+		cost_center_splits = json.loads(cost_center_splits)
+	
+	allocation = allocate_splits(flt(amount), cost_center_splits)
+	
+	return {
+		'amounts': allocation.amounts,
+		'unallocated': allocation.unallocated,
+		'error': get_allocation_error(flt(amount), allocation)
+	}
+
+
 @frappe.whitelist()
 def approve_transaction(transaction_name):
 	"""Approve a classified transaction"""
@@ -175,37 +349,26 @@ def post_transaction(transaction_name):
 
 @frappe.whitelist()
 def bulk_approve_and_post(transaction_names):
-	"""Approve and post multiple transactions"""
-	import json
+	"""
+	Approve and post multiple transactions in background jobs
+	
+	The selection is sharded by card account and each shard runs as its
+	own job, committing per transaction. Poll `get_bulk_post_progress`
+	with the returned job_group.
 	
+	Returns:
+		Dict with job_group, total and shards
+	"""
 	if isinstance(transaction_names, str):
 		transaction_names = json.loads(transaction_names)
 	
-	results = {
-		'approved': [],
-		'posted': [],
-		'errors': []
-	}
-	
-	for trans_name in transaction_names:
-		try:
-			transaction = frappe.get_doc('AMEX Transaction', trans_name)
-			
-			# Approve if not already
-			if transaction.status == 'Classified':
-				transaction.approve()
-				results['approved'].append(trans_name)
-			
-			# Post if approved
-			if transaction.status == 'Approved':
-				je = transaction.post_to_journal_entry()
-				results['posted'].append({'transaction': trans_name, 'journal_entry': je.name})
-		
-		except Exception as e:
-			results['errors'].append({'transaction': trans_name, 'error': str(e)})
-	
-	frappe.db.commit()
-	return results
+	return start_bulk_posting(transaction_names)
+
+
+@frappe.whitelist()
+def get_bulk_post_progress(job_group):
+	"""Progress of a bulk approve-and-post job group"""
+	return get_bulk_posting_progress(job_group)
 
 
 @frappe.whitelist()
@@ -228,15 +391,9 @@ def get_filter_options():
 	"""Get options for filters"""
 	batches = frappe.get_all('AMEX Import Batch', fields=['name', 'import_date'], order_by='import_date desc', limit=50)
 	
-	card_members = frappe.db.sql("""
-		SELECT DISTINCT card_member 
-		FROM `tabAMEX Transaction`
-		ORDER BY card_member
-	""", as_dict=True)
-	
 	return {
 		'batches': batches,
-		'card_members': [cm['card_member'] for cm in card_members]
+		'card_members': get_card_members()
 	}
 
 
@@ -256,53 +413,89 @@ def mark_as_duplicate(transaction_name, original_reference=None):
 @frappe.whitelist()
 def get_account_list(account_type=None):
 	"""Get list of accounts for dropdown"""
-	filters = {}
-	if account_type:
-		filters['account_type'] = account_type
-	
-	accounts = frappe.get_all('Account', 
-		filters=filters,
-		fields=['name', 'account_name', 'account_type'],
-		order_by='name'
-	)
+	# account_type becomes part of the cache key, so only known types are accepted
+	if account_type and account_type not in get_account_types():
+		frappe.throw(f"Unknown account type: {account_type}")
 	
-	return accounts
+	def build():
+		filters = {}
+		if account_type:
+			filters['account_type'] = account_type
+		
+		# Shared by all users; get_permitted_list applies permissions
+		return frappe.get_all('Account', 
+			filters=filters,
+			fields=['name', 'account_name', 'account_type'],
+			order_by='name',
+			ignore_permissions=True
+		)
+	
+	return get_permitted_list('Account', account_type or 'all', build)
+
+
+def get_account_types():
+	"""Account types allowed by the Account doctype"""
+	options = frappe.get_meta('Account').get_field('account_type').options or ''
+	return [option for option in options.split('\n') if option]
 
 
 @frappe.whitelist()
 def get_cost_center_list():
 	"""Get list of cost centers with hierarchy for dropdown"""
+	return get_permitted_list('Cost Center', 'tree', build_cost_center_tree)
+
+
+def build_cost_center_tree():
+	"""
+	Build the indented cost center list in one pass
+	
+	Rows are read in nested set (lft) order; a stack of open ancestors'
+	rgt values gives each node's depth. Disabled cost centers still count
+	as ancestors but are left out of the result. The tree is shared by all
+	users; get_permitted_list applies permissions.
+	"""
 	cost_centers = frappe.get_all('Cost Center',
-		filters={'disabled': 0},
-		fields=['name', 'cost_center_name', 'parent_cost_center', 'lft', 'rgt'],
-		order_by='lft'  # Orders by nested set hierarchy
+		fields=['name', 'cost_center_name', 'parent_cost_center', 'lft', 'rgt', 'disabled'],
+		order_by='lft',  # Orders by nested set hierarchy
+		ignore_permissions=True
 	)
 	
-	# Add hierarchical display with indentation
+	result = []
+	ancestors = []
+	
 	for cc in cost_centers:
-		# Count parent levels for indentation (using nested set model)
-		level = frappe.db.count('Cost Center', {
-			'lft': ['<', cc.lft],
-			'rgt': ['>', cc.rgt]
-		})
+		# Close ancestors whose subtree ended before this node
+		while ancestors and ancestors[-1] < cc.lft:
+			ancestors.pop()
+		
+		level = len(ancestors)
+		ancestors.append(cc.rgt)
+		
+		if cc.pop('disabled'):
+			continue
+		
 		cc['indent'] = level
 		# Add visual hierarchy indicators
 		prefix = '  ' * level + ('├─ ' if level > 0 else '')
 		cc['display_name'] = prefix + cc.cost_center_name
+		result.append(cc)
 	
-	return cost_centers
+	return result
 
 
 @frappe.whitelist()
 def get_supplier_list():
 	"""Get list of suppliers for dropdown"""
-	suppliers = frappe.get_all('Supplier',
-		fields=['name', 'supplier_name'],
-		order_by='supplier_name',
-		limit=1000
-	)
-	
-	return suppliers
+	def build():
+		# Shared by all users; get_permitted_list applies permissions
+		return frappe.get_all('Supplier',
+			fields=['name', 'supplier_name'],
+			order_by='supplier_name',
+			limit=1000,
+			ignore_permissions=True
+		)
+	
+	return get_permitted_list('Supplier', 'all', build)
 
 
 
@@ -326,38 +519,11 @@ def bulk_classify_transactions(transaction_names, vendor=None, expense_account=N
 	if isinstance(transaction_names, str):
 		transaction_names = json.loads(transaction_names)
 	
-	results = []
-	success_count = 0
-	error_count = 0
-	
-	for name in transaction_names:
-		try:
-			# Use the existing classify_transaction function
-			classify_transaction(
-				transaction_name=name,
-				vendor=vendor,
-				expense_account=expense_account,
-				cost_center=cost_center,
-				accounting_class=accounting_class,
-				notes=notes
-			)
-			results.append({
-				'name': name,
-				'status': 'success'
-			})
-			success_count += 1
-		except Exception as e:
-			results.append({
-				'name': name,
-				'status': 'error',
-				'error': str(e)
-			})
-			error_count += 1
-			frappe.log_error(f"Bulk classification error for {name}: {str(e)}", "AMEX Bulk Classification")
-	
-	return {
-		'results': results,
-		'success_count': success_count,
-		'error_count': error_count,
-		'total': len(transaction_names)
-	}
+	return apply_bulk_classification(
+		transaction_names,
+		vendor=vendor,
+		expense_account=expense_account,
+		cost_center=cost_center,
+		accounting_class=accounting_class,
+		notes=notes
+	)
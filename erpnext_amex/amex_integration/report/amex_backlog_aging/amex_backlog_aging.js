@@ -0,0 +1,37 @@
+// Copyright (c) 2025, Your Company and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["AMEX Backlog Aging"] = {
+	filters: [
+		{
+			fieldname: "from_date",
+			label: __("From Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.add_months(frappe.datetime.get_today(), -24)
+		},
+		{
+			fieldname: "to_date",
+			label: __("To Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.get_today()
+		},
+		{
+			fieldname: "status",
+			label: __("Status"),
+			fieldtype: "Select",
+			options: "Open\nPending\nClassified\nApproved\nPosted\nDuplicate\nExcluded\nAll",
+			default: "Open"
+		},
+		{
+			fieldname: "card_member",
+			label: __("Card Member"),
+			fieldtype: "Data"
+		},
+		{
+			fieldname: "cost_center",
+			label: __("Cost Center"),
+			fieldtype: "Link",
+			options: "Cost Center"
+		}
+	]
+};
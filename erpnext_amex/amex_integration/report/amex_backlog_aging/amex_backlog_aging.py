@@ -0,0 +1,118 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+
+OPEN_STATUSES = ("Pending", "Classified")
+
+
+def execute(filters=None):
+	columns = get_columns()
+	data = get_data(filters or {})
+	return columns, data
+
+
+def get_columns():
+	return [
+		{
+			"fieldname": "card_member",
+			"label": _("Card Member"),
+			"fieldtype": "Data",
+			"width": 180
+		},
+		{
+			"fieldname": "cost_center",
+			"label": _("Cost Center"),
+			"fieldtype": "Link",
+			"options": "Cost Center",
+			"width": 180
+		},
+		{
+			"fieldname": "status",
+			"label": _("Status"),
+			"fieldtype": "Data",
+			"width": 100
+		},
+		{
+			"fieldname": "transaction_count",
+			"label": _("Count"),
+			"fieldtype": "Int",
+			"width": 80
+		},
+		{
+			"fieldname": "total_amount",
+			"label": _("Amount"),
+			"fieldtype": "Currency",
+			"width": 120
+		},
+		{
+			"fieldname": "oldest_date",
+			"label": _("Oldest Transaction"),
+			"fieldtype": "Date",
+			"width": 120
+		},
+		{
+			"fieldname": "avg_days_outstanding",
+			"label": _("Avg Days Since Transaction"),
+			"fieldtype": "Float",
+			"precision": 1,
+			"width": 120
+		},
+		{
+			"fieldname": "typical_age_days",
+			"label": _("Typical Days to Status"),
+			"fieldtype": "Float",
+			"precision": 1,
+			"width": 120
+		}
+	]
+
+
+def get_data(filters):
+	"""
+	Aggregate the daily rollup; never touches `tabAMEX Transaction`
+
+	`typical_age_days` is the count-weighted mean of the per-day medians
+	stored in the rollup.
+	"""
+	conditions = []
+	values = {}
+
+	for key, condition in (
+		("from_date", "rollup_date >= %(from_date)s"),
+		("to_date", "rollup_date <= %(to_date)s"),
+		("card_member", "card_member = %(card_member)s"),
+		("cost_center", "cost_center = %(cost_center)s")
+	):
+		if filters.get(key):
+			conditions.append(condition)
+			values[key] = filters.get(key)
+
+	status = filters.get("status") or "Open"
+
+	if status == "Open":
+		conditions.append("status IN %(statuses)s")
+		values["statuses"] = OPEN_STATUSES
+	elif status != "All":
+		conditions.append("status = %(status)s")
+		values["status"] = status
+
+	where_clause = " AND ".join(conditions) if conditions else "1=1"
+
+	return frappe.db.sql(f"""
+		SELECT
+			card_member,
+			cost_center,
+			status,
+			SUM(transaction_count) AS transaction_count,
+			SUM(total_amount) AS total_amount,
+			MIN(rollup_date) AS oldest_date,
+			SUM(transaction_count * DATEDIFF(CURDATE(), rollup_date)) / SUM(transaction_count) AS avg_days_outstanding,
+			SUM(transaction_count * median_age_days) / SUM(transaction_count) AS typical_age_days
+		FROM `tabAMEX Transaction Daily Rollup`
+		WHERE {where_clause}
+		GROUP BY card_member, cost_center, status
+		ORDER BY avg_days_outstanding DESC
+	""", values, as_dict=True)
@@ -79,19 +79,23 @@ def get_columns():
 
 
 def get_data(filters):
+	filters = filters or {}
 	conditions = []
 	
 	if filters.get("from_date"):
-		conditions.append(f"import_date >= '{filters.get('from_date')}'")
+		conditions.append("import_date >= %(from_date)s")
 	
 	if filters.get("to_date"):
-		conditions.append(f"import_date <= '{filters.get('to_date')}'")
+		conditions.append("import_date <= %(to_date)s")
 	
 	if filters.get("status"):
-		conditions.append(f"status = '{filters.get('status')}'")
+		conditions.append("status = %(status)s")
 	
 	where_clause = " AND ".join(conditions) if conditions else "1=1"
 	
+	# Counters are maintained incrementally by AMEX Transaction and reconciled
+	# daily, so this stays a single-table read. Duplicates and excluded payments
+	# need no further action and count towards completion.
 	data = frappe.db.sql(f"""
 		SELECT 
 			name,
@@ -105,14 +109,14 @@ def get_data(filters):
 			excluded_count,
 			CASE 
 				WHEN total_transactions > 0 
-				THEN (processed_count * 100.0 / total_transactions)
+				THEN ((processed_count + duplicate_count + excluded_count) * 100.0 / total_transactions)
 				ELSE 0 
 			END as completion_pct
 		FROM `tabAMEX Import Batch`
 		WHERE {where_clause}
 		ORDER BY import_date DESC, name DESC
 		LIMIT 500
-	""", as_dict=True)
+	""", filters, as_dict=True)
 	
 	return data
 
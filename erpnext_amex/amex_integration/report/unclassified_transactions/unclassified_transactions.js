@@ -0,0 +1,91 @@
+// Copyright (c) 2025, Your Company and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Unclassified Transactions"] = {
+	filters: [
+		{
+			fieldname: "view",
+			label: __("View"),
+			fieldtype: "Select",
+			options: "Detail\nSummary",
+			default: "Detail"
+		},
+		{
+			fieldname: "from_date",
+			label: __("From Date"),
+			fieldtype: "Date"
+		},
+		{
+			fieldname: "to_date",
+			label: __("To Date"),
+			fieldtype: "Date"
+		},
+		{
+			fieldname: "card_member",
+			label: __("Card Member"),
+			fieldtype: "Data"
+		},
+		{
+			fieldname: "batch_id",
+			label: __("Batch"),
+			fieldtype: "Link",
+			options: "AMEX Import Batch"
+		},
+		{
+			fieldname: "page_length",
+			label: __("Page Length"),
+			fieldtype: "Int",
+			default: 500
+		},
+		{
+			// Keyset cursor, set by the Next Page button
+			fieldname: "after_date",
+			fieldtype: "Date",
+			hidden: 1
+		},
+		{
+			fieldname: "after_name",
+			fieldtype: "Data",
+			hidden: 1
+		}
+	],
+
+	onload: function(report) {
+		report.page.add_inner_button(__("First Page"), () => {
+			report.set_filter_value({ after_date: "", after_name: "" });
+		});
+
+		report.page.add_inner_button(__("Next Page"), () => {
+			const data = report.data || [];
+			const last = data.filter(row => row.name).pop();
+
+			if (!last) {
+				frappe.show_alert({ message: __("No more rows"), indicator: "orange" });
+				return;
+			}
+
+			report.set_filter_value({
+				after_date: last.transaction_date,
+				after_name: last.name
+			});
+		});
+
+		["CSV", "Excel"].forEach(file_format => {
+			report.page.add_inner_button(__(file_format), () => {
+				const filters = Object.assign({}, report.get_values(), { after_date: "", after_name: "" });
+
+				frappe.call({
+					method: "erpnext_amex.amex_integration.report.unclassified_transactions.unclassified_transactions.export_report",
+					args: { filters: filters, file_format: file_format },
+					callback: () => {
+						frappe.show_alert({ message: __("Export started. The download will open when it is ready."), indicator: "blue" });
+					}
+				});
+			}, __("Export All"));
+		});
+
+		frappe.realtime.on("amex_report_export_ready", (data) => {
+			window.open(data.file_url);
+		});
+	}
+};
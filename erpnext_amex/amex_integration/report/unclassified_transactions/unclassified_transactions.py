@@ -1,14 +1,46 @@
 # Copyright (c) 2025, Your Company and contributors
 # For license information, please see license.txt
 
+import csv
+import json
+import os
 import frappe
 from frappe import _
+from frappe.utils import flt, nowdate
+
+
+DEFAULT_PAGE_LENGTH = 500
+EXPORT_PAGE_LENGTH = 2000
+
+AGE_BUCKET_SQL = """
+	CASE
+		WHEN DATEDIFF(CURDATE(), transaction_date) <= 30 THEN '0-30'
+		WHEN DATEDIFF(CURDATE(), transaction_date) <= 60 THEN '31-60'
+		WHEN DATEDIFF(CURDATE(), transaction_date) <= 90 THEN '61-90'
+		ELSE '90+'
+	END
+"""
+
+DETAIL_FIELDS = ["name", "transaction_date", "description", "card_member", "amount", "amex_category", "status", "batch_id"]
 
 
 def execute(filters=None):
-	columns = get_columns()
-	data = get_data(filters)
-	return columns, data
+	filters = frappe._dict(filters or {})
+	
+	if filters.get("view") == "Summary":
+		return get_summary_columns(), get_summary_data(filters), None, None, get_report_summary(filters)
+	
+	page_length = get_page_length(filters)
+	
+	# Fetch one extra row to know whether another page exists
+	data = get_data(filters, page_length + 1)
+	message = None
+	
+	if len(data) > page_length:
+		data = data[:page_length]
+		message = _("Showing {0} rows. Use Next Page to continue after {1}.").format(page_length, data[-1].name)
+	
+	return get_columns(), data, message, None, get_report_summary(filters)
 
 
 def get_columns():
@@ -66,39 +98,268 @@ def get_columns():
 	]
 
 
-def get_data(filters):
+def get_summary_columns():
+	return [
+		{
+			"fieldname": "card_member",
+			"label": _("Card Member"),
+			"fieldtype": "Data",
+			"width": 180
+		},
+		{
+			"fieldname": "age_bucket",
+			"label": _("Age (Days)"),
+			"fieldtype": "Data",
+			"width": 100
+		},
+		{
+			"fieldname": "transaction_count",
+			"label": _("Count"),
+			"fieldtype": "Int",
+			"width": 100
+		},
+		{
+			"fieldname": "amount",
+			"label": _("Amount"),
+			"fieldtype": "Currency",
+			"width": 140
+		},
+		{
+			"fieldname": "oldest_date",
+			"label": _("Oldest Transaction"),
+			"fieldtype": "Date",
+			"width": 130
+		}
+	]
+
+
+def get_conditions(filters):
+	"""
+	Build the WHERE clause for the report
+	
+	All values are bound as query parameters. The leading status/date
+	conditions match the (status, transaction_date, name) index on
+	AMEX Transaction.
+	
+	Returns:
+		tuple: (where_clause, values)
+	"""
 	conditions = ["status IN ('Pending', 'Classified')"]
+	values = {}
 	
-	if filters.get("from_date"):
-		conditions.append(f"transaction_date >= '{filters.get('from_date')}'")
+	for key, condition in (
+		("from_date", "transaction_date >= %(from_date)s"),
+		("to_date", "transaction_date <= %(to_date)s"),
+		("card_member", "card_member = %(card_member)s"),
+		("batch_id", "batch_id = %(batch_id)s")
+	):
+		if filters.get(key):
+			conditions.append(condition)
+			values[key] = filters.get(key)
+	
+	return " AND ".join(conditions), values
+
+
+def get_data(filters, limit=DEFAULT_PAGE_LENGTH, after=None):
+	"""
+	Get one keyset page of unclassified transactions
 	
-	if filters.get("to_date"):
-		conditions.append(f"transaction_date <= '{filters.get('to_date')}'")
+	Args:
+		filters: Report filters
+		limit: Maximum number of rows
+		after: (transaction_date, name) of the last row of the previous page;
+			defaults to the after_date/after_name filters
 	
-	if filters.get("card_member"):
-		conditions.append(f"card_member = '{filters.get('card_member')}'")
+	Returns:
+		list: Transactions ordered by transaction_date DESC, name DESC
+	"""
+	where_clause, values = get_conditions(filters)
 	
-	if filters.get("batch_id"):
-		conditions.append(f"batch_id = '{filters.get('batch_id')}'")
+	if after is None and filters.get("after_date") and filters.get("after_name"):
+		after = (filters.get("after_date"), filters.get("after_name"))
 	
-	where_clause = " AND ".join(conditions) if conditions else "1=1"
+	if after:
+		where_clause += """
+			AND (transaction_date < %(after_date)s
+				OR (transaction_date = %(after_date)s AND name < %(after_name)s))
+		"""
+		values["after_date"], values["after_name"] = after
 	
-	data = frappe.db.sql(f"""
+	values["limit"] = int(limit)
+	
+	return frappe.db.sql(f"""
 		SELECT 
-			name,
-			transaction_date,
-			description,
-			card_member,
-			amount,
-			amex_category,
-			status,
-			batch_id
+			{", ".join(DETAIL_FIELDS)}
 		FROM `tabAMEX Transaction`
 		WHERE {where_clause}
 		ORDER BY transaction_date DESC, name DESC
-		LIMIT 1000
-	""", as_dict=True)
+		LIMIT %(limit)s
+	""", values, as_dict=True)
+
+
+def iter_data(filters, page_length=EXPORT_PAGE_LENGTH):
+	"""
+	Yield every matching transaction, one keyset page at a time
+	
+	Args:
+		filters: Report filters
+		page_length: Rows fetched per query
+	"""
+	after = None
 	
-	return data
+	while True:
+		rows = get_data(filters, page_length, after=after)
+		
+		yield from rows
+		
+		if len(rows) < page_length:
+			break
+		
+		after = (rows[-1].transaction_date, rows[-1].name)
 
 
+def get_summary_data(filters):
+	"""Count and amount of unclassified transactions by card member and age bucket"""
+	where_clause, values = get_conditions(filters)
+	
+	return frappe.db.sql(f"""
+		SELECT
+			card_member,
+			{AGE_BUCKET_SQL} AS age_bucket,
+			COUNT(*) AS transaction_count,
+			SUM(amount) AS amount,
+			MIN(transaction_date) AS oldest_date
+		FROM `tabAMEX Transaction`
+		WHERE {where_clause}
+		GROUP BY card_member, age_bucket
+		ORDER BY card_member, MIN(transaction_date)
+	""", values, as_dict=True)
+
+
+def get_report_summary(filters):
+	"""Headline totals across all matching rows (not just the current page)"""
+	where_clause, values = get_conditions(filters)
+	
+	totals = frappe.db.sql(f"""
+		SELECT COUNT(*) AS transaction_count, SUM(amount) AS amount, MIN(transaction_date) AS oldest_date
+		FROM `tabAMEX Transaction`
+		WHERE {where_clause}
+	""", values, as_dict=True)[0]
+	
+	return [
+		{
+			"value": totals.transaction_count,
+			"label": _("Unclassified Transactions"),
+			"datatype": "Int",
+			"indicator": "Orange" if totals.transaction_count else "Green"
+		},
+		{
+			"value": flt(totals.amount),
+			"label": _("Unclassified Amount"),
+			"datatype": "Currency"
+		},
+		{
+			"value": totals.oldest_date,
+			"label": _("Oldest Transaction"),
+			"datatype": "Date"
+		}
+	]
+
+
+def get_page_length(filters):
+	return max(1, min(int(filters.get("page_length") or DEFAULT_PAGE_LENGTH), 5000))
+
+
+@frappe.whitelist()
+def export_report(filters=None, file_format="CSV"):
+	"""
+	Queue a full export of the report
+	
+	The file is written by a background job and announced to the user with
+	the `amex_report_export_ready` realtime event.
+	
+	Args:
+		filters: Report filters (JSON string or dict)
+		file_format: CSV or Excel
+	"""
+	frappe.has_permission("AMEX Transaction", "export", throw=True)
+	
+	if isinstance(filters, str):
+		filters = json.loads(filters)
+	
+	if file_format not in ("CSV", "Excel"):
+		frappe.throw(_("Unsupported export format: {0}").format(file_format))
+	
+	frappe.enqueue(
+		"erpnext_amex.amex_integration.report.unclassified_transactions.unclassified_transactions.build_export",
+		queue="long",
+		filters=filters or {},
+		file_format=file_format,
+		user=frappe.session.user
+	)
+	
+	return {"status": "queued"}
+
+
+def build_export(filters, file_format="CSV", user=None):
+	"""
+	Stream every matching row into a private file
+	
+	Rows are written as each keyset page is fetched, so memory use is bounded
+	by the page size rather than the size of the backlog.
+	"""
+	filters = frappe._dict(filters)
+	
+	# Exports always start from the first row
+	filters.pop("after_date", None)
+	filters.pop("after_name", None)
+	
+	extension = "xlsx" if file_format == "Excel" else "csv"
+	file_name = f"unclassified-transactions-{nowdate()}-{frappe.generate_hash(length=6)}.{extension}"
+	file_path = frappe.get_site_path("private", "files", file_name)
+	labels = [column["label"] for column in get_columns()]
+	rows = ([row[field] for field in DETAIL_FIELDS] for row in iter_data(filters))
+	
+	if file_format == "Excel":
+		write_xlsx(file_path, labels, rows)
+	else:
+		write_csv(file_path, labels, rows)
+	
+	file_doc = frappe.get_doc({
+		"doctype": "File",
+		"file_name": file_name,
+		"file_url": f"/private/files/{file_name}",
+		"is_private": 1,
+		"file_size": os.path.getsize(file_path)
+	})
+	file_doc.insert(ignore_permissions=True)
+	frappe.db.commit()
+	
+	frappe.publish_realtime(
+		"amex_report_export_ready",
+		{"file_url": file_doc.file_url, "file_name": file_name},
+		user=user or frappe.session.user
+	)
+	
+	return file_doc.file_url
+
+
+def write_csv(file_path, labels, rows):
+	with open(file_path, "w", newline="", encoding="utf-8") as f:
+		writer = csv.writer(f)
+		writer.writerow(labels)
+		writer.writerows(rows)
+
+
+def write_xlsx(file_path, labels, rows):
+	from openpyxl import Workbook
+	
+	# write_only streams rows to disk instead of holding the sheet in memory
+	workbook = Workbook(write_only=True)
+	sheet = workbook.create_sheet("Unclassified Transactions")
+	sheet.append(labels)
+	
+	for row in rows:
+		sheet.append(row)
+	
+	workbook.save(file_path)
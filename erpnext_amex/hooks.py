@@ -110,6 +110,19 @@ app_license = "MIT"
 #	}
 # }
 
+_reference_cache_events = {
+	"after_insert": "erpnext_amex.utils.reference_cache.invalidate_reference_cache",
+	"on_update": "erpnext_amex.utils.reference_cache.invalidate_reference_cache",
+	"on_trash": "erpnext_amex.utils.reference_cache.invalidate_reference_cache",
+	"after_rename": "erpnext_amex.utils.reference_cache.invalidate_reference_cache"
+}
+
+doc_events = {
+	"Cost Center": _reference_cache_events,
+	"Account": _reference_cache_events,
+	"Supplier": _reference_cache_events
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -131,6 +144,24 @@ app_license = "MIT"
 #	],
 # }
 
+scheduler_events = {
+	"cron": {
+		"* * * * *": [
+			"erpnext_amex.utils.slack_notifier.deliver_queued_notifications",
+			"erpnext_amex.utils.classification_memory.flush_rule_learning_events"
+		]
+	},
+	"hourly": [
+		"erpnext_amex.utils.transaction_rollup.update_transaction_rollups"
+	],
+	"daily": [
+		"erpnext_amex.utils.batch_counters.reconcile_batch_counters"
+	],
+	"weekly": [
+		"erpnext_amex.utils.transaction_rollup.rebuild_transaction_rollups"
+	]
+}
+
 # Testing
 # -------
 
@@ -0,0 +1,112 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import frappe
+
+
+# AMEX Transaction status -> AMEX Import Batch counter column
+STATUS_COUNTER_FIELDS = {
+	'Pending': 'pending_count',
+	'Posted': 'processed_count',
+	'Duplicate': 'duplicate_count',
+	'Excluded': 'excluded_count'
+}
+
+BATCH_COUNTER_FIELDS = ['total_transactions'] + list(STATUS_COUNTER_FIELDS.values())
+
+
+def update_batch_counters(batch_id, old_status=None, new_status=None, total_delta=0):
+	"""
+	Move a transaction between batch counters
+
+	Args:
+		batch_id: AMEX Import Batch ID
+		old_status: Previous transaction status (None for new transactions)
+		new_status: Current transaction status (None for deleted transactions)
+		total_delta: Change to total_transactions (1 on insert, -1 on delete)
+	"""
+	deltas = {}
+
+	if total_delta:
+		deltas['total_transactions'] = total_delta
+
+	old_field = STATUS_COUNTER_FIELDS.get(old_status)
+	new_field = STATUS_COUNTER_FIELDS.get(new_status)
+
+	if old_field != new_field:
+		if old_field:
+			deltas[old_field] = deltas.get(old_field, 0) - 1
+		if new_field:
+			deltas[new_field] = deltas.get(new_field, 0) + 1
+
+	apply_counter_deltas(batch_id, deltas)
+
+
+def apply_counter_deltas(batch_id, deltas):
+	"""
+	Atomically add deltas to batch counter columns
+
+	Args:
+		batch_id: AMEX Import Batch ID
+		deltas: Dict of counter column -> signed increment
+	"""
+	deltas = {field: delta for field, delta in deltas.items() if delta and field in BATCH_COUNTER_FIELDS}
+
+	if not batch_id or not deltas:
+		return
+
+	assignments = ", ".join(f"`{field}` = `{field}` + %({field})s" for field in deltas)
+
+	frappe.db.sql(f"""
+		UPDATE `tabAMEX Import Batch`
+		SET {assignments}
+		WHERE name = %(batch_id)s
+	""", {**deltas, 'batch_id': batch_id})
+
+
+def reconcile_batch_counters(batch_ids=None):
+	"""
+	Recompute batch counters from AMEX Transaction in a single statement
+
+	Repairs drift from updates that bypass the document controller
+	(e.g. direct `db_set` calls). Runs daily; may also be called for
+	specific batches.
+
+	Args:
+		batch_ids: List of batch IDs to reconcile (all batches if None)
+	"""
+	values = {}
+	batch_condition = ""
+	transaction_condition = ""
+
+	if batch_ids:
+		values['batch_ids'] = tuple(batch_ids)
+		batch_condition = "WHERE batch.name IN %(batch_ids)s"
+		transaction_condition = "WHERE batch_id IN %(batch_ids)s"
+
+	status_sums = ",\n\t\t\t\t".join(
+		f"SUM(status = {frappe.db.escape(status)}) AS {field}"
+		for status, field in STATUS_COUNTER_FIELDS.items()
+	)
+	assignments = ",\n\t\t\t".join(
+		f"batch.{field} = COALESCE(counts.{field}, 0)"
+		for field in BATCH_COUNTER_FIELDS
+	)
+
+	frappe.db.sql(f"""
+		UPDATE `tabAMEX Import Batch` batch
+		LEFT JOIN (
+			SELECT
+				batch_id,
+				COUNT(*) AS total_transactions,
+				{status_sums}
+			FROM `tabAMEX Transaction`
+			{transaction_condition}
+			GROUP BY batch_id
+		) counts ON counts.batch_id = batch.name
+		SET
+			{assignments}
+		{batch_condition}
+	""", values)
+
+	frappe.db.commit()
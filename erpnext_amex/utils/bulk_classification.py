@@ -0,0 +1,248 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+from collections import defaultdict
+
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+
+from erpnext_amex.utils.batch_counters import STATUS_COUNTER_FIELDS, apply_counter_deltas
+from erpnext_amex.utils.classification_memory import normalize_vendor_name, queue_rule_learning
+from erpnext_amex.utils.review_updates import queue_review_update
+
+
+# Transactions that may be (re)classified from the review page
+CLASSIFIABLE_STATUSES = ('Pending', 'Classified')
+
+# Columns written by a bulk classification, recorded in Version rows
+CLASSIFICATION_FIELDS = (
+	'vendor', 'expense_account', 'cost_center', 'accounting_class',
+	'classification_notes', 'classified_by', 'classification_date', 'status'
+)
+
+SPLIT_FIELDS = ('name', 'parent', 'idx', 'cost_center', 'accounting_class', 'amount', 'percentage')
+
+VERSION_FIELDS = [
+	'name', 'ref_doctype', 'docname', 'data',
+	'creation', 'modified', 'owner', 'modified_by', 'docstatus'
+]
+
+
+def apply_bulk_classification(transaction_names, vendor=None, expense_account=None, cost_center=None,
+		accounting_class=None, notes=None):
+	"""
+	Classify many transactions with set-based writes
+
+	Equivalent to calling `classify_transaction` per name with a single
+	cost center, but the link targets are validated once, the rows are
+	updated with one UPDATE, existing splits are removed with one DELETE,
+	Version rows are inserted in bulk and one rule learning event is
+	queued per vendor pattern with the number of transactions it covered.
+	Everything is committed together.
+
+	Transactions that are missing or not Pending/Classified are skipped
+	and reported as errors.
+
+	Returns:
+		Dict with results, success_count, error_count, total
+	"""
+	transaction_names = list(dict.fromkeys(transaction_names))
+	validate_classification_targets(vendor, expense_account, cost_center, accounting_class)
+
+	rows = get_transaction_rows(transaction_names)
+	results = []
+	eligible = []
+
+	for name in transaction_names:
+		row = rows.get(name)
+		if not row:
+			results.append({'name': name, 'status': 'error', 'error': _("Transaction not found")})
+		elif row.status not in CLASSIFIABLE_STATUSES:
+			results.append({
+				'name': name,
+				'status': 'error',
+				'error': _("Cannot classify a {0} transaction").format(row.status)
+			})
+		else:
+			eligible.append(row)
+
+	if eligible:
+		timestamp = now_datetime()
+		values = {
+			'vendor': vendor or None,
+			'expense_account': expense_account,
+			'cost_center': cost_center,
+			'accounting_class': accounting_class,
+			'classification_notes': notes,
+			'classified_by': frappe.session.user,
+			'classification_date': timestamp,
+			'status': 'Classified'
+		}
+		# Same semantics as classify_transaction: vendor is always
+		# replaced, the other fields only when given
+		changes = {
+			field: value for field, value in values.items()
+			if field in ('vendor', 'classified_by', 'classification_date', 'status') or value
+		}
+
+		names = [row.name for row in eligible]
+		splits = remove_cost_center_splits(names)
+		update_transactions(names, changes, timestamp)
+		insert_versions(eligible, changes, splits, timestamp)
+		update_counters(eligible)
+
+		for row in eligible:
+			queue_review_update({**row, **changes})
+			results.append({'name': row.name, 'status': 'success'})
+
+		learn_from_bulk_classification(eligible, vendor, expense_account, cost_center)
+		frappe.db.commit()
+
+	success_count = len(eligible)
+
+	return {
+		'results': results,
+		'success_count': success_count,
+		'error_count': len(results) - success_count,
+		'total': len(transaction_names)
+	}
+
+
+def validate_classification_targets(vendor, expense_account, cost_center, accounting_class):
+	"""Check the link targets once for the whole batch"""
+	if not expense_account:
+		frappe.throw(_("Expense Account is required"))
+
+	for doctype, value in (
+		('Supplier', vendor),
+		('Account', expense_account),
+		('Cost Center', cost_center),
+		('Accounting Class', accounting_class)
+	):
+		if value and not frappe.db.exists(doctype, value):
+			frappe.throw(_("{0} {1} not found").format(_(doctype), frappe.bold(value)))
+
+
+def get_transaction_rows(names):
+	"""Fetch the current values of the selected transactions, keyed by name"""
+	if not names:
+		return {}
+
+	fields = ", ".join(f"`{field}`" for field in ('name', 'batch_id', 'description') + CLASSIFICATION_FIELDS)
+	rows = frappe.db.sql(f"""
+		SELECT {fields}, transaction_date, card_member, amount
+		FROM `tabAMEX Transaction`
+		WHERE name IN %(names)s
+		FOR UPDATE
+	""", {'names': tuple(names)}, as_dict=True)
+
+	return {row.name: row for row in rows}
+
+
+def remove_cost_center_splits(names):
+	"""
+	Delete the split rows of the given transactions
+
+	Returns:
+		dict: parent -> list of removed split rows (for Version data)
+	"""
+	splits = defaultdict(list)
+
+	for split in frappe.db.sql(f"""
+		SELECT {", ".join(SPLIT_FIELDS)}
+		FROM `tabAMEX Transaction Split`
+		WHERE parenttype = 'AMEX Transaction' AND parent IN %(names)s
+		ORDER BY parent, idx
+	""", {'names': tuple(names)}, as_dict=True):
+		splits[split.parent].append(split)
+
+	if splits:
+		frappe.db.sql("""
+			DELETE FROM `tabAMEX Transaction Split`
+			WHERE parenttype = 'AMEX Transaction' AND parent IN %(names)s
+		""", {'names': tuple(splits)})
+
+	return splits
+
+
+def update_transactions(names, changes, timestamp):
+	"""Write the classification to all rows with one UPDATE"""
+	assignments = ", ".join(f"`{field}` = %({field})s" for field in changes)
+
+	frappe.db.sql(f"""
+		UPDATE `tabAMEX Transaction`
+		SET {assignments}, modified = %(modified)s, modified_by = %(modified_by)s
+		WHERE name IN %(names)s
+	""", {
+		**changes,
+		'modified': timestamp,
+		'modified_by': frappe.session.user,
+		'names': tuple(names)
+	})
+
+
+def insert_versions(rows, changes, splits, timestamp):
+	"""Record what each transaction changed from, in the format Version uses"""
+	user = frappe.session.user
+	values = []
+
+	for row in rows:
+		changed = [
+			[field, row.get(field), value]
+			for field, value in changes.items()
+			if row.get(field) != value
+		]
+		removed = [
+			['cost_center_splits', {field: split.get(field) for field in SPLIT_FIELDS if field != 'parent'}]
+			for split in splits.get(row.name, [])
+		]
+
+		if not changed and not removed:
+			continue
+
+		data = frappe.as_json({
+			'changed': changed,
+			'added': [],
+			'removed': removed,
+			'row_changed': []
+		}, indent=None)
+
+		values.append((
+			frappe.generate_hash(length=10), 'AMEX Transaction', row.name, data,
+			timestamp, timestamp, user, user, 0
+		))
+
+	if values:
+		frappe.db.bulk_insert('Version', VERSION_FIELDS, values)
+
+
+def update_counters(rows):
+	"""Move classified rows out of their batches' status counters"""
+	deltas = defaultdict(lambda: defaultdict(int))
+
+	for row in rows:
+		field = STATUS_COUNTER_FIELDS.get(row.status)
+		if field:
+			deltas[row.batch_id][field] -= 1
+
+	for batch_id, batch_deltas in deltas.items():
+		apply_counter_deltas(batch_id, batch_deltas)
+
+
+def learn_from_bulk_classification(rows, vendor, expense_account, cost_center):
+	"""Queue one learning event per rule, counting every transaction it covers"""
+	patterns = defaultdict(list)
+
+	for row in rows:
+		if row.description:
+			patterns[normalize_vendor_name(row.description)].append(row.description)
+
+	for descriptions in patterns.values():
+		queue_rule_learning(
+			descriptions[0],
+			vendor=vendor,
+			expense_account=expense_account,
+			cost_center=cost_center,
+			uses=len(descriptions)
+		)
@@ -0,0 +1,197 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+"""
+Bulk approve and post in background jobs
+
+A selection is split into one shard per AMEX card account, so jobs
+running in parallel on different workers never post against the same
+liability ledger. Each transaction is committed on its own; a failure
+rolls back only that transaction. Progress for the whole job group is
+kept in a Redis hash that the review page polls.
+"""
+
+import json
+from collections import defaultdict
+
+import frappe
+from frappe.utils import cint
+
+
+# Progress is kept for a day after the last update
+PROGRESS_TTL = 24 * 60 * 60
+
+# Errors kept for display on the review page
+MAX_REPORTED_ERRORS = 50
+
+PROGRESS_FIELDS = ('total', 'shards', 'done', 'approved', 'posted', 'failed', 'shards_done')
+
+SHARD_JOB_TIMEOUT = 60 * 60
+
+
+def start_bulk_posting(transaction_names):
+	"""
+	Enqueue approve-and-post jobs for a selection, one per card account
+
+	Args:
+		transaction_names: List of AMEX Transaction names
+
+	Returns:
+		dict: job_group, total and number of shards
+	"""
+	transaction_names = list(dict.fromkeys(transaction_names))
+	shards = get_shards(transaction_names)
+	job_group = frappe.generate_hash(length=12)
+
+	init_progress(job_group, total=len(transaction_names), shards=len(shards))
+
+	missing = set(transaction_names) - {name for names in shards.values() for name in names}
+	for name in missing:
+		record_result(job_group, name, failed=True, error="Transaction not found")
+
+	for names in shards.values():
+		frappe.enqueue(
+			'erpnext_amex.utils.bulk_posting.post_shard',
+			queue='long',
+			timeout=SHARD_JOB_TIMEOUT,
+			job_group=job_group,
+			transaction_names=names
+		)
+
+	return {'job_group': job_group, 'total': len(transaction_names), 'shards': len(shards)}
+
+
+def get_shards(transaction_names):
+	"""
+	Group transactions by AMEX card account, in date order within a shard
+
+	Returns:
+		dict: card account -> list of transaction names
+	"""
+	shards = defaultdict(list)
+
+	if not transaction_names:
+		return shards
+
+	for row in frappe.db.sql("""
+		SELECT name, IFNULL(amex_card_account, '') AS amex_card_account
+		FROM `tabAMEX Transaction`
+		WHERE name IN %(names)s
+		ORDER BY transaction_date, name
+	""", {'names': tuple(transaction_names)}, as_dict=True):
+		shards[row.amex_card_account].append(row.name)
+
+	return shards
+
+
+def post_shard(job_group, transaction_names):
+	"""
+	Approve (if Classified) and post each transaction of one shard (background job)
+
+	Args:
+		job_group: Progress key shared by all shards of a selection
+		transaction_names: Transactions of a single card account
+	"""
+	for name in transaction_names:
+		try:
+			transaction = frappe.get_doc('AMEX Transaction', name)
+			approved = False
+
+			# Approve if not already
+			if transaction.status == 'Classified':
+				transaction.approve()
+				approved = True
+
+			# Post if approved
+			if transaction.status != 'Approved':
+				frappe.throw(f"Cannot post a {transaction.status} transaction")
+
+			transaction.post_to_journal_entry()
+			frappe.db.commit()
+			record_result(job_group, name, approved=approved, posted=True)
+
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(f"Bulk posting error for {name}: {str(e)}", "AMEX Bulk Posting")
+			record_result(job_group, name, failed=True, error=str(e))
+
+	increment_progress(job_group, shards_done=1)
+
+
+def get_progress_key(job_group):
+	return frappe.cache().make_key(f"amex_bulk_post:{job_group}")
+
+
+def get_errors_key(job_group):
+	return f"amex_bulk_post_errors:{job_group}"
+
+
+def init_progress(job_group, total, shards):
+	# Written through a raw pipeline: RedisWrapper.hset would pickle the
+	# values, and the counters must stay plain integers for HINCRBY
+	key = get_progress_key(job_group)
+
+	pipe = frappe.cache().pipeline()
+	pipe.hset(key, mapping={
+		'owner': frappe.session.user,
+		**{field: 0 for field in PROGRESS_FIELDS},
+		'total': total,
+		'shards': shards
+	})
+	pipe.expire(key, PROGRESS_TTL)
+	pipe.execute()
+
+
+def increment_progress(job_group, **deltas):
+	"""Add to progress counters (raw Redis integers, safe across workers)"""
+	cache = frappe.cache()
+	key = get_progress_key(job_group)
+
+	pipe = cache.pipeline()
+	for field, delta in deltas.items():
+		pipe.hincrby(key, field, delta)
+	pipe.expire(key, PROGRESS_TTL)
+	pipe.execute()
+
+
+def record_result(job_group, transaction_name, approved=False, posted=False, failed=False, error=None):
+	increment_progress(
+		job_group,
+		done=1,
+		approved=cint(approved),
+		posted=cint(posted),
+		failed=cint(failed)
+	)
+
+	if error:
+		cache = frappe.cache()
+		errors_key = get_errors_key(job_group)
+		if cache.llen(errors_key) < MAX_REPORTED_ERRORS:
+			cache.rpush(errors_key, json.dumps({'transaction': transaction_name, 'error': error}))
+		cache.expire(cache.make_key(errors_key), PROGRESS_TTL)
+
+
+def get_progress(job_group):
+	"""
+	Read a job group's progress
+
+	Returns:
+		dict: Counters from PROGRESS_FIELDS, errors (first 50) and complete,
+		or None if the job group is unknown or expired
+	"""
+	cache = frappe.cache()
+	key = get_progress_key(job_group)
+
+	values = cache.hmget(key, ['owner', *PROGRESS_FIELDS])
+	if values[0] is None:
+		return None
+
+	owner = values[0].decode() if isinstance(values[0], bytes) else values[0]
+	if owner != frappe.session.user and 'System Manager' not in frappe.get_roles():
+		frappe.throw("Not permitted", frappe.PermissionError)
+
+	progress = {field: cint(value) for field, value in zip(PROGRESS_FIELDS, values[1:])}
+	progress['errors'] = [json.loads(error) for error in cache.lrange(get_errors_key(job_group), 0, -1)]
+	progress['complete'] = progress['done'] >= progress['total']
+
+	return progress
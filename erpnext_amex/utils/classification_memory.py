@@ -1,9 +1,22 @@
 # Copyright (c) 2025, Your Company and contributors
 # For license information, please see license.txt
 
+import json
 import re
 import frappe
-from frappe.utils import now
+from frappe.utils import now, now_datetime, get_datetime
+
+
+# Redis list of pending rule learning events, folded into
+# AMEX Vendor Classification Rule by flush_rule_learning_events
+RULE_EVENTS_KEY = 'amex_rule_learning_events'
+
+# Events folded per flush; anything beyond waits for the next run
+MAX_EVENTS_PER_FLUSH = 10000
+
+# Confidence of a new rule after its first use, and the step per further use
+NEW_RULE_CONFIDENCE = 0.7
+USE_CONFIDENCE_STEP = 0.1
 
 
 def get_classification_suggestion(description, amount=None):
@@ -49,7 +62,68 @@ def get_classification_suggestion(description, amount=None):
 	return None
 
 
-def save_classification_rule(description, vendor=None, expense_account=None, cost_center=None):
+def get_classification_suggestions(descriptions):
+	"""
+	Get classification suggestions for many descriptions at once
+	
+	Same matching as `get_classification_suggestion`, but exact matches are
+	fetched with one query and the enabled rules are read once for partial
+	matching, instead of one or two queries per description.
+	
+	Args:
+		descriptions: Iterable of transaction descriptions
+	
+	Returns:
+		dict: description -> suggestion (descriptions without a match are omitted)
+	"""
+	normalized = {}
+	for description in descriptions:
+		if description and description not in normalized:
+			normalized[description] = normalize_vendor_name(description)
+	
+	if not normalized:
+		return {}
+	
+	exact_rules = {}
+	patterns = list(set(normalized.values()))
+	
+	for start in range(0, len(patterns), 500):
+		for rule in frappe.get_all(
+			'AMEX Vendor Classification Rule',
+			filters={'vendor_pattern': ['in', patterns[start:start + 500]], 'enabled': 1},
+			fields=['vendor_pattern', 'matched_supplier', 'default_expense_account', 'default_cost_center', 'confidence_score']
+		):
+			exact_rules[rule.pop('vendor_pattern')] = rule
+	
+	partial_rules = None
+	suggestions = {}
+	
+	for description, pattern in normalized.items():
+		if pattern in exact_rules:
+			suggestions[description] = exact_rules[pattern]
+			continue
+		
+		if partial_rules is None:
+			partial_rules = [
+				(rule.vendor_pattern.lower(), rule)
+				for rule in frappe.get_all(
+					'AMEX Vendor Classification Rule',
+					filters={'enabled': 1},
+					fields=['vendor_pattern', 'matched_supplier', 'default_expense_account', 'default_cost_center', 'confidence_score']
+				)
+			]
+		
+		pattern_lower = pattern.lower()
+		for rule_pattern, rule in partial_rules:
+			# Check if rule pattern is contained in description
+			if rule_pattern in pattern_lower:
+				suggestions[description] = rule
+				break
+	
+	return suggestions
+
+
+def save_classification_rule(description, vendor=None, expense_account=None, cost_center=None, uses=1, commit=True):
 	"""
 	Save or update classification rule based on user's classification
 	
@@ -58,6 +132,9 @@ def save_classification_rule(description, vendor=None, expense_account=None, cos
 		vendor: Supplier name
 		expense_account: Account name
 		cost_center: Cost Center name
+		uses: Number of transactions classified this way (bulk classification
+			passes the whole group at once; equivalent to `uses` single calls)
+		commit: Commit after saving (bulk callers commit once themselves)
 	
 	Returns:
 		doc: AMEX Vendor Classification Rule document
@@ -83,11 +160,11 @@ def save_classification_rule(description, vendor=None, expense_account=None, cos
 			rule.default_cost_center = cost_center
 		
 		# Update usage statistics
-		rule.use_count = (rule.use_count or 0) + 1
+		rule.use_count = (rule.use_count or 0) + uses
 		rule.last_used = now()
 		
 		# Increase confidence with each use
-		rule.confidence_score = min(1.0, (rule.confidence_score or 0.5) + 0.1)
+		rule.confidence_score = min(1.0, (rule.confidence_score or 0.5) + 0.1 * uses)
 		
 		rule.save(ignore_permissions=True)
 	else:
@@ -98,14 +175,15 @@ def save_classification_rule(description, vendor=None, expense_account=None, cos
 			'matched_supplier': vendor,
 			'default_expense_account': expense_account,
 			'default_cost_center': cost_center,
-			'confidence_score': 0.7,
-			'use_count': 1,
+			'confidence_score': min(1.0, 0.7 + 0.1 * (uses - 1)),
+			'use_count': uses,
 			'last_used': now(),
 			'enabled': 1
 		})
 		rule.insert(ignore_permissions=True)
 	
-	frappe.db.commit()
+	if commit:
+		frappe.db.commit()
 	return rule
 
 
@@ -176,43 +254,229 @@ def update_rule_confidence(rule_name, accepted):
 	"""
 	Update confidence score based on user acceptance
 	
+	The change is queued and applied by the next rule learning flush.
+	
 	Args:
 		rule_name: Name of the classification rule
 		accepted: Boolean - whether user accepted the suggestion
 	"""
-	if not frappe.db.exists('AMEX Vendor Classification Rule', rule_name):
-		return
+	queue_rule_event({
+		'pattern': rule_name,
+		'uses': 1 if accepted else 0,
+		# Increase confidence on acceptance, decrease on rejection
+		'confidence_delta': 0.05 if accepted else -0.1,
+		'create': False
+	})
+
+
+def learn_from_transaction(transaction_doc, uses=1):
+	"""
+	Learn from a classified transaction and update or create rules
 	
-	rule = frappe.get_doc('AMEX Vendor Classification Rule', rule_name)
+	The rule is not written here; a learning event is queued and folded in
+	by `flush_rule_learning_events`, so popular merchants' rules are written
+	once per flush instead of once per classification.
 	
-	if accepted:
-		# Increase confidence
-		rule.confidence_score = min(1.0, (rule.confidence_score or 0.5) + 0.05)
-		rule.use_count = (rule.use_count or 0) + 1
-	else:
-		# Decrease confidence
-		rule.confidence_score = max(0.0, (rule.confidence_score or 0.5) - 0.1)
+	Args:
+		transaction_doc: AMEX Transaction document (or dict)
+		uses: Number of transactions this classification stands for
+	"""
+	if not transaction_doc.get('expense_account'):
+		return
 	
-	rule.last_used = now()
-	rule.save(ignore_permissions=True)
-	frappe.db.commit()
+	queue_rule_learning(
+		transaction_doc.get('description'),
+		vendor=transaction_doc.get('vendor'),
+		expense_account=transaction_doc.get('expense_account'),
+		cost_center=transaction_doc.get('cost_center'),
+		uses=uses
+	)
 
 
-def learn_from_transaction(transaction_doc):
+def queue_rule_learning(description, vendor=None, expense_account=None, cost_center=None, uses=1):
 	"""
-	Learn from a classified transaction and update or create rules
+	Queue a classification for rule learning
+	
+	Same effect as `save_classification_rule` once flushed.
 	
 	Args:
-		transaction_doc: AMEX Transaction document
+		description: Transaction description
+		vendor: Supplier name
+		expense_account: Account name
+		cost_center: Cost Center name
+		uses: Number of transactions classified this way
 	"""
-	if not transaction_doc.expense_account:
+	pattern = normalize_vendor_name(description)
+	if not pattern:
 		return
 	
-	# Save classification as a rule
-	save_classification_rule(
-		transaction_doc.description,
-		vendor=transaction_doc.vendor,
-		expense_account=transaction_doc.expense_account,
-		cost_center=transaction_doc.cost_center
-	)
+	queue_rule_event({
+		'pattern': pattern,
+		'vendor': vendor,
+		'expense_account': expense_account,
+		'cost_center': cost_center,
+		'uses': uses,
+		'confidence_delta': USE_CONFIDENCE_STEP * uses,
+		'create': True
+	})
+
+
+def queue_rule_event(event):
+	"""
+	Push a learning event to the Redis buffer once the current transaction commits
+	
+	Events from classifications that roll back are never pushed.
+	"""
+	event['at'] = str(now_datetime())
+	payload = json.dumps(event)
+	
+	frappe.db.after_commit.add(lambda: frappe.cache().rpush(RULE_EVENTS_KEY, payload))
+
+
+def flush_rule_learning_events():
+	"""
+	Fold buffered learning events into classification rules (scheduled every minute)
+	
+	Events are taken from the buffer atomically, merged per vendor_pattern
+	(use counts and confidence deltas summed, latest non-empty defaults
+	win) and each affected rule is written once.
+	
+	Returns:
+		int: Number of rules written
+	"""
+	events = pop_rule_events(MAX_EVENTS_PER_FLUSH)
+	if not events:
+		return 0
+	
+	folded = fold_rule_events(events)
+	existing = {
+		rule.name: rule
+		for rule in frappe.get_all(
+			'AMEX Vendor Classification Rule',
+			filters={'name': ['in', list(folded)]},
+			fields=['name', 'confidence_score', 'use_count']
+		)
+	}
+	
+	written = 0
+	for pattern, change in folded.items():
+		try:
+			if apply_rule_change(pattern, change, existing.get(pattern)):
+				written += 1
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(f"Failed to apply rule learning for {pattern}", "AMEX Rule Learning")
+			# Keep the merged change for the next flush
+			frappe.cache().rpush(RULE_EVENTS_KEY, json.dumps(change))
+			continue
+		
+		frappe.db.commit()
+	
+	return written
+
+
+def pop_rule_events(limit):
+	"""Atomically take up to `limit` events from the head of the buffer"""
+	cache = frappe.cache()
+	key = cache.make_key(RULE_EVENTS_KEY)
+	
+	pipe = cache.pipeline()
+	pipe.lrange(key, 0, limit - 1)
+	pipe.ltrim(key, limit, -1)
+	raw_events, _ = pipe.execute()
+	
+	events = []
+	for raw in raw_events:
+		try:
+			events.append(json.loads(raw))
+		except ValueError:
+			frappe.log_error(f"Invalid rule learning event: {raw!r}", "AMEX Rule Learning")
+	
+	return events
+
+
+def fold_rule_events(events):
+	"""
+	Merge learning events per vendor_pattern
+	
+	Returns:
+		dict: pattern -> merged event
+	"""
+	folded = {}
+	
+	for event in sorted(events, key=lambda event: event.get('at') or ''):
+		change = folded.setdefault(event['pattern'], {
+			'pattern': event['pattern'],
+			'uses': 0,
+			'confidence_delta': 0.0,
+			'create': False,
+			'at': event.get('at')
+		})
+		
+		change['uses'] += event.get('uses') or 0
+		change['confidence_delta'] += event.get('confidence_delta') or 0
+		change['create'] = change['create'] or bool(event.get('create'))
+		change['at'] = event.get('at') or change['at']
+		
+		for field in ('vendor', 'expense_account', 'cost_center'):
+			if event.get(field):
+				change[field] = event[field]
+	
+	return folded
+
 
+def apply_rule_change(pattern, change, rule):
+	"""
+	Write one merged change to its rule
+	
+	Args:
+		pattern: vendor_pattern (rule name)
+		change: Merged event from `fold_rule_events`
+		rule: Existing rule's name/confidence_score/use_count, or None
+	
+	Returns:
+		bool: True if a rule was written
+	"""
+	last_used = get_datetime(change.get('at')) if change.get('at') else now()
+	
+	if rule:
+		values = {
+			'use_count': (rule.use_count or 0) + change['uses'],
+			'confidence_score': max(0.0, min(1.0, (rule.confidence_score or 0.5) + change['confidence_delta'])),
+			'last_used': last_used
+		}
+		
+		# Update fields if provided
+		for field, rule_field in (
+			('vendor', 'matched_supplier'),
+			('expense_account', 'default_expense_account'),
+			('cost_center', 'default_cost_center')
+		):
+			if change.get(field):
+				values[rule_field] = change[field]
+		
+		rule_doc = frappe.get_doc('AMEX Vendor Classification Rule', pattern)
+		rule_doc.update(values)
+		rule_doc.save(ignore_permissions=True)
+		return True
+	
+	# Feedback on a rule that no longer exists is dropped
+	if not change['create']:
+		return False
+	
+	# The first use brings a new rule to NEW_RULE_CONFIDENCE
+	confidence = NEW_RULE_CONFIDENCE - USE_CONFIDENCE_STEP + change['confidence_delta']
+	
+	frappe.get_doc({
+		'doctype': 'AMEX Vendor Classification Rule',
+		'vendor_pattern': pattern,
+		'matched_supplier': change.get('vendor'),
+		'default_expense_account': change.get('expense_account'),
+		'default_cost_center': change.get('cost_center'),
+		'confidence_score': max(0.0, min(1.0, confidence)),
+		'use_count': change['uses'],
+		'last_used': last_used,
+		'enabled': 1
+	}).insert(ignore_permissions=True)
+	
+	return True
@@ -2,29 +2,24 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.utils import nowdate, flt
+from frappe.utils import nowdate
+from erpnext_amex.utils.posting_context import get_posting_context
+from erpnext_amex.utils.split_allocation import allocate_splits, get_allocation_error
 
 
 def has_accounting_class_field():
 	"""Check if accounting_class field exists on Journal Entry Account"""
-	try:
-		return frappe.db.exists('Custom Field', {
-			'dt': 'Journal Entry Account',
-			'fieldname': 'accounting_class'
-		}) or frappe.db.has_column('Journal Entry Account', 'accounting_class')
-	except Exception:
-		return False
+	return get_posting_context().has_accounting_class_field
 
 
 def get_account_type(account):
 	"""Get the account type for a given account"""
-	return frappe.db.get_value('Account', account, 'account_type')
+	return get_posting_context().get_account_type(account)
 
 
 def is_payable_receivable_account(account):
 	"""Check if account is Payable or Receivable type"""
-	account_type = get_account_type(account)
-	return account_type in ('Payable', 'Receivable')
+	return get_posting_context().is_payable_receivable_account(account)
 
 
 def create_journal_entry_from_transaction(transaction_doc):
@@ -37,11 +32,12 @@ def create_journal_entry_from_transaction(transaction_doc):
 	Returns:
 		doc: Journal Entry document
 	"""
-	# Get settings
-	settings = frappe.get_single('AMEX Integration Settings')
+	# Settings and master data lookups are shared across the request/job
+	context = get_posting_context()
+	settings = context.settings
 	
 	# Use transaction's card account (from batch), fall back to settings if not set
-	amex_liability_account = transaction_doc.amex_card_account or settings.amex_liability_account
+	amex_liability_account = context.get_amex_liability_account(transaction_doc)
 	
 	if not amex_liability_account:
 		frappe.throw("AMEX Card Account not set on transaction and no default configured in AMEX Integration Settings")
@@ -54,13 +50,13 @@ def create_journal_entry_from_transaction(transaction_doc):
 		frappe.throw("Vendor is required for posting")
 	
 	# Check if AMEX liability account requires party (Payable/Receivable accounts do)
-	amex_account_needs_party = is_payable_receivable_account(amex_liability_account)
+	amex_account_needs_party = context.is_payable_receivable_account(amex_liability_account)
 	
 	# Check if accounting_class field exists
-	use_accounting_class = has_accounting_class_field()
+	use_accounting_class = context.has_accounting_class_field
 	
 	# Get company from settings
-	company = settings.default_company or frappe.defaults.get_user_default('Company')
+	company = context.company
 	
 	# Create Journal Entry
 	je_data = {
@@ -100,7 +96,7 @@ def create_journal_entry_from_transaction(transaction_doc):
 				credit_entry['party_type'] = 'Supplier'
 				credit_entry['party'] = transaction_doc.vendor
 			else:
-				amex_supplier = get_or_create_amex_supplier()
+				amex_supplier = context.get_amex_supplier()
 				credit_entry['party_type'] = 'Supplier'
 				credit_entry['party'] = amex_supplier
 		
@@ -111,29 +107,15 @@ def create_journal_entry_from_transaction(transaction_doc):
 		# Add debit entries - one per split, each with its own accounting class
 		# NO party on expense lines (vendor tracked on credit line)
 		# 
-		# Handle percentage splits carefully to avoid rounding errors:
-		# Calculate all splits except the last, then assign remainder to the last split
+		# Amounts come from the shared allocation engine (integer cents,
+		# largest remainder), so they always sum to the transaction amount
 		splits = list(transaction_doc.cost_center_splits)
-		total_amount = abs(transaction_doc.amount)
-		allocated_amount = 0
+		allocation = allocate_splits(transaction_doc.amount, splits)
+		error = get_allocation_error(transaction_doc.amount, allocation)
+		if error:
+			frappe.throw(error)
 		
-		for idx, split in enumerate(splits):
-			is_last_split = (idx == len(splits) - 1)
-			
-			if split.amount:
-				# Use explicit amount if provided
-				amount = flt(split.amount, 2)
-			elif split.percentage:
-				if is_last_split:
-					# Last split gets the remainder to avoid rounding errors
-					amount = flt(total_amount - allocated_amount, 2)
-				else:
-					amount = flt(total_amount * split.percentage / 100, 2)
-			else:
-				amount = 0
-			
-			allocated_amount += amount
-			
+		for split, amount in zip(splits, allocation.amounts):
 			split_accounting_class = getattr(split, 'accounting_class', None) if use_accounting_class else None
 			
 			debit_entry = {
@@ -165,7 +147,7 @@ def create_journal_entry_from_transaction(transaction_doc):
 				credit_entry['party_type'] = 'Supplier'
 				credit_entry['party'] = transaction_doc.vendor
 			else:
-				amex_supplier = get_or_create_amex_supplier()
+				amex_supplier = context.get_amex_supplier()
 				credit_entry['party_type'] = 'Supplier'
 				credit_entry['party'] = amex_supplier
 		
@@ -289,7 +271,7 @@ def get_journal_entry_remark(transaction_doc):
 	remark_parts.append(f"Description: {transaction_doc.description}")
 	
 	if transaction_doc.vendor:
-		vendor_name = frappe.db.get_value('Supplier', transaction_doc.vendor, 'supplier_name')
+		vendor_name = get_posting_context().get_supplier_name(transaction_doc.vendor)
 		remark_parts.append(f"Vendor: {vendor_name}")
 	
 	if transaction_doc.classification_notes:
@@ -308,10 +290,11 @@ def validate_journal_entry_data(transaction_doc):
 	Returns:
 		tuple: (bool, str) - (is_valid, error_message)
 	"""
-	settings = frappe.get_single('AMEX Integration Settings')
+	context = get_posting_context()
+	settings = context.settings
 	
 	# Check for AMEX card account (transaction-level takes priority)
-	amex_liability_account = transaction_doc.amex_card_account or settings.amex_liability_account
+	amex_liability_account = context.get_amex_liability_account(transaction_doc)
 	if not amex_liability_account:
 		return False, "AMEX Card Account not set on transaction and no default configured"
 	
@@ -325,11 +308,12 @@ def validate_journal_entry_data(transaction_doc):
 	if not transaction_doc.cost_center and not transaction_doc.cost_center_splits:
 		return False, "Cost Center is required"
 	
-	# Validate splits if present
+	# Validate splits if present (same engine as posting)
 	if transaction_doc.cost_center_splits:
-		total = sum([s.amount or 0 for s in transaction_doc.cost_center_splits])
-		if abs(total - transaction_doc.amount) > 0.01:
-			return False, f"Cost center split amounts ({total}) must equal transaction amount ({transaction_doc.amount})"
+		allocation = allocate_splits(transaction_doc.amount, transaction_doc.cost_center_splits)
+		error = get_allocation_error(transaction_doc.amount, allocation)
+		if error:
+			return False, error
 	
 	# Check for duplicates
 	if transaction_doc.is_duplicate:
@@ -171,9 +171,18 @@ def apply_ml_classification(transaction_doc, auto_accept=False):
 	transaction_doc.ml_predicted_cost_center = prediction.get('cost_center')
 	transaction_doc.ml_confidence_score = prediction.get('confidence', 0)
 	transaction_doc.ml_split_recommended = prediction.get('split_recommended', 0)
+	transaction_doc.ml_proposed_splits = json.dumps(prediction['proposed_splits']) if prediction.get('proposed_splits') else None
+	transaction_doc.ml_candidates = json.dumps(prediction['candidates']) if prediction.get('candidates') else None
+	transaction_doc.ml_model_version = prediction.get('model_version')
 	
-	# Auto-accept if confidence is high enough
-	if auto_accept and prediction.get('confidence', 0) >= settings.ml_auto_accept_threshold:
+	# Auto-accept if the joint confidence (probability that vendor, account
+	# and cost center are all right) is high enough. Only calibrated
+	# confidences are probabilities; older models' raw scores never skip review.
+	# A recommended split always goes to a reviewer
+	if (auto_accept
+			and prediction.get('calibrated')
+			and not prediction.get('split_recommended')
+			and prediction.get('confidence', 0) >= settings.ml_auto_accept_threshold):
 		# Find actual vendor/account/cost center if they exist
 		vendor = frappe.db.get_value('Supplier', {'supplier_name': prediction.get('vendor')}, 'name')
 		account = frappe.db.get_value('Account', prediction.get('expense_account'), 'name')
@@ -208,9 +217,116 @@ def parse_prediction_response(response):
 		'expense_account': response.get('expense_account'),
 		'cost_center': response.get('cost_center'),
 		'confidence': float(response.get('confidence', 0)),
-		'split_recommended': bool(response.get('split_recommended', False))
+		'vendor_confidence': float(response.get('vendor_confidence', 0)),
+		'account_confidence': float(response.get('account_confidence', 0)),
+		'cost_center_confidence': float(response.get('cost_center_confidence', 0)),
+		'calibrated': bool(response.get('calibrated', False)),
+		'candidates': response.get('candidates') or {},
+		'model_version': response.get('model_version'),
+		'split_recommended': bool(response.get('split_recommended', False)),
+		'split_probability': float(response.get('split_probability', 0)),
+		'proposed_splits': response.get('proposed_splits') or []
 	}
 	
 	return prediction
 
 
+# Candidate outputs and the doctype/field their values are matched on
+CANDIDATE_LINKS = (
+	('vendor', 'Supplier', 'supplier_name'),
+	('expense_account', 'Account', 'name'),
+	('cost_center', 'Cost Center', 'name')
+)
+
+
+def get_prediction_candidates(transaction_doc):
+	"""
+	ML candidates of a transaction, resolved to existing records
+	
+	The endpoint predicts labels from the training data (supplier names,
+	account and cost center names). Candidates without a matching, enabled
+	record are dropped, so every option can be applied as is.
+	
+	Args:
+		transaction_doc: AMEX Transaction document
+	
+	Returns:
+		dict: vendor/expense_account/cost_center -> [{'value', 'label', 'score'}, ...],
+		plus `split` -> [{'cost_center', 'percentage'}, ...] when a split is
+		recommended and all of its cost centers exist
+	"""
+	try:
+		candidates = json.loads(transaction_doc.get('ml_candidates') or '{}')
+	except ValueError:
+		return {}
+	
+	resolved = {}
+	
+	for output, doctype, match_field in CANDIDATE_LINKS:
+		options = [c for c in candidates.get(output) or [] if c.get('value')]
+		if not options:
+			continue
+		
+		values = [c['value'] for c in options]
+		fields = ['name', 'supplier_name'] if doctype == 'Supplier' else ['name']
+		filters = {match_field: ['in', values]}
+		if doctype == 'Supplier':
+			filters['disabled'] = 0
+		else:
+			filters.update({'is_group': 0, 'disabled': 0})
+		
+		records = {}
+		for record in frappe.get_all(doctype, filters=filters, fields=fields):
+			records.setdefault(record.get(match_field), record)
+		
+		resolved[output] = [
+			{
+				'value': records[c['value']].name,
+				'label': c['value'],
+				'score': c.get('score') or 0
+			}
+			for c in options
+			if c['value'] in records
+		]
+	
+	split = get_proposed_split(transaction_doc)
+	if split:
+		resolved['split'] = split
+	
+	return resolved
+
+
+def get_proposed_split(transaction_doc):
+	"""
+	The recommended split of a transaction, if every cost center in it exists
+	
+	Returns:
+		list: [{'cost_center', 'percentage'}, ...] or None
+	"""
+	if not transaction_doc.get('ml_split_recommended'):
+		return None
+	
+	try:
+		splits = json.loads(transaction_doc.get('ml_proposed_splits') or '[]')
+	except ValueError:
+		return None
+	
+	cost_centers = [split.get('cost_center') for split in splits]
+	if len(cost_centers) < 2 or not all(cost_centers):
+		return None
+	
+	existing = {
+		record.name
+		for record in frappe.get_all(
+			'Cost Center',
+			filters={'name': ['in', cost_centers], 'is_group': 0, 'disabled': 0},
+			fields=['name']
+		)
+	}
+	
+	if not existing.issuperset(cost_centers):
+		return None
+	
+	return [{'cost_center': split['cost_center'], 'percentage': split.get('percentage') or 0} for split in splits]
+
+
@@ -0,0 +1,123 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+"""
+Local stand-in for the Slack Web API
+
+Used to exercise the notification outbox without talking to Slack. Point the
+delivery worker at it by setting `amex_slack_api_url` in site config to
+`MockSlackServer.base_url`, e.g.:
+
+	with MockSlackServer() as slack:
+		frappe.conf.amex_slack_api_url = slack.base_url
+		slack.fail_next(2, status=503)
+		deliver_queued_notifications()
+		assert len(slack.messages) == 0
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockSlackServer:
+	"""Threaded HTTP server that records chat.postMessage calls"""
+
+	def __init__(self, host='127.0.0.1', port=0):
+		self.messages = []
+		self.requests = []
+		self._failures = []
+		self._lock = threading.Lock()
+		self._server = ThreadingHTTPServer((host, port), self._make_handler())
+		self._thread = None
+
+	@property
+	def base_url(self):
+		host, port = self._server.server_address[:2]
+		return f"http://{host}:{port}/api"
+
+	def start(self):
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self._server.shutdown()
+		self._server.server_close()
+		if self._thread:
+			self._thread.join()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	def fail_next(self, count=1, status=500, error=None, retry_after=None):
+		"""
+		Make the next `count` requests fail
+
+		Args:
+			count: Number of requests to fail
+			status: HTTP status to return (429 simulates rate limiting)
+			error: Slack error code to return with HTTP 200 instead of a status failure
+			retry_after: Retry-After header value for 429 responses
+		"""
+		with self._lock:
+			self._failures.extend([{
+				'status': 200 if error else status,
+				'error': error,
+				'retry_after': retry_after
+			}] * count)
+
+	def _next_failure(self):
+		with self._lock:
+			return self._failures.pop(0) if self._failures else None
+
+	def _make_handler(self):
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_POST(self):
+				length = int(self.headers.get('Content-Length') or 0)
+				body = self.rfile.read(length).decode() if length else ''
+
+				with server._lock:
+					server.requests.append({
+						'path': self.path,
+						'headers': dict(self.headers),
+						'body': body
+					})
+
+				failure = server._next_failure()
+
+				if failure and failure['status'] != 200:
+					self.send_response(failure['status'])
+					if failure['retry_after'] is not None:
+						self.send_header('Retry-After', str(failure['retry_after']))
+					self.end_headers()
+					return
+
+				if failure:
+					self._send_json({'ok': False, 'error': failure['error']})
+					return
+
+				message = json.loads(body or '{}')
+				with server._lock:
+					server.messages.append(message)
+					ts = f"{1700000000 + len(server.messages)}.000100"
+
+				self._send_json({'ok': True, 'channel': message.get('channel'), 'ts': ts})
+
+			def _send_json(self, data):
+				payload = json.dumps(data).encode()
+				self.send_response(200)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(payload)))
+				self.end_headers()
+				self.wfile.write(payload)
+
+			def log_message(self, format, *args):
+				pass
+
+		return Handler
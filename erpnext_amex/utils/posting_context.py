@@ -0,0 +1,88 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+from functools import lru_cache
+
+import frappe
+
+
+# Distinct accounts/suppliers remembered per request or job
+LOOKUP_CACHE_SIZE = 256
+
+
+class PostingContext:
+	"""
+	Reference data for validating and posting AMEX Transactions
+
+	Loaded lazily, once per request or background job (it lives on
+	frappe.local), so posting many transactions does not repeat the
+	settings, schema and master data lookups for each one.
+	"""
+
+	def __init__(self):
+		self._settings = None
+		self._has_accounting_class_field = None
+		self._amex_supplier = None
+
+		self.get_account_type = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._get_account_type)
+		self.get_supplier_name = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._get_supplier_name)
+
+	@property
+	def settings(self):
+		if self._settings is None:
+			self._settings = frappe.get_cached_doc('AMEX Integration Settings')
+		return self._settings
+
+	@property
+	def company(self):
+		return self.settings.default_company or frappe.defaults.get_user_default('Company')
+
+	@property
+	def has_accounting_class_field(self):
+		"""Whether Journal Entry Account has an accounting_class field"""
+		if self._has_accounting_class_field is None:
+			try:
+				self._has_accounting_class_field = bool(
+					frappe.db.exists('Custom Field', {
+						'dt': 'Journal Entry Account',
+						'fieldname': 'accounting_class'
+					}) or frappe.db.has_column('Journal Entry Account', 'accounting_class')
+				)
+			except Exception:
+				self._has_accounting_class_field = False
+		return self._has_accounting_class_field
+
+	def get_amex_liability_account(self, transaction_doc):
+		"""Transaction's card account, falling back to the settings default"""
+		return transaction_doc.amex_card_account or self.settings.amex_liability_account
+
+	def is_payable_receivable_account(self, account):
+		return self.get_account_type(account) in ('Payable', 'Receivable')
+
+	def get_amex_supplier(self):
+		"""Supplier used as party on liability lines when a transaction has no vendor"""
+		if self._amex_supplier is None:
+			from erpnext_amex.utils.journal_entry_creator import get_or_create_amex_supplier
+			self._amex_supplier = get_or_create_amex_supplier()
+		return self._amex_supplier
+
+	def _get_account_type(self, account):
+		return frappe.db.get_value('Account', account, 'account_type')
+
+	def _get_supplier_name(self, supplier):
+		return frappe.db.get_value('Supplier', supplier, 'supplier_name')
+
+
+def get_posting_context():
+	"""Get the PostingContext for the current request or job"""
+	context = getattr(frappe.local, 'amex_posting_context', None)
+
+	if context is None:
+		context = frappe.local.amex_posting_context = PostingContext()
+
+	return context
+
+
+def clear_posting_context():
+	"""Drop the current context, e.g. after settings or masters change mid-job"""
+	frappe.local.amex_posting_context = None
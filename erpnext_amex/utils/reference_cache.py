@@ -0,0 +1,127 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import frappe
+
+
+# Cached lists are dropped by version bump, the TTL only bounds stale keys
+CACHE_TTL = 6 * 60 * 60
+
+
+def get_cached_list(doctype, variant, builder):
+	"""
+	Get a reference list from the site cache, building it on a miss
+
+	Cache keys include a per-doctype version token, so bumping the version
+	invalidates every variant of that doctype's lists at once.
+
+	Args:
+		doctype: Source doctype whose changes invalidate the list
+		variant: Distinguishes lists built with different arguments
+		builder: Callable returning the list on a cache miss
+
+	Returns:
+		list: Cached or freshly built list
+	"""
+	key = f"amex_reference_list:{doctype}:{variant}:{get_cache_version(doctype)}"
+	data = frappe.cache().get_value(key)
+
+	if data is None:
+		data = builder()
+		frappe.cache().set_value(key, data, expires_in_sec=CACHE_TTL)
+
+	return data
+
+
+def get_permitted_list(doctype, variant, builder):
+	"""
+	Get a cached reference list, limited to rows the current user may see
+
+	The cached list is shared by every user, so builders must read all
+	rows (ignore_permissions=True); permissions are applied here on every
+	request.
+
+	Args:
+		doctype: Doctype of the list rows (each row has `name`)
+		variant: Distinguishes lists built with different arguments
+		builder: Callable returning the unfiltered list on a cache miss
+
+	Returns:
+		list: Rows of the cached list the user can read or select
+	"""
+	rows = get_cached_list(doctype, variant, builder)
+
+	if frappe.session.user == 'Administrator':
+		return rows
+
+	if not (frappe.has_permission(doctype, 'select') or frappe.has_permission(doctype, 'read')):
+		return []
+
+	if not has_record_restrictions(doctype):
+		return rows
+
+	permitted = set(frappe.get_list(doctype, pluck='name', limit_page_length=0))
+	return [row for row in rows if row.get('name') in permitted]
+
+
+def has_record_restrictions(doctype):
+	"""
+	Check whether the current user may see only some rows of a doctype
+
+	User permissions on any doctype count, since they also restrict rows
+	through link fields (e.g. a Company restricts its Accounts).
+	"""
+	if frappe.get_hooks('permission_query_conditions', {}).get(doctype):
+		return True
+
+	return bool(frappe.permissions.get_user_permissions(frappe.session.user))
+
+
+def get_cache_version(doctype):
+	"""Get the current cache version token for a doctype"""
+	return frappe.cache().get_value(get_version_key(doctype)) or bump_cache_version(doctype)
+
+
+def bump_cache_version(doctype):
+	"""Invalidate all cached lists for a doctype"""
+	version = frappe.generate_hash(length=10)
+	frappe.cache().set_value(get_version_key(doctype), version)
+	return version
+
+
+def get_version_key(doctype):
+	return f"amex_reference_version:{doctype}"
+
+
+def invalidate_reference_cache(doc, method=None):
+	"""doc_events handler for Cost Center, Account and Supplier changes"""
+	bump_cache_version(doc.doctype)
+
+
+def get_card_members():
+	"""Distinct card members across AMEX Transaction, sorted"""
+	return get_cached_list('AMEX Transaction', 'card_members', build_card_member_list)
+
+
+def build_card_member_list():
+	# Served from the (card_member, status) index
+	return frappe.db.sql_list("""
+		SELECT DISTINCT card_member
+		FROM `tabAMEX Transaction`
+		ORDER BY card_member
+	""")
+
+
+def get_card_members_version():
+	return get_cache_version('AMEX Transaction')
+
+
+def register_card_member(card_member):
+	"""
+	Invalidate the card member list when a new card member appears
+
+	The bump runs after commit so a concurrent rebuild cannot cache a list
+	without the new card member.
+	"""
+	if card_member and card_member not in get_card_members():
+		frappe.db.after_commit.add(lambda: bump_cache_version('AMEX Transaction'))
@@ -0,0 +1,104 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+"""
+Realtime row deltas for the AMEX Review page
+
+Transaction changes are collected per request and published after the
+transaction commits, as one `amex_review_update` event carrying compact
+rows. Review pages apply the rows in place instead of reloading the list.
+
+Events go to the AMEX Transaction doctype room, which only sessions with
+read permission on AMEX Transaction can join.
+"""
+
+import frappe
+
+
+REVIEW_UPDATE_EVENT = 'amex_review_update'
+
+REVIEW_UPDATE_DOCTYPE = 'AMEX Transaction'
+
+# Statuses shown on the review page; rows moving to any other status are
+# sent as removals
+REVIEW_STATUSES = ('Pending', 'Classified')
+
+# Columns sent for rows that stay on the review page
+DELTA_FIELDS = (
+	'transaction_date', 'description', 'card_member', 'amount', 'status',
+	'vendor', 'expense_account', 'cost_center', 'batch_id'
+)
+
+# Rows per realtime event, keeps bulk actions from producing one huge message
+ROWS_PER_EVENT = 200
+
+
+def get_row_delta(row):
+	"""
+	Build the compact delta for one transaction
+
+	Args:
+		row: AMEX Transaction document or dict with DELTA_FIELDS
+
+	Returns:
+		dict: {'name', 'removed': 1} for rows leaving the review page,
+		otherwise name plus DELTA_FIELDS
+	"""
+	if row.get('status') not in REVIEW_STATUSES:
+		return {'name': row.get('name'), 'status': row.get('status'), 'removed': 1}
+
+	delta = {'name': row.get('name')}
+	for field in DELTA_FIELDS:
+		delta[field] = row.get(field)
+
+	return delta
+
+
+def has_review_changes(doc):
+	"""Check whether a save changed anything the review page shows"""
+	before = doc.get_doc_before_save()
+
+	if not before:
+		return doc.status in REVIEW_STATUSES
+
+	return any(before.get(field) != doc.get(field) for field in DELTA_FIELDS)
+
+
+def queue_review_update(row):
+	"""
+	Queue a transaction's delta for publishing after commit
+
+	Deltas are keyed by name, so repeated saves of one transaction in a
+	request send only its final state.
+
+	Args:
+		row: AMEX Transaction document or dict with DELTA_FIELDS
+	"""
+	updates = getattr(frappe.local, 'amex_review_updates', None)
+
+	if updates is None:
+		updates = frappe.local.amex_review_updates = {}
+		frappe.db.after_commit.add(publish_review_updates)
+		frappe.db.after_rollback.add(discard_review_updates)
+
+	updates[row.get('name')] = get_row_delta(row)
+
+
+def publish_review_updates():
+	"""Publish queued deltas to review pages (runs after commit)"""
+	updates = getattr(frappe.local, 'amex_review_updates', None) or {}
+	frappe.local.amex_review_updates = None
+
+	rows = list(updates.values())
+
+	for start in range(0, len(rows), ROWS_PER_EVENT):
+		frappe.publish_realtime(
+			REVIEW_UPDATE_EVENT,
+			{'rows': rows[start:start + ROWS_PER_EVENT]},
+			doctype=REVIEW_UPDATE_DOCTYPE
+		)
+
+
+def discard_review_updates():
+	"""Drop queued deltas when the transaction rolls back"""
+	frappe.local.amex_review_updates = None
@@ -4,19 +4,43 @@
 import frappe
 import json
 import requests
-from frappe.utils import get_url
+from frappe.utils import get_url, now_datetime, add_to_date, get_datetime, time_diff_in_seconds
+
+
+OUTBOX_DOCTYPE = 'AMEX Notification Outbox'
+
+# Delivery worker tuning
+DELIVERY_BATCH_SIZE = 50
+MAX_DELIVERY_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+SLACK_TIMEOUT = (3.05, 10)
+
+# Slack errors that will never succeed on retry
+PERMANENT_SLACK_ERRORS = {
+	'channel_not_found',
+	'invalid_auth',
+	'not_authed',
+	'account_inactive',
+	'is_archived',
+	'user_not_found'
+}
 
 
 def send_classification_request(transaction_doc, user_slack_id=None):
 	"""
-	Send Slack notification requesting classification from cardholder
+	Queue a Slack notification requesting classification from cardholder
+	
+	The message is written to the AMEX Notification Outbox and delivered by
+	`deliver_queued_notifications`, so a slow or unavailable Slack API never
+	blocks the caller.
 	
 	Args:
 		transaction_doc: AMEX Transaction document
 		user_slack_id: Slack user ID (optional, will lookup if not provided)
 	
 	Returns:
-		bool: True if notification sent successfully
+		bool: True if notification was queued (or already queued)
 	"""
 	settings = frappe.get_single('AMEX Integration Settings')
 	
@@ -38,40 +62,277 @@ def send_classification_request(transaction_doc, user_slack_id=None):
 	# Format message
 	message = format_transaction_message(transaction_doc)
 	
+	enqueue_notification(
+		'classification_request',
+		transaction_doc.name,
+		user_slack_id,
+		{
+			'channel': user_slack_id,
+			'blocks': message['blocks'],
+			'text': message['text']
+		}
+	)
+	
+	return True
+
+
+def enqueue_notification(notification_type, transaction_name, channel, payload):
+	"""
+	Write a notification to the outbox
+	
+	The outbox row is keyed on (notification type, transaction, channel) so
+	repeated requests for the same notification are ignored.
+	
+	Args:
+		notification_type: Short identifier of the notification kind
+		transaction_name: AMEX Transaction ID
+		channel: Slack channel or user ID
+		payload: chat.postMessage body
+	
+	Returns:
+		str: Idempotency key of the outbox row
+	"""
+	idempotency_key = get_idempotency_key(notification_type, transaction_name, channel)
+	timestamp = now_datetime()
+	
+	frappe.get_doc({
+		'doctype': OUTBOX_DOCTYPE,
+		'idempotency_key': idempotency_key,
+		'notification_type': notification_type,
+		'transaction': transaction_name,
+		'channel': channel,
+		'status': 'Queued',
+		'attempts': 0,
+		'queued_at': timestamp,
+		'next_attempt_at': timestamp,
+		'payload': json.dumps(payload)
+	}).insert(ignore_permissions=True, ignore_if_duplicate=True)
+	
+	return idempotency_key
+
+
+def get_idempotency_key(notification_type, transaction_name, channel):
+	"""Build the outbox idempotency key for a notification"""
+	return f"{notification_type}:{transaction_name}:{channel}"
+
+
+def get_slack_api_url(method):
+	"""
+	Get the Slack Web API URL for a method
+	
+	The base URL can be overridden with `amex_slack_api_url` in site config,
+	e.g. to point delivery at `erpnext_amex.utils.mock_slack_server`.
+	"""
+	base_url = (frappe.conf.get('amex_slack_api_url') or 'https://slack.com/api').rstrip('/')
+	return f"{base_url}/{method}"
+
+
+def deliver_queued_notifications(batch_size=DELIVERY_BATCH_SIZE):
+	"""
+	Deliver due outbox notifications to Slack (scheduled job)
+	
+	Args:
+		batch_size: Maximum number of notifications to deliver per run
+	
+	Returns:
+		dict: Number of notifications sent, retried and failed
+	"""
+	summary = {'sent': 0, 'retried': 0, 'failed': 0}
+	
+	due = frappe.get_all(
+		OUTBOX_DOCTYPE,
+		filters={
+			'status': 'Queued',
+			'next_attempt_at': ['<=', now_datetime()]
+		},
+		fields=['name', 'transaction', 'payload', 'attempts', 'queued_at'],
+		order_by='next_attempt_at asc',
+		limit=batch_size
+	)
+	
+	if not due:
+		return summary
+	
+	settings = frappe.get_single('AMEX Integration Settings')
+	bot_token = settings.get_password('slack_bot_token', raise_exception=False)
+	
+	if not bot_token:
+		frappe.log_error("Slack bot token not configured", "Slack Notification Error")
+		return summary
+	
+	url = get_slack_api_url('chat.postMessage')
+	
+	with requests.Session() as session:
+		session.headers.update({
+			'Authorization': f'Bearer {bot_token}',
+			'Content-Type': 'application/json'
+		})
+		
+		for notification in due:
+			outcome = deliver_notification(session, url, notification)
+			summary[outcome] += 1
+			frappe.db.commit()
+	
+	return summary
+
+
+def deliver_notification(session, url, notification):
+	"""
+	Post a single outbox notification and record the outcome
+	
+	Args:
+		session: requests.Session with Slack auth headers
+		url: chat.postMessage URL
+		notification: Outbox row (name, transaction, payload, attempts, queued_at)
+	
+	Returns:
+		str: 'sent', 'retried' or 'failed'
+	"""
+	attempts = (notification.attempts or 0) + 1
+	retry_after = None
+	
 	try:
-		# Send Slack message
-		bot_token = settings.get_password('slack_bot_token')
+		response = session.post(url, data=notification.payload, timeout=SLACK_TIMEOUT)
 		
-		response = requests.post(
-			'https://slack.com/api/chat.postMessage',
-			headers={
-				'Authorization': f'Bearer {bot_token}',
-				'Content-Type': 'application/json'
-			},
-			json={
-				'channel': user_slack_id,
-				'blocks': message['blocks'],
-				'text': message['text']
-			}
-		)
+		if response.status_code == 429:
+			retry_after = int(response.headers.get('Retry-After') or 0)
+			raise SlackDeliveryError('ratelimited')
 		
 		response.raise_for_status()
 		result = response.json()
 		
-		if result.get('ok'):
+		if not result.get('ok'):
+			error = result.get('error') or 'unknown_error'
+			raise SlackDeliveryError(error, permanent=error in PERMANENT_SLACK_ERRORS)
+	
+	except Exception as e:
+		permanent = getattr(e, 'permanent', False)
+		
+		if permanent or attempts >= MAX_DELIVERY_ATTEMPTS:
+			frappe.db.set_value(OUTBOX_DOCTYPE, notification.name, {
+				'status': 'Failed',
+				'attempts': attempts,
+				'last_error': str(e)
+			}, update_modified=False)
+			frappe.log_error(f"Slack notification {notification.name} failed: {str(e)}", "Slack Notification Error")
+			return 'failed'
+		
+		frappe.db.set_value(OUTBOX_DOCTYPE, notification.name, {
+			'attempts': attempts,
+			'next_attempt_at': add_to_date(now_datetime(), seconds=get_backoff_delay(attempts, retry_after)),
+			'last_error': str(e)
+		}, update_modified=False)
+		return 'retried'
+	
+	sent_at = now_datetime()
+	frappe.db.set_value(OUTBOX_DOCTYPE, notification.name, {
+		'status': 'Sent',
+		'attempts': attempts,
+		'sent_at': sent_at,
+		'delivery_latency': time_diff_in_seconds(sent_at, get_datetime(notification.queued_at)),
+		'slack_ts': result.get('ts'),
+		'last_error': None
+	}, update_modified=False)
+	
+	# The message is out: commit Sent first, so nothing after this point
+	# can roll it back and have the next run post it again
+	frappe.db.commit()
+	
+	if notification.transaction:
+		try:
 			# Store Slack message timestamp for reference
-			transaction_doc.add_comment(
-				'Comment',
-				f"Slack notification sent. Message TS: {result.get('ts')}"
+			frappe.get_doc({
+				'doctype': 'Comment',
+				'comment_type': 'Comment',
+				'reference_doctype': 'AMEX Transaction',
+				'reference_name': notification.transaction,
+				'content': f"Slack notification sent. Message TS: {result.get('ts')}"
+			}).insert(ignore_permissions=True)
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(
+				f"Could not add Slack comment for {notification.transaction}: {str(e)}",
+				"Slack Notification Error"
 			)
-			return True
-		else:
-			frappe.log_error(f"Slack API error: {result.get('error')}", "Slack Notification Error")
-			return False
 	
-	except Exception as e:
-		frappe.log_error(f"Error sending Slack notification: {str(e)}", "Slack Notification Error")
-		return False
+	return 'sent'
+
+
+def get_backoff_delay(attempts, retry_after=None):
+	"""
+	Seconds to wait before the next delivery attempt
+	
+	Args:
+		attempts: Number of attempts made so far
+		retry_after: Delay requested by Slack (Retry-After header), if any
+	
+	Returns:
+		int: Delay in seconds
+	"""
+	delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+	return max(delay, retry_after or 0)
+
+
+class SlackDeliveryError(Exception):
+	"""Slack rejected a notification"""
+	
+	def __init__(self, error, permanent=False):
+		super().__init__(f"Slack API error: {error}")
+		self.permanent = permanent
+
+
+@frappe.whitelist()
+def get_delivery_metrics(hours=24):
+	"""
+	Get outbox delivery statistics
+	
+	Args:
+		hours: Look-back window for sent notifications
+	
+	Returns:
+		dict: Queue depth, failure count and delivery latency percentiles
+	"""
+	frappe.only_for(['System Manager', 'AMEX Transaction Manager'])
+	
+	since = add_to_date(now_datetime(), hours=-int(hours))
+	
+	counts = frappe.db.sql("""
+		SELECT status, COUNT(*) AS count
+		FROM `tabAMEX Notification Outbox`
+		GROUP BY status
+	""", as_dict=True)
+	
+	latencies = frappe.db.sql_list("""
+		SELECT delivery_latency
+		FROM `tabAMEX Notification Outbox`
+		WHERE status = 'Sent' AND sent_at >= %s
+		ORDER BY delivery_latency
+	""", since)
+	
+	oldest_queued = frappe.db.sql("""
+		SELECT MIN(queued_at)
+		FROM `tabAMEX Notification Outbox`
+		WHERE status = 'Queued'
+	""")[0][0]
+	
+	return {
+		'counts': {row.status: row.count for row in counts},
+		'sent_in_window': len(latencies),
+		'latency_avg': sum(latencies) / len(latencies) if latencies else None,
+		'latency_p50': get_percentile(latencies, 50),
+		'latency_p95': get_percentile(latencies, 95),
+		'latency_max': latencies[-1] if latencies else None,
+		'oldest_queued_age': time_diff_in_seconds(now_datetime(), oldest_queued) if oldest_queued else None
+	}
+
+
+def get_percentile(sorted_values, percentile):
+	"""Nearest-rank percentile of an ascending list"""
+	if not sorted_values:
+		return None
+	
+	index = max(0, int(round(percentile / 100 * len(sorted_values))) - 1)
+	return sorted_values[min(index, len(sorted_values) - 1)]
 
 
 def format_transaction_message(transaction_doc):
@@ -0,0 +1,156 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+"""
+Cost center split allocation
+
+One engine computes split amounts for validation, the review page preview
+and journal entry posting, so all three agree to the cent.
+
+Rules, per transaction (all arithmetic in integer cents of the absolute
+transaction amount):
+
+- A split with an explicit amount gets exactly that amount.
+- Percentage splits share `total * percentage / 100`. When the percentages
+  cover what the explicit amounts leave over (within 0.01% of the total,
+  e.g. 3 x 33.33%), that remainder is distributed exactly.
+- Cents are handed out with the largest-remainder method: every split gets
+  the floor of its share, then the leftover cents go to the splits with
+  the largest fractional parts (earlier splits win ties).
+- A split with neither amount nor percentage gets nothing.
+
+Any difference between the transaction total and the allocated sum is
+reported as `unallocated`; valid splits have none.
+
+The batch function is vectorized with numpy so thousands of transactions
+can be allocated in one call; this module does not depend on frappe.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+# Percentage shares within this fraction of the total (plus one cent)
+# are treated as covering the remainder exactly
+PERCENTAGE_TOLERANCE = 0.0001
+
+SplitAllocation = namedtuple('SplitAllocation', ['amounts', 'unallocated', 'total_percentage', 'has_amounts'])
+
+
+def to_cents(values):
+	"""Convert currency values to int64 cents (NaN/None count as 0)"""
+	values = np.asarray(values, dtype=np.float64)
+	return np.rint(np.nan_to_num(values) * 100).astype(np.int64)
+
+
+def allocate_batch(totals, parents, amounts, percentages):
+	"""
+	Allocate the splits of many transactions at once
+
+	Args:
+		totals: (n,) transaction amounts; the absolute value is allocated
+		parents: (m,) index into `totals` for each split; splits of one
+			transaction keep their relative order
+		amounts: (m,) explicit split amounts (0 or NaN when not set)
+		percentages: (m,) split percentages (0 or NaN when not set)
+
+	Returns:
+		tuple: (split_cents (m,) int64, unallocated_cents (n,) int64)
+	"""
+	total_cents = np.abs(to_cents(totals))
+	parents = np.asarray(parents, dtype=np.int64)
+	amount_cents = to_cents(amounts)
+	percentages = np.nan_to_num(np.asarray(percentages, dtype=np.float64))
+
+	n = len(total_cents)
+	m = len(parents)
+
+	if m == 0:
+		return np.zeros(0, dtype=np.int64), total_cents.copy()
+
+	has_amount = amount_cents != 0
+	percentages = np.where(has_amount, 0.0, percentages)
+
+	fixed = np.bincount(parents, weights=np.where(has_amount, amount_cents, 0), minlength=n)
+	quotas = total_cents[parents] * percentages / 100.0
+	quota_sum = np.bincount(parents, weights=quotas, minlength=n)
+
+	# Percentages that cover the remainder left by explicit amounts are
+	# scaled onto it exactly; otherwise they keep their face value
+	remaining = total_cents - np.rint(fixed)
+	covers_remaining = (quota_sum > 0) & (
+		np.abs(quota_sum - remaining) <= total_cents * PERCENTAGE_TOLERANCE + 1
+	)
+	target = np.where(covers_remaining, np.maximum(remaining, 0), np.rint(quota_sum))
+
+	scale = np.divide(target, quota_sum, out=np.zeros(n), where=quota_sum > 0)
+	shares = quotas * scale[parents]
+
+	# Largest remainder: floor every share, then give the leftover cents
+	# to the largest fractional parts within each transaction
+	floors = np.floor(shares)
+	fractions = shares - floors
+	floors = floors.astype(np.int64)
+	leftover = np.rint(target).astype(np.int64) - np.bincount(parents, weights=floors, minlength=n).astype(np.int64)
+
+	positions = np.arange(m)
+	order = np.lexsort((positions, -fractions, parents))
+	group_start = np.concatenate(([0], np.cumsum(np.bincount(parents, minlength=n))[:-1]))
+	rank = np.empty(m, dtype=np.int64)
+	rank[order] = positions - group_start[parents[order]]
+
+	percentage_cents = floors + (rank < leftover[parents]).astype(np.int64)
+	split_cents = np.where(has_amount, amount_cents, np.where(percentages > 0, percentage_cents, 0))
+
+	allocated = np.bincount(parents, weights=split_cents, minlength=n).astype(np.int64)
+
+	return split_cents, total_cents - allocated
+
+
+def allocate_splits(total, splits):
+	"""
+	Allocate one transaction's splits
+
+	Args:
+		total: Transaction amount
+		splits: Split rows (documents or dicts with amount/percentage)
+
+	Returns:
+		SplitAllocation: amounts (list of floats, one per split),
+		unallocated (float), total_percentage and has_amounts
+	"""
+	splits = list(splits or [])
+	amounts = [get_split_value(split, 'amount') for split in splits]
+	percentages = [get_split_value(split, 'percentage') for split in splits]
+
+	split_cents, unallocated = allocate_batch([total], [0] * len(splits), amounts, percentages)
+
+	return SplitAllocation(
+		amounts=[int(cents) / 100 for cents in split_cents],
+		unallocated=int(unallocated[0]) / 100,
+		total_percentage=sum(percentages),
+		has_amounts=any(amounts)
+	)
+
+
+def get_split_value(split, field):
+	value = split.get(field) if isinstance(split, dict) else getattr(split, field, None)
+	return float(value or 0)
+
+
+def get_allocation_error(total, allocation):
+	"""
+	Describe why an allocation is invalid
+
+	Returns:
+		str: Error message, or None if the splits allocate the full amount
+	"""
+	if not allocation.unallocated:
+		return None
+
+	if not allocation.has_amounts and allocation.total_percentage:
+		return f"Cost center split percentages ({allocation.total_percentage}%) must total 100%"
+
+	allocated = round(abs(total) - allocation.unallocated, 2)
+	return f"Cost center split amounts ({allocated}) must equal transaction amount ({abs(total)})"
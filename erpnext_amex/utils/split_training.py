@@ -0,0 +1,164 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+"""
+Training data for the split recommendation head
+
+Reviewed AMEX Transactions (with and without cost center splits) are
+exported in the shape the SageMaker endpoint receives, plus each
+transaction's splits as cost center / percentage pairs. Splits entered as
+amounts are converted to percentages with the posting allocation engine,
+so the proposals match what was actually posted.
+
+Run from the bench and upload the file to the `splits` training channel:
+
+	bench --site <site> execute erpnext_amex.utils.split_training.export_split_training_data \
+		--kwargs "{'output_file': 'splits.json'}"
+"""
+
+import json
+
+import numpy as np
+
+import frappe
+from frappe.utils import getdate
+
+from erpnext_amex.utils.split_allocation import allocate_batch
+
+
+# Transactions whose cost center allocation a reviewer has confirmed
+REVIEWED_STATUSES = ('Approved', 'Posted')
+
+# Parents per split query
+PARENT_CHUNK_SIZE = 1000
+
+TRANSACTION_FIELDS = ['name', 'description', 'amount', 'amex_category', 'transaction_date', 'card_member', 'cost_center']
+
+
+def get_split_training_records(from_date=None):
+	"""
+	Reviewed transactions with their cost center splits
+
+	Args:
+		from_date: Only transactions on or after this date (optional)
+
+	Returns:
+		list: dicts with vendor_description, amount, amex_category, date,
+		card_member, cost_center and splits ([{'cost_center', 'percentage'}],
+		empty for single cost center transactions). Transactions whose
+		splits do not allocate the full amount are left out.
+	"""
+	filters = {'status': ['in', REVIEWED_STATUSES]}
+	if from_date:
+		filters['transaction_date'] = ['>=', getdate(from_date)]
+
+	transactions = frappe.get_all(
+		'AMEX Transaction',
+		filters=filters,
+		fields=TRANSACTION_FIELDS,
+		order_by='transaction_date asc'
+	)
+
+	splits = get_transaction_splits([t.name for t in transactions])
+	percentages, valid = get_split_percentages(transactions, splits)
+
+	records = []
+	for transaction in transactions:
+		if not valid.get(transaction.name, True):
+			continue
+
+		records.append({
+			'vendor_description': transaction.description or '',
+			'amount': transaction.amount or 0,
+			'amex_category': transaction.amex_category or '',
+			'date': str(transaction.transaction_date or ''),
+			'card_member': transaction.card_member or '',
+			'cost_center': transaction.cost_center,
+			'splits': percentages.get(transaction.name, [])
+		})
+
+	return records
+
+
+def get_transaction_splits(names):
+	"""
+	Split rows of the given transactions, in row order
+
+	Returns:
+		dict: parent -> list of split rows (cost_center, amount, percentage)
+	"""
+	splits = {}
+
+	for start in range(0, len(names), PARENT_CHUNK_SIZE):
+		for split in frappe.get_all(
+			'AMEX Transaction Split',
+			filters={'parent': ['in', names[start:start + PARENT_CHUNK_SIZE]], 'parenttype': 'AMEX Transaction'},
+			fields=['parent', 'cost_center', 'amount', 'percentage'],
+			order_by='parent asc, idx asc'
+		):
+			splits.setdefault(split.parent, []).append(split)
+
+	return splits
+
+
+def get_split_percentages(transactions, splits):
+	"""
+	Allocate every transaction's splits in one batch and express them as percentages
+
+	Returns:
+		tuple: (parent -> [{'cost_center', 'percentage'}], parent -> whether
+		the splits allocate the full amount)
+	"""
+	amounts = {t.name: t.amount for t in transactions}
+	parents = [name for name in splits if amounts.get(name)]
+	rows = [split for name in parents for split in splits[name]]
+
+	if not rows:
+		return {}, {}
+
+	split_cents, unallocated = allocate_batch(
+		[amounts[name] for name in parents],
+		np.repeat(np.arange(len(parents)), [len(splits[name]) for name in parents]),
+		[split.amount for split in rows],
+		[split.percentage for split in rows]
+	)
+
+	percentages = {}
+	position = 0
+	for i, name in enumerate(parents):
+		count = len(splits[name])
+		cents = split_cents[position:position + count]
+		total = int(cents.sum())
+		percentages[name] = [
+			{'cost_center': split.cost_center, 'percentage': round(float(share) * 100 / total, 4)}
+			for split, share in zip(splits[name], cents)
+			if share
+		] if total else []
+		position += count
+
+	valid = {name: not int(unallocated[i]) for i, name in enumerate(parents)}
+
+	return percentages, valid
+
+
+def export_split_training_data(output_file='splits.json', from_date=None):
+	"""
+	Write split training records to a JSON file
+
+	Args:
+		output_file: Path of the JSON file (a list of records)
+		from_date: Only transactions on or after this date (optional)
+
+	Returns:
+		dict: file, transactions and split_transactions counts
+	"""
+	records = get_split_training_records(from_date)
+
+	with open(output_file, 'w') as f:
+		json.dump(records, f)
+
+	return {
+		'file': output_file,
+		'transactions': len(records),
+		'split_transactions': sum(1 for record in records if record['splits'])
+	}
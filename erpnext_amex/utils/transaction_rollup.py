@@ -0,0 +1,246 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+from collections import defaultdict
+
+import frappe
+from frappe.utils import now_datetime, add_to_date, get_datetime
+
+
+ROLLUP_DOCTYPE = 'AMEX Transaction Daily Rollup'
+WATERMARK_KEY = 'amex_transaction_rollup_watermark'
+
+# (transaction_date, card_member) keys recomputed per query; a missing
+# card member is keyed as ''
+KEY_CHUNK_SIZE = 500
+
+# Rollup rows inserted per statement
+INSERT_CHUNK_SIZE = 10000
+
+# Re-read rows modified shortly before the watermark, in case a transaction
+# committed after the previous run with an earlier `modified` timestamp
+WATERMARK_OVERLAP_MINUTES = 5
+
+ROLLUP_FIELDS = [
+	'name', 'rollup_date', 'card_member', 'status', 'cost_center',
+	'transaction_count', 'total_amount', 'median_age_days', 'refreshed_at',
+	'creation', 'modified', 'owner', 'modified_by', 'docstatus'
+]
+
+
+def update_transaction_rollups():
+	"""
+	Refresh rollups for transactions changed since the last run (scheduled job)
+
+	Each changed transaction's (date, card member) slice is recomputed in
+	full, so status and cost center moves within the slice are picked up
+	without tracking previous values.
+
+	Without a watermark (first run, or after it was cleared) all rollups
+	are rebuilt instead.
+
+	Returns:
+		int: Number of (date, card member) slices recomputed (rollup rows
+		written when rebuilding)
+	"""
+	watermark = frappe.db.get_global(WATERMARK_KEY)
+
+	if not watermark:
+		return rebuild_transaction_rollups()
+
+	changed = get_changed_slices(add_to_date(get_datetime(watermark), minutes=-WATERMARK_OVERLAP_MINUTES))
+
+	if not changed:
+		return 0
+
+	keys = [(row.transaction_date, row.card_member) for row in changed]
+
+	for start in range(0, len(keys), KEY_CHUNK_SIZE):
+		refresh_rollup_slices(keys[start:start + KEY_CHUNK_SIZE])
+		frappe.db.commit()
+
+	frappe.db.set_global(WATERMARK_KEY, str(max(row.last_modified for row in changed)))
+	frappe.db.commit()
+
+	return len(keys)
+
+
+def rebuild_transaction_rollups():
+	"""
+	Rebuild all rollups from scratch (scheduled weekly)
+
+	Picks up deleted transactions and date/card member edits, which the
+	incremental refresh cannot see. The whole table is aggregated in one
+	GROUP BY pass, and the delete and the rebuild commit together, so the
+	report shows the previous rollups until the new ones are complete.
+
+	Returns:
+		int: Number of rollup rows written
+	"""
+	last_modified = frappe.db.sql("SELECT MAX(modified) FROM `tabAMEX Transaction`")[0][0]
+	groups = get_rollup_groups()
+
+	frappe.db.sql(f"DELETE FROM `tab{ROLLUP_DOCTYPE}`")
+	insert_rollup_rows(groups)
+
+	frappe.db.set_global(WATERMARK_KEY, str(last_modified) if last_modified else None)
+	frappe.db.commit()
+
+	return len(groups)
+
+
+def get_changed_slices(since):
+	"""
+	(transaction_date, card_member) slices with transactions modified after `since`
+
+	Returns:
+		list: Rows with transaction_date, card_member ('' when missing)
+		and last_modified
+	"""
+	# Served from the `modified` index
+	return frappe.db.sql("""
+		SELECT transaction_date, IFNULL(card_member, '') AS card_member, MAX(modified) AS last_modified
+		FROM `tabAMEX Transaction`
+		WHERE modified > %(since)s
+		GROUP BY transaction_date, IFNULL(card_member, '')
+	""", {'since': since}, as_dict=True)
+
+
+def get_slice_condition(date_column, keys):
+	"""
+	WHERE condition matching (date, card member) slices
+
+	Written against the plain columns, so the (date, card_member) indexes
+	of both tables are used: named card members as a tuple IN, missing
+	ones (NULL or '') by date.
+
+	Args:
+		date_column: transaction_date or rollup_date
+		keys: List of (date, card_member) tuples, card_member '' when missing
+
+	Returns:
+		tuple: (condition, values)
+	"""
+	named = [(date, card_member) for date, card_member in keys if card_member]
+	unnamed = sorted({date for date, card_member in keys if not card_member})
+
+	conditions = []
+	values = []
+
+	if named:
+		conditions.append(f"({date_column}, card_member) IN ({', '.join(['(%s, %s)'] * len(named))})")
+		values.extend(value for key in named for value in key)
+
+	if unnamed:
+		conditions.append(
+			f"({date_column} IN ({', '.join(['%s'] * len(unnamed))}) AND IFNULL(card_member, '') = '')"
+		)
+		values.extend(unnamed)
+
+	return " OR ".join(conditions), values
+
+
+def refresh_rollup_slices(keys):
+	"""
+	Recompute rollup rows for a set of (transaction_date, card_member) slices
+
+	Args:
+		keys: List of (transaction_date, card_member) tuples, card_member
+			'' for transactions without one
+	"""
+	if not keys:
+		return
+
+	condition, values = get_slice_condition('transaction_date', keys)
+	groups = get_rollup_groups(condition, values)
+
+	rollup_condition, rollup_values = get_slice_condition('rollup_date', keys)
+	frappe.db.sql(f"""
+		DELETE FROM `tab{ROLLUP_DOCTYPE}`
+		WHERE {rollup_condition}
+	""", rollup_values)
+
+	insert_rollup_rows(groups)
+
+
+def get_rollup_groups(condition=None, values=None):
+	"""
+	Aggregate transactions into rollup groups in one GROUP BY pass
+
+	Rows are grouped down to their age in days, so the median age of each
+	(date, card member, status, cost center) group comes from the age
+	histogram rather than one row per transaction.
+
+	Args:
+		condition: Optional WHERE condition on `tabAMEX Transaction`
+		values: Values for the condition
+
+	Returns:
+		dict: (date, card_member, status, cost_center) -> {'count',
+		'amount', 'ages': [(age_days, count)]}
+	"""
+	where = f"WHERE {condition}" if condition else ""
+
+	# Age is measured up to the point the transaction reached its current status
+	rows = frappe.db.sql(f"""
+		SELECT
+			transaction_date, IFNULL(card_member, '') AS card_member, status,
+			IFNULL(cost_center, '') AS cost_center,
+			GREATEST(IFNULL(DATEDIFF(
+				CASE
+					WHEN status = 'Posted' THEN IFNULL(posted_date, modified)
+					WHEN status IN ('Classified', 'Approved') THEN IFNULL(classification_date, modified)
+					ELSE modified
+				END,
+				transaction_date
+			), 0), 0) AS age_days,
+			COUNT(*) AS transaction_count,
+			SUM(IFNULL(amount, 0)) AS total_amount
+		FROM `tabAMEX Transaction`
+		{where}
+		GROUP BY transaction_date, IFNULL(card_member, ''), status, IFNULL(cost_center, ''), age_days
+	""", values or [], as_dict=True)
+
+	groups = defaultdict(lambda: {'count': 0, 'amount': 0.0, 'ages': []})
+
+	for row in rows:
+		group = groups[(row.transaction_date, row.card_member, row.status, row.cost_center)]
+		group['count'] += row.transaction_count
+		group['amount'] += float(row.total_amount or 0)
+		group['ages'].append((row.age_days, row.transaction_count))
+
+	return groups
+
+
+def get_histogram_median(histogram):
+	"""Median of (value, count) pairs, as statistics.median of the expanded values"""
+	histogram = sorted(histogram)
+	total = sum(count for _, count in histogram)
+
+	def value_at(position):
+		for value, count in histogram:
+			if position < count:
+				return value
+			position -= count
+
+	if total % 2:
+		return value_at(total // 2)
+	return (value_at(total // 2 - 1) + value_at(total // 2)) / 2
+
+
+def insert_rollup_rows(groups):
+	"""Insert rollup rows for aggregated groups"""
+	timestamp = now_datetime()
+	user = frappe.session.user
+
+	values = [
+		(
+			frappe.generate_hash(length=12), rollup_date, card_member or None, status, cost_center or None,
+			group['count'], round(group['amount'], 2), get_histogram_median(group['ages']), timestamp,
+			timestamp, timestamp, user, user, 0
+		)
+		for (rollup_date, card_member, status, cost_center), group in groups.items()
+	]
+
+	if values:
+		frappe.db.bulk_insert(ROLLUP_DOCTYPE, ROLLUP_FIELDS, values, chunk_size=INSERT_CHUNK_SIZE)
@@ -0,0 +1,151 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import re
+
+import frappe
+from frappe.utils import cint
+
+
+SEARCH_INDEX_NAME = 'amex_transaction_search'
+SEARCH_COLUMNS = ('description', 'statement_description', 'extended_details')
+
+# InnoDB does not index words shorter than innodb_ft_min_token_size
+# (3 by default); shorter tokens are matched with LIKE instead
+MIN_TOKEN_LENGTH = 3
+
+MAX_SEARCH_RESULTS = 200
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def add_search_index():
+	"""
+	Create the FULLTEXT index used for keyword search, if missing
+
+	`frappe.db.add_index` only creates regular indexes, so the FULLTEXT
+	index is added with plain DDL. Called from AMEX Transaction's
+	on_doctype_update.
+	"""
+	exists = frappe.db.sql("""
+		SHOW INDEX FROM `tabAMEX Transaction`
+		WHERE Key_name = %s
+	""", SEARCH_INDEX_NAME)
+
+	if exists:
+		return
+
+	columns = ", ".join(f"`{column}`" for column in SEARCH_COLUMNS)
+	frappe.db.sql_ddl(f"""
+		ALTER TABLE `tabAMEX Transaction`
+		ADD FULLTEXT INDEX `{SEARCH_INDEX_NAME}` ({columns})
+	""")
+
+
+def get_search_tokens(keyword):
+	"""
+	Split a keyword string into full-text and short tokens
+
+	Only word characters are kept, so boolean-mode operators typed by the
+	user cannot change the query.
+
+	Returns:
+		tuple: (fulltext_tokens, short_tokens)
+	"""
+	tokens = TOKEN_PATTERN.findall(str(keyword or '').lower())
+
+	fulltext_tokens = [token for token in tokens if len(token) >= MIN_TOKEN_LENGTH]
+	short_tokens = [token for token in tokens if len(token) < MIN_TOKEN_LENGTH]
+
+	return fulltext_tokens, short_tokens
+
+
+def escape_like(value):
+	"""Escape LIKE wildcards in user input"""
+	return str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def get_search_condition(keyword, alias=''):
+	"""
+	Build a WHERE condition matching every token of a keyword string
+
+	Tokens long enough to be indexed go through MATCH ... AGAINST in
+	boolean mode as required prefix terms (`+amazon*`), so "amaz" finds
+	"AMAZON MKTPLACE". Short tokens fall back to LIKE on the same columns;
+	when both are present the FULLTEXT match narrows the rows first.
+
+	Args:
+		keyword: User-entered search text
+		alias: Optional table alias prefix for the columns
+
+	Returns:
+		tuple: (condition, values, relevance) where relevance is a MATCH
+		expression for ranking, or None if only short tokens were given.
+		condition is None when the keyword has no searchable tokens.
+	"""
+	fulltext_tokens, short_tokens = get_search_tokens(keyword)
+	prefix = f"{alias}." if alias else ""
+	columns = ", ".join(f"{prefix}`{column}`" for column in SEARCH_COLUMNS)
+
+	conditions = []
+	values = {}
+	relevance = None
+
+	if fulltext_tokens:
+		relevance = f"MATCH({columns}) AGAINST (%(search_query)s IN BOOLEAN MODE)"
+		conditions.append(relevance)
+		values['search_query'] = " ".join(f"+{token}*" for token in fulltext_tokens)
+
+	for i, token in enumerate(short_tokens):
+		key = f"search_token_{i}"
+		conditions.append("({})".format(" OR ".join(
+			f"{prefix}`{column}` LIKE %({key})s" for column in SEARCH_COLUMNS
+		)))
+		# `_` is a word character, so tokens can carry LIKE wildcards
+		values[key] = f"%{escape_like(token)}%"
+
+	if not conditions:
+		return None, {}, None
+
+	return " AND ".join(conditions), values, relevance
+
+
+@frappe.whitelist()
+def search_transactions(keyword, status=None, limit=50):
+	"""
+	Keyword search over AMEX Transactions, best matches first
+
+	Args:
+		keyword: Search text
+		status: Optional status (or list of statuses) to restrict to
+		limit: Maximum number of rows (capped at MAX_SEARCH_RESULTS)
+
+	Returns:
+		list: Transactions with a `relevance` score (0 for rows matched by
+		short tokens only), ordered by relevance then date
+	"""
+	condition, values, relevance = get_search_condition(keyword)
+
+	if not condition:
+		return []
+
+	conditions = [condition]
+
+	if status:
+		if isinstance(status, str) and status.startswith('['):
+			status = frappe.parse_json(status)
+		values['status'] = tuple(status) if isinstance(status, (list, tuple)) else (status,)
+		conditions.append("status IN %(status)s")
+
+	values['limit'] = max(1, min(cint(limit) or 50, MAX_SEARCH_RESULTS))
+
+	return frappe.db.sql(f"""
+		SELECT
+			name, transaction_date, description, statement_description,
+			card_member, amount, status,
+			{relevance or '0'} AS relevance
+		FROM `tabAMEX Transaction`
+		WHERE {" AND ".join(conditions)}
+		ORDER BY relevance DESC, transaction_date DESC, name DESC
+		LIMIT %(limit)s
+	""", values, as_dict=True)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Confidence calibration for AMEX classification
+
+A RandomForest's top-class probability is not the probability that the
+prediction is right. Calibrators are fitted on a held-out slice of the
+training period (later than the rows the forest was fitted on) and map:
+
+- each output's top-class probability to P(that output is correct)
+- the product of the calibrated per-output confidences to P(vendor,
+  account and cost center are all correct), the joint confidence used to
+  auto-accept predictions
+
+Isotonic regression is used when there are enough calibration rows,
+otherwise Platt scaling (a one-feature logistic regression).
+"""
+
+import numpy as np
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+
+
+OUTPUTS = ('vendor', 'account', 'cost_center')
+
+# Below this many calibration rows isotonic regression overfits; use Platt
+ISOTONIC_MIN_SAMPLES = 1000
+
+CALIBRATION_BINS = 10
+
+
+class ConfidenceCalibrator:
+	"""Map a raw confidence score to the probability of being correct"""
+
+	def __init__(self, method=None):
+		"""
+		Args:
+			method: 'isotonic', 'platt', or None to choose by sample count
+		"""
+		self.method = method
+		self.estimator = None
+		self.constant = None
+
+	def fit(self, confidence, correct):
+		confidence = np.asarray(confidence, dtype=np.float64)
+		correct = np.asarray(correct, dtype=bool)
+
+		if self.method is None:
+			self.method = 'isotonic' if len(confidence) >= ISOTONIC_MIN_SAMPLES else 'platt'
+
+		# Logistic regression needs both classes; with one, the rate is the answer
+		if len(np.unique(correct)) < 2:
+			self.constant = float(correct.mean()) if len(correct) else 0.0
+			return self
+
+		if self.method == 'isotonic':
+			self.estimator = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+			self.estimator.fit(confidence, correct)
+		else:
+			self.estimator = LogisticRegression()
+			self.estimator.fit(confidence.reshape(-1, 1), correct)
+
+		return self
+
+	def predict(self, confidence):
+		confidence = np.asarray(confidence, dtype=np.float64)
+
+		if self.constant is not None:
+			return np.full(len(confidence), self.constant)
+
+		if self.method == 'isotonic':
+			return self.estimator.predict(confidence)
+
+		return self.estimator.predict_proba(confidence.reshape(-1, 1))[:, 1]
+
+
+class ModelCalibration:
+	"""Per-output and joint calibrators for AMEXClassificationModel"""
+
+	def __init__(self, method=None):
+		self.method = method
+		self.outputs = {}
+		self.joint = None
+
+	def fit(self, top_probabilities, correct):
+		"""
+		Args:
+			top_probabilities: (n, outputs) raw top-class probability per output
+			correct: (n, outputs) whether each output's prediction was right
+		"""
+		top_probabilities = np.asarray(top_probabilities)
+		correct = np.asarray(correct, dtype=bool)
+
+		for j, output in enumerate(OUTPUTS):
+			self.outputs[output] = ConfidenceCalibrator(self.method).fit(top_probabilities[:, j], correct[:, j])
+
+		self.joint = ConfidenceCalibrator(self.method).fit(
+			self.get_output_confidence(top_probabilities).prod(axis=1),
+			correct.all(axis=1)
+		)
+
+		return self
+
+	def get_output_confidence(self, top_probabilities):
+		"""Calibrated per-output confidence, (n, outputs)"""
+		top_probabilities = np.asarray(top_probabilities)
+		return np.column_stack([
+			self.outputs[output].predict(top_probabilities[:, j])
+			for j, output in enumerate(OUTPUTS)
+		])
+
+	def get_joint_confidence(self, output_confidence):
+		"""
+		Calibrated probability that every output is correct
+
+		The joint calibrator is fitted separately and can come out above a
+		per-output confidence; all outputs correct is never more likely than
+		any one of them, so it is capped at the lowest output confidence.
+		"""
+		output_confidence = np.asarray(output_confidence)
+		joint = self.joint.predict(output_confidence.prod(axis=1))
+		return np.minimum(joint, output_confidence.min(axis=1))
+
+
+def expected_calibration_error(confidence, correct, bins=CALIBRATION_BINS):
+	"""Mean |accuracy - confidence| over equal-width confidence bins, weighted by bin size"""
+	confidence = np.asarray(confidence, dtype=np.float64)
+	bin_index = np.minimum((confidence * bins).astype(int), bins - 1)
+	confidence_sum = np.bincount(bin_index, weights=confidence, minlength=bins)
+	correct_sum = np.bincount(bin_index, weights=np.asarray(correct, dtype=np.float64), minlength=bins)
+
+	return float(np.abs(correct_sum - confidence_sum).sum() / max(len(confidence), 1))
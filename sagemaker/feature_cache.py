@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Feature cache for AMEX classification training
+
+Feature extraction (fitting the TF-IDF vectorizers and label encoders and
+transforming every description) depends only on the training data and the
+feature configuration, not on model hyperparameters. Its output is stored
+under a key derived from both:
+
+	<cache_dir>/<key>/
+		manifest.json        key inputs, matrix shape, creation time
+		transformers.joblib  fitted vectorizers and label encoders
+		X.data.npy, X.indices.npy, X.indptr.npy   CSR feature matrix
+		y.npy, weights.npy   labels and sample weights
+		dates.npy            transaction dates (datetime64[D], NaT if unknown)
+
+Arrays are loaded memory-mapped, so repeat runs (and parallel workers)
+share the page cache instead of holding private copies.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+
+# Bump when prepare_features/prepare_labels change in a way the feature
+# config does not capture
+FEATURE_VERSION = 2
+
+FeatureArrays = namedtuple('FeatureArrays', ['X', 'y', 'weights', 'dates'])
+
+# Fitted attributes of AMEXClassificationModel stored with the features
+TRANSFORMER_ATTRIBUTES = (
+	'vendor_encoder', 'account_encoder', 'cost_center_encoder',
+	'description_vectorizer', 'category_vectorizer'
+)
+
+DATA_FILE_EXTENSIONS = ('.parquet', '.json')
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_training_data(path):
+	"""
+	Content hash of a training data file or dataset directory
+
+	Every data file is hashed with its path relative to `path`, in sorted
+	order, so renaming a month partition changes the key but the
+	location of the dataset does not.
+	"""
+	digest = hashlib.sha256()
+
+	if os.path.isdir(path):
+		files = sorted(
+			os.path.relpath(os.path.join(root, name), path)
+			for root, _, names in os.walk(path)
+			for name in names
+			if name.endswith(DATA_FILE_EXTENSIONS)
+		)
+	else:
+		files = [os.path.basename(path)]
+		path = os.path.dirname(path)
+
+	for name in files:
+		digest.update(name.replace(os.sep, '/').encode())
+		digest.update(b'\0')
+		with open(os.path.join(path, name), 'rb') as f:
+			for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+				digest.update(chunk)
+		digest.update(b'\0')
+
+	return digest.hexdigest()
+
+
+def get_cache_key(data_hash, feature_config):
+	"""Key for a data hash and feature config (any JSON-serializable dict)"""
+	config = json.dumps(
+		{'version': FEATURE_VERSION, 'config': feature_config},
+		sort_keys=True,
+		default=str
+	)
+	return hashlib.sha256(f"{data_hash}:{config}".encode()).hexdigest()[:32]
+
+
+class FeatureCache:
+	"""Extracted training features stored on disk by cache key"""
+
+	def __init__(self, cache_dir):
+		self.cache_dir = cache_dir
+
+	def get_path(self, key):
+		return os.path.join(self.cache_dir, key)
+
+	def load(self, key, model):
+		"""
+		Load cached features and restore the model's fitted transformers
+
+		Args:
+			key: Cache key from `get_cache_key`
+			model: AMEXClassificationModel to restore vectorizers/encoders on
+
+		Returns:
+			FeatureArrays: or None on a miss
+		"""
+		path = self.get_path(key)
+		manifest_file = os.path.join(path, 'manifest.json')
+
+		if not os.path.exists(manifest_file):
+			return None
+
+		transformers = joblib.load(os.path.join(path, 'transformers.joblib'))
+		for attribute in TRANSFORMER_ATTRIBUTES:
+			setattr(model, attribute, transformers[attribute])
+
+		return load_feature_arrays(path)
+
+	def save(self, key, model, features, key_inputs=None):
+		"""
+		Store features and the model's fitted transformers under `key`
+
+		Args:
+			key: Cache key from `get_cache_key`
+			model: AMEXClassificationModel with fitted vectorizers/encoders
+			features: FeatureArrays (weights may be None)
+			key_inputs: What the key was derived from, kept in the manifest
+
+		Written to a temporary directory and renamed into place, so a
+		concurrent or interrupted run never sees a partial entry.
+
+		Returns:
+			str: Path of the cache entry
+		"""
+		os.makedirs(self.cache_dir, exist_ok=True)
+		path = self.get_path(key)
+		staging = tempfile.mkdtemp(prefix=f".{key}.", dir=self.cache_dir)
+
+		try:
+			X = sparse.csr_matrix(features.X)
+			save_csr_matrix(staging, 'X', X)
+			np.save(os.path.join(staging, 'y.npy'), np.asarray(features.y))
+			np.save(os.path.join(staging, 'dates.npy'), np.asarray(features.dates, dtype='datetime64[D]'))
+			if features.weights is not None:
+				np.save(os.path.join(staging, 'weights.npy'), np.asarray(features.weights))
+
+			joblib.dump(
+				{attribute: getattr(model, attribute) for attribute in TRANSFORMER_ATTRIBUTES},
+				os.path.join(staging, 'transformers.joblib')
+			)
+
+			with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+				json.dump({
+					'key': key,
+					'inputs': key_inputs or {},
+					'shape': list(X.shape),
+					'has_weights': features.weights is not None,
+					'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+				}, f, indent=2, default=str)
+
+			try:
+				os.rename(staging, path)
+			except OSError:
+				# Another run stored the same key first; its entry is identical
+				shutil.rmtree(staging, ignore_errors=True)
+		except Exception:
+			shutil.rmtree(staging, ignore_errors=True)
+			raise
+
+		return path
+
+
+def load_feature_arrays(path):
+	"""
+	Memory-map the arrays of a cache entry
+
+	Args:
+		path: Cache entry directory (`FeatureCache.get_path`)
+
+	Returns:
+		FeatureArrays: X as a csr_matrix; weights None if not stored
+	"""
+	with open(os.path.join(path, 'manifest.json'), 'r') as f:
+		manifest = json.load(f)
+
+	X = load_csr_matrix(path, 'X', manifest['shape'])
+	y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+	dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+	weights = None
+	if manifest['has_weights']:
+		weights = np.load(os.path.join(path, 'weights.npy'), mmap_mode='r')
+
+	return FeatureArrays(X, y, weights, dates)
+
+
+def save_csr_matrix(path, name, matrix):
+	for part in ('data', 'indices', 'indptr'):
+		np.save(os.path.join(path, f"{name}.{part}.npy"), getattr(matrix, part))
+
+
+def load_csr_matrix(path, name, shape):
+	"""Rebuild a CSR matrix over memory-mapped component arrays"""
+	data, indices, indptr = (
+		np.load(os.path.join(path, f"{name}.{part}.npy"), mmap_mode='r')
+		for part in ('data', 'indices', 'indptr')
+	)
+	return sparse.csr_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
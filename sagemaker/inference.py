@@ -13,6 +13,15 @@ import pandas as pd
 from train import AMEXClassificationModel
 
 
+# Candidates returned per output (vendor, expense account, cost center)
+TOP_K = int(os.environ.get('AMEX_TOP_K', 3))
+
+# Labels that stand for "no value" in the training data, never offered
+EMPTY_LABELS = ('Unknown', '')
+
+CANDIDATE_OUTPUTS = (('vendor', 'vendor'), ('account', 'expense_account'), ('cost_center', 'cost_center'))
+
+
 def model_fn(model_dir):
 	"""
 	Load the model for inference
@@ -25,6 +34,10 @@ def model_fn(model_dir):
 	"""
 	print(f"Loading model from {model_dir}")
 	model = AMEXClassificationModel.load_model(model_dir)
+	
+	# Read the forest in the background; the first prediction waits for it
+	model.prefetch()
+	print(f"Model version: {model.model_version or 'unversioned'}")
 	return model
 
 
@@ -66,27 +79,72 @@ def predict_fn(input_data, model):
 	# Prepare features
 	X = model.prepare_features(input_data, fit=False)
 	
-	# Make predictions
-	predictions, probabilities = model.predict(X)
+	# Make predictions (one predict_proba shared by predictions and candidates;
+	# one extra candidate per output covers a dropped "Unknown")
+	output_probabilities = model.predict_proba(X)
+	predictions, probabilities = model.predict(X, output_probabilities)
+	candidates = model.predict_candidates(output_probabilities, TOP_K + 1)
+	
+	# Split head: same features, same request (None for models without one)
+	splits = model.predict_splits(X)
 	
 	# Decode predictions
 	decoded = model.decode_predictions(predictions)
 	
-	# Format output
+	# Format output: `confidence` is the (calibrated) probability that vendor,
+	# account and cost center are all correct, used for auto-accept
+	output_confidence = probabilities['output_confidence']
+	
 	results = []
 	for i in range(len(input_data)):
 		result = {
 			'vendor': decoded['vendor'][i],
 			'expense_account': decoded['account'][i],
 			'cost_center': decoded['cost_center'][i],
-			'confidence': float(probabilities['confidence'][i]) if probabilities else 0.5,
-			'split_recommended': False  # TODO: Add split recommendation logic
+			'confidence': float(probabilities['confidence'][i]),
+			'vendor_confidence': float(output_confidence[i, 0]),
+			'account_confidence': float(output_confidence[i, 1]),
+			'cost_center_confidence': float(output_confidence[i, 2]),
+			'calibrated': probabilities['calibrated'],
+			'candidates': get_row_candidates(candidates, i),
+			'model_version': model.model_version,
+			'split_recommended': False,
+			'split_probability': 0.0,
+			'proposed_splits': []
 		}
+		
+		if splits is not None:
+			split_probability, recommended, proposed_splits = splits
+			result['split_recommended'] = bool(recommended[i])
+			result['split_probability'] = round(float(split_probability[i]), 4)
+			result['proposed_splits'] = proposed_splits[i]
+		
 		results.append(result)
 	
 	return results
 
 
+def get_row_candidates(candidates, i, k=TOP_K):
+	"""
+	Top-k candidates of one transaction, per output
+	
+	Returns:
+		dict: vendor/expense_account/cost_center -> [{'value', 'score'}, ...],
+		best first; score is the forest's class probability
+	"""
+	row = {}
+	
+	for output, key in CANDIDATE_OUTPUTS:
+		labels, scores = candidates[output]
+		row[key] = [
+			{'value': str(label), 'score': round(float(score), 4)}
+			for label, score in zip(labels[i], scores[i])
+			if score > 0 and label not in EMPTY_LABELS
+		][:k]
+	
+	return row
+
+
 def output_fn(predictions, content_type='application/json'):
 	"""
 	Format predictions for output
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Versioned model artifact bundle
+
+A trained AMEXClassificationModel is saved as one directory (packed into
+model.tar.gz by SageMaker):
+
+	<model_dir>/
+		manifest.json            format, model_version, feature config,
+		                         label sets, metrics and per-component
+		                         file, size, compression and sha256
+		components/<name>.joblib one joblib file per component
+
+Components are loaded on first use and verified against the manifest
+checksum before unpickling. Unpickling reads a component in full (sklearn
+copies every tree's node arrays into its own buffers), so compression only
+trades file size for decompression time; compare the time to the first
+prediction with benchmarks/model_bundle.py.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+
+
+BUNDLE_FORMAT = 'amex-classifier-bundle'
+BUNDLE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+COMPONENTS_DIR = 'components'
+
+# joblib compress argument per choice
+COMPRESSION_CHOICES = {
+	'none': 0,
+	'zlib': ('zlib', 3),
+	'lz4': ('lz4', 3),
+	'xz': ('xz', 3)
+}
+
+# Module each compression needs beyond the standard library
+COMPRESSION_MODULES = {
+	'lz4': 'lz4'
+}
+
+# Fastest first prediction after a cold start (benchmarks/model_bundle.py)
+DEFAULT_COMPRESSION = 'none'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ModelBundleError(Exception):
+	"""Bundle is missing, of an unknown format or fails its checksum"""
+
+
+def file_sha256(path):
+	digest = hashlib.sha256()
+	with open(path, 'rb') as f:
+		for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def check_compression(compression):
+	"""
+	Raise ModelBundleError unless `compression` can be written here
+
+	Called before training, so a bad choice fails before the run rather
+	than when the bundle is saved.
+	"""
+	if compression not in COMPRESSION_CHOICES:
+		raise ModelBundleError(f"Unknown compression {compression!r}, choose from {', '.join(COMPRESSION_CHOICES)}")
+
+	module = COMPRESSION_MODULES.get(compression)
+	if module:
+		try:
+			__import__(module)
+		except ImportError:
+			raise ModelBundleError(f"Compression {compression!r} needs the {module} package (pip install {module})")
+
+
+def is_bundle(model_dir):
+	return os.path.exists(os.path.join(model_dir, MANIFEST_FILE))
+
+
+def write_bundle(model_dir, components, metadata=None, compression=DEFAULT_COMPRESSION):
+	"""
+	Write components and their manifest
+
+	Args:
+		model_dir: Output directory
+		components: dict of component name -> object to pickle
+		metadata: JSON-serializable entries added to the manifest
+			(feature_config, labels, metrics, ...)
+		compression: Key of COMPRESSION_CHOICES
+
+	Returns:
+		dict: The manifest, including the new model_version
+	"""
+	check_compression(compression)
+
+	os.makedirs(os.path.join(model_dir, COMPONENTS_DIR), exist_ok=True)
+
+	entries = {}
+	for name, component in components.items():
+		relative_path = f"{COMPONENTS_DIR}/{name}.joblib"
+		path = os.path.join(model_dir, relative_path)
+		joblib.dump(component, path, compress=COMPRESSION_CHOICES[compression])
+
+		entries[name] = {
+			'file': relative_path,
+			'bytes': os.path.getsize(path),
+			'compression': compression,
+			'sha256': file_sha256(path)
+		}
+
+	created = time.gmtime()
+
+	# Version: creation time plus a digest of every component, so two
+	# bundles share a version only if they are byte-identical
+	content_digest = hashlib.sha256(
+		"".join(entries[name]['sha256'] for name in sorted(entries)).encode()
+	).hexdigest()
+
+	manifest = {
+		'format': BUNDLE_FORMAT,
+		'format_version': BUNDLE_FORMAT_VERSION,
+		'model_version': f"{time.strftime('%Y%m%d%H%M%S', created)}-{content_digest[:12]}",
+		'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', created),
+		**(metadata or {}),
+		'components': entries
+	}
+
+	with open(os.path.join(model_dir, MANIFEST_FILE), 'w') as f:
+		json.dump(manifest, f, indent=2, default=str)
+
+	return manifest
+
+
+def read_manifest(model_dir):
+	"""Read and check a bundle manifest"""
+	path = os.path.join(model_dir, MANIFEST_FILE)
+
+	try:
+		with open(path, 'r') as f:
+			manifest = json.load(f)
+	except (OSError, ValueError) as e:
+		raise ModelBundleError(f"Cannot read {path}: {e}")
+
+	if manifest.get('format') != BUNDLE_FORMAT:
+		raise ModelBundleError(f"{path} is not an {BUNDLE_FORMAT} manifest")
+
+	if manifest.get('format_version', 0) > BUNDLE_FORMAT_VERSION:
+		raise ModelBundleError(
+			f"Bundle format {manifest['format_version']} is newer than supported ({BUNDLE_FORMAT_VERSION})"
+		)
+
+	return manifest
+
+
+class LazyComponent:
+	"""
+	A bundle component loaded (and checksum-verified) on first `get()`
+
+	`prefetch()` starts the load in a background thread, so a server can
+	answer health checks while the forest is read; `get()` then waits for
+	it. Loading happens at most once, even with concurrent callers.
+	"""
+
+	def __init__(self, model_dir, name, entry):
+		self.name = name
+		self.path = os.path.join(model_dir, entry['file'])
+		self.entry = entry
+		self._value = None
+		self._loaded = False
+		self._error = None
+		self._lock = threading.Lock()
+		self._thread = None
+
+	def get(self):
+		if not self._loaded:
+			if self._thread is not None:
+				self._thread.join()
+			self._load()
+
+		if self._error is not None:
+			raise self._error
+
+		return self._value
+
+	def prefetch(self):
+		with self._lock:
+			if self._loaded or self._thread is not None:
+				return
+			self._thread = threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True)
+			self._thread.start()
+
+	def _load(self):
+		with self._lock:
+			if self._loaded:
+				return
+
+			try:
+				if file_sha256(self.path) != self.entry['sha256']:
+					raise ModelBundleError(f"Checksum mismatch for bundle component {self.name} ({self.path})")
+
+				self._value = joblib.load(self.path)
+			except Exception as e:
+				self._error = e if isinstance(e, ModelBundleError) else ModelBundleError(
+					f"Cannot load bundle component {self.name}: {e}"
+				)
+			finally:
+				self._loaded = True
+
+
+def load_components(model_dir, manifest=None):
+	"""
+	Lazy handles for every component of a bundle
+
+	Returns:
+		dict: component name -> LazyComponent
+	"""
+	manifest = manifest or read_manifest(model_dir)
+	return {
+		name: LazyComponent(model_dir, name, entry)
+		for name, entry in manifest['components'].items()
+	}
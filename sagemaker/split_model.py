@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Split recommendation head for AMEX classification
+
+Trained on reviewed ERPNext transactions (exported with
+erpnext_amex.utils.split_training) on the same features as the main
+forest, so the endpoint answers it from the feature matrix it already
+built for the request.
+
+Each transaction's split is reduced to a pattern: its cost centers with
+whole-number percentages summing to 100 (largest-remainder rounding),
+largest share first. The head is one RandomForest over classes:
+
+- NO_SPLIT: a single cost center
+- OTHER_SPLIT: split, by a pattern seen fewer than MIN_PATTERN_SUPPORT times
+- one class per recurring pattern
+
+The split probability is everything but NO_SPLIT; the proposed split is
+the most probable recurring pattern.
+"""
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+
+NO_SPLIT = 0
+OTHER_SPLIT = 1
+FIRST_PATTERN = 2
+
+# Patterns seen fewer times than this are not proposed
+MIN_PATTERN_SUPPORT = 2
+
+# Split probability above which a split is recommended
+SPLIT_THRESHOLD = 0.5
+
+SPLIT_MODEL_PARAMS = {
+	'n_estimators': 100,
+	'max_depth': 20,
+	'min_samples_split': 5,
+	'random_state': 42,
+	'n_jobs': -1
+}
+
+
+def get_split_pattern(splits):
+	"""
+	Normalize a transaction's splits to a pattern
+
+	Args:
+		splits: list of {'cost_center', 'percentage'} (any scale)
+
+	Returns:
+		tuple: ((cost_center, whole percentage), ...) largest share first,
+		or () when fewer than two cost centers share the amount
+	"""
+	shares = {}
+	for split in splits or []:
+		if split.get('cost_center') and split.get('percentage'):
+			shares[split['cost_center']] = shares.get(split['cost_center'], 0.0) + float(split['percentage'])
+
+	shares = {cost_center: share for cost_center, share in shares.items() if share > 0}
+	if len(shares) < 2:
+		return ()
+
+	cost_centers = sorted(shares)
+	exact = np.array([shares[cost_center] for cost_center in cost_centers]) * 100 / sum(shares.values())
+
+	# Largest remainder, so the rounded percentages still total 100
+	rounded = np.floor(exact).astype(int)
+	order = np.argsort(-(exact - rounded), kind='stable')
+	rounded[order[:100 - rounded.sum()]] += 1
+
+	pattern = [(cost_center, int(share)) for cost_center, share in zip(cost_centers, rounded) if share > 0]
+	if len(pattern) < 2:
+		return ()
+
+	return tuple(sorted(pattern, key=lambda item: (-item[1], item[0])))
+
+
+class SplitRecommender:
+	"""Predict whether a transaction is split, and how"""
+
+	def __init__(self, params=None, threshold=SPLIT_THRESHOLD):
+		self.params = {**SPLIT_MODEL_PARAMS, **(params or {})}
+		self.threshold = threshold
+		self.patterns = []
+		self.estimator = None
+
+	def get_labels(self, patterns, fit=False):
+		"""
+		Class label per pattern
+
+		Args:
+			patterns: `get_split_pattern` output per transaction
+			fit: Build the pattern vocabulary from these patterns first
+		"""
+		if fit:
+			counts = {}
+			for pattern in patterns:
+				if pattern:
+					counts[pattern] = counts.get(pattern, 0) + 1
+
+			self.patterns = sorted(
+				(pattern for pattern, count in counts.items() if count >= MIN_PATTERN_SUPPORT),
+				key=lambda pattern: (-counts[pattern], pattern)
+			)
+
+		index = {pattern: FIRST_PATTERN + i for i, pattern in enumerate(self.patterns)}
+		return np.array([
+			index.get(pattern, OTHER_SPLIT) if pattern else NO_SPLIT
+			for pattern in patterns
+		])
+
+	def fit(self, X, patterns, sample_weight=None):
+		"""
+		Args:
+			X: Features from AMEXClassificationModel.prepare_features
+			patterns: `get_split_pattern` output per row
+		"""
+		labels = self.get_labels(patterns, fit=True)
+
+		self.estimator = RandomForestClassifier(**self.params)
+		self.estimator.fit(X, labels, sample_weight=sample_weight)
+
+		return self
+
+	def predict(self, X):
+		"""
+		Returns:
+			tuple: (split probability (n,), proposed pattern index (n,) into
+			`patterns`, -1 where no recurring pattern is possible)
+		"""
+		proba = self.estimator.predict_proba(X)
+		classes = self.estimator.classes_
+
+		split_probability = 1.0 - proba[:, classes == NO_SPLIT].sum(axis=1)
+
+		pattern_columns = np.flatnonzero(classes >= FIRST_PATTERN)
+		proposed = np.full(X.shape[0], -1)
+		if len(pattern_columns):
+			pattern_proba = proba[:, pattern_columns]
+			best = np.argmax(pattern_proba, axis=1)
+			has_pattern = pattern_proba[np.arange(len(best)), best] > 0
+			proposed[has_pattern] = classes[pattern_columns[best[has_pattern]]] - FIRST_PATTERN
+
+		return split_probability, proposed
+
+	def get_splits(self, pattern_index):
+		"""Pattern as [{'cost_center', 'percentage'}], or [] for -1"""
+		if pattern_index < 0:
+			return []
+		return [
+			{'cost_center': cost_center, 'percentage': percentage}
+			for cost_center, percentage in self.patterns[pattern_index]
+		]
+
+
+def evaluate_split_model(recommender, X, patterns):
+	"""
+	Split detection and proposal quality on held-out rows
+
+	Returns:
+		dict: rows, split_rate, precision and recall of split_recommended,
+		and pattern_accuracy (share of correctly recommended splits whose
+		proposal matches the actual pattern exactly)
+	"""
+	split_probability, proposed = recommender.predict(X)
+	recommended = split_probability >= recommender.threshold
+	actual = np.array([bool(pattern) for pattern in patterns], dtype=bool)
+
+	hits = recommended & actual
+	proposals = [
+		tuple((s['cost_center'], s['percentage']) for s in recommender.get_splits(index))
+		for index in proposed
+	]
+	pattern_hits = sum(1 for i in np.flatnonzero(hits) if proposals[i] == patterns[i])
+
+	return {
+		'rows': int(len(actual)),
+		'split_rate': float(actual.mean()) if len(actual) else 0.0,
+		'threshold': recommender.threshold,
+		'precision': float(hits.sum() / recommended.sum()) if recommended.any() else None,
+		'recall': float(hits.sum() / actual.sum()) if actual.any() else None,
+		'pattern_accuracy': float(pattern_hits / hits.sum()) if hits.any() else None,
+		'patterns': len(recommender.patterns)
+	}
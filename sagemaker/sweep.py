@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweep for AMEXClassificationModel
+
+Every configuration of a parameter grid is scored with stratified k-fold
+cross-validation on the training split. (config, fold) pairs run in a
+process pool; workers memory-map the feature arrays from the feature
+cache instead of receiving copies.
+
+Per configuration the sweep records, averaged over folds:
+
+- accuracy and top-k accuracy per output (vendor, account, cost center)
+- expected calibration error (ECE) of the predicted class probability
+- training time, pickled model size, and batch and single-row
+  prediction latency
+
+The best trade-off is the configuration with the fewest trees (then the
+smallest model) among those whose mean accuracy is within `tolerance` of
+the best one. Both are deterministic; the latencies are timed in pool
+workers competing for the CPU and are reported, not used to choose.
+"""
+
+import csv
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+from calibration import OUTPUTS, expected_calibration_error
+from feature_cache import load_feature_arrays
+from train import DEFAULT_MODEL_PARAMS, build_estimator
+
+
+DEFAULT_GRID = {
+	'n_estimators': [50, 100, 200],
+	'max_depth': [10, 20, None],
+	'min_samples_split': [2, 5]
+}
+
+TOP_K = 3
+
+# Single-row predictions timed per fold (median is reported)
+LATENCY_SAMPLES = 20
+
+# Configurations within this much mean accuracy of the best compete on cost
+DEFAULT_TOLERANCE = 0.005
+
+RESULT_COLUMNS = [
+	'config', 'params', 'mean_accuracy', 'mean_accuracy_std',
+	*(f'{output}_accuracy' for output in OUTPUTS),
+	*(f'{output}_top{TOP_K}_accuracy' for output in OUTPUTS),
+	'calibration_error', 'train_seconds', 'model_mb',
+	'batch_ms_per_row', 'single_row_ms', 'best'
+]
+
+# Features of the current worker process, loaded once by _init_worker
+_features = None
+
+
+def expand_grid(grid):
+	"""
+	All combinations of a parameter grid
+
+	Args:
+		grid: dict of parameter -> list of values
+
+	Returns:
+		list: Parameter dicts, in grid order
+	"""
+	names = list(grid)
+	return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def get_folds(y, index, n_folds, random_state=42):
+	"""
+	Stratified folds of `index`, stratified on the vendor label
+
+	Vendors with fewer examples than folds cannot be spread over every
+	fold; they are stratified together as one group.
+
+	Returns:
+		list: (fit index, validation index) pairs, as positions into y
+	"""
+	labels = np.asarray(y[index, 0])
+	_, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+	strata = np.where(counts[inverse] < n_folds, -1, labels)
+
+	splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+	return [(index[fit], index[val]) for fit, val in splitter.split(np.zeros(len(index)), strata)]
+
+
+def run_sweep(cache_path, index, grid=None, n_folds=3, max_workers=None, tolerance=DEFAULT_TOLERANCE):
+	"""
+	Cross-validate every configuration of `grid` on the rows in `index`
+
+	Args:
+		cache_path: Feature cache entry holding X, y and weights
+		index: Rows to cross-validate on (the training split)
+		grid: Parameter grid (defaults to DEFAULT_GRID)
+		n_folds: Number of stratified folds
+		max_workers: Worker processes (defaults to the CPU count)
+		tolerance: See `pick_best`
+
+	Returns:
+		list: One result row per configuration (RESULT_COLUMNS), best marked
+	"""
+	configs = expand_grid(grid or DEFAULT_GRID)
+	folds = get_folds(load_feature_arrays(cache_path).y, np.asarray(index), n_folds)
+
+	print(f"Sweeping {len(configs)} configurations x {n_folds} folds...")
+
+	with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(cache_path,)) as executor:
+		futures = [
+			executor.submit(_evaluate_fold, params, fit_index, val_index)
+			for params in configs
+			for fit_index, val_index in folds
+		]
+		fold_results = [future.result() for future in futures]
+
+	rows = []
+	for i, params in enumerate(configs):
+		rows.append(summarize(i, params, fold_results[i * n_folds:(i + 1) * n_folds]))
+
+	best = pick_best(rows, tolerance)
+	for row in rows:
+		row['best'] = row is best
+
+	return rows
+
+
+def _init_worker(cache_path):
+	global _features
+	_features = load_feature_arrays(cache_path)
+
+
+def _evaluate_fold(params, fit_index, val_index):
+	"""Fit one configuration on one fold and score it (runs in a worker)"""
+	X, y, weights, _ = _features
+
+	# Parallelism comes from the pool; one core per fit
+	model = build_estimator({**params, 'n_jobs': 1})
+
+	start = time.perf_counter()
+	if weights is not None:
+		model.fit(X[fit_index], y[fit_index], sample_weight=weights[fit_index])
+	else:
+		model.fit(X[fit_index], y[fit_index])
+	train_seconds = time.perf_counter() - start
+
+	X_val = X[val_index]
+	start = time.perf_counter()
+	probabilities = model.predict_proba(X_val)
+	batch_seconds = time.perf_counter() - start
+
+	single_row = []
+	for i in range(min(LATENCY_SAMPLES, X_val.shape[0])):
+		start = time.perf_counter()
+		model.predict_proba(X_val[i])
+		single_row.append(time.perf_counter() - start)
+
+	result = score_probabilities(model, probabilities, np.asarray(y[val_index]))
+	result.update({
+		'train_seconds': train_seconds,
+		'model_mb': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1024 / 1024,
+		'batch_ms_per_row': batch_seconds * 1000 / max(X_val.shape[0], 1),
+		'single_row_ms': float(np.median(single_row)) * 1000 if single_row else 0.0
+	})
+
+	return result
+
+
+def score_probabilities(model, probabilities, y):
+	"""
+	Accuracy, top-k accuracy and calibration error per output
+
+	Args:
+		model: Fitted MultiOutputClassifier
+		probabilities: model.predict_proba output (one array per output)
+		y: True labels, (n, outputs)
+
+	Returns:
+		dict: `<output>_accuracy`, `<output>_top{k}_accuracy`, calibration_error
+	"""
+	scores = {}
+	calibration_errors = []
+
+	for j, (output, proba) in enumerate(zip(OUTPUTS, probabilities)):
+		classes = model.estimators_[j].classes_
+		ranked = np.argsort(-proba, axis=1)[:, :TOP_K]
+		correct = classes[ranked[:, 0]] == y[:, j]
+
+		scores[f'{output}_accuracy'] = float(np.mean(correct))
+		scores[f'{output}_top{TOP_K}_accuracy'] = float(np.mean((classes[ranked] == y[:, [j]]).any(axis=1)))
+		calibration_errors.append(expected_calibration_error(proba.max(axis=1), correct))
+
+	scores['calibration_error'] = float(np.mean(calibration_errors))
+	return scores
+
+
+def summarize(config_index, params, fold_results):
+	"""Average one configuration's fold results into a result row"""
+	row = {'config': config_index, 'params': params}
+
+	for column in RESULT_COLUMNS:
+		if fold_results and column in fold_results[0]:
+			row[column] = float(np.mean([result[column] for result in fold_results]))
+
+	fold_accuracy = [
+		np.mean([result[f'{output}_accuracy'] for output in OUTPUTS])
+		for result in fold_results
+	]
+	row['mean_accuracy'] = float(np.mean(fold_accuracy))
+	row['mean_accuracy_std'] = float(np.std(fold_accuracy))
+
+	return row
+
+
+def pick_best(rows, tolerance=DEFAULT_TOLERANCE):
+	"""
+	Fewest trees, then smallest, configuration within `tolerance` of the best accuracy
+
+	Single-row latency grows with the number of trees, but the timings in
+	the rows are too noisy to rank on, so the deterministic tree count and
+	model size decide.
+
+	Returns:
+		dict: The chosen result row
+	"""
+	top = max(row['mean_accuracy'] for row in rows)
+	candidates = [row for row in rows if row['mean_accuracy'] >= top - tolerance]
+
+	return min(candidates, key=lambda row: (get_tree_count(row['params']), row['model_mb'], -row['mean_accuracy']))
+
+
+def get_tree_count(params):
+	"""Trees per output of a configuration"""
+	return {**DEFAULT_MODEL_PARAMS, **(params or {})}['n_estimators']
+
+
+def write_results(rows, output_dir):
+	"""
+	Write the results table as CSV and JSON
+
+	Returns:
+		tuple: (csv file, json file)
+	"""
+	os.makedirs(output_dir, exist_ok=True)
+	csv_file = os.path.join(output_dir, 'sweep_results.csv')
+	json_file = os.path.join(output_dir, 'sweep_results.json')
+
+	with open(csv_file, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+		writer.writeheader()
+		for row in rows:
+			writer.writerow({**row, 'params': json.dumps(row['params'])})
+
+	with open(json_file, 'w') as f:
+		json.dump(rows, f, indent=2)
+
+	return csv_file, json_file
+
+
+def format_results(rows):
+	"""Results as a fixed-width text table, best configuration marked with *"""
+	lines = [
+		f"{'':2}{'params':<52}{'acc':>7}{'±':>6}{f'top{TOP_K}':>7}{'ece':>7}"
+		f"{'train s':>9}{'MB':>8}{'ms/row':>8}{'1-row ms':>10}"
+	]
+
+	for row in sorted(rows, key=lambda row: -row['mean_accuracy']):
+		top_k = np.mean([row[f'{output}_top{TOP_K}_accuracy'] for output in OUTPUTS])
+		lines.append(
+			f"{'*' if row['best'] else '':2}{json.dumps(row['params']):<52}"
+			f"{row['mean_accuracy']:>7.2%}{row['mean_accuracy_std']:>6.1%}{top_k:>7.2%}"
+			f"{row['calibration_error']:>7.3f}{row['train_seconds']:>9.1f}{row['model_mb']:>8.1f}"
+			f"{row['batch_ms_per_row']:>8.3f}{row['single_row_ms']:>10.1f}"
+		)
+
+	return "\n".join(lines)
@@ -12,8 +12,11 @@ This script trains a multi-output classification model to predict:
 import json
 import os
 import argparse
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -21,6 +24,91 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.multioutput import MultiOutputClassifier
 import joblib
 import boto3
+import pyarrow.dataset as ds
+
+from calibration import OUTPUTS, ModelCalibration, expected_calibration_error
+from feature_cache import TRANSFORMER_ATTRIBUTES, FeatureArrays, FeatureCache, get_cache_key, hash_training_data
+from model_bundle import (
+	COMPRESSION_CHOICES, DEFAULT_COMPRESSION, ModelBundleError, check_compression, is_bundle, load_components,
+	read_manifest, write_bundle
+)
+from split_model import SplitRecommender, evaluate_split_model, get_split_pattern
+
+
+# Columns read from the Parquet training data; everything else (memo,
+# NetSuite source fields) is skipped at the file level
+TRAINING_COLUMNS = [
+	'vendor_description', 'amex_category', 'amount', 'date', 'weight',
+	'original_vendor', 'vendor', 'expense_account', 'cost_center'
+]
+
+AMOUNT_BINS = [-np.inf, 50, 100, 500, 1000, 5000, np.inf]
+
+# RandomForest settings used unless overridden by hyperparameters or a sweep
+DEFAULT_MODEL_PARAMS = {
+	'n_estimators': 100,
+	'max_depth': 20,
+	'min_samples_split': 5,
+	'random_state': 42,
+	'n_jobs': -1
+}
+
+
+# Latest share of dated rows held out for evaluation, and the latest share
+# of the remaining training period used to fit the confidence calibrators
+TEST_SIZE = 0.2
+CALIBRATION_SIZE = 0.2
+
+# Expanding-window folds whose predictions calibrate the shipped model
+CALIBRATION_FOLDS = 3
+
+# Auto-accept thresholds reported by evaluate_model
+AUTO_ACCEPT_THRESHOLDS = (0.8, 0.85, 0.9, 0.95, 0.98)
+
+# Split data file inside a training channel directory
+SPLIT_DATA_FILE = 'splits.json'
+
+# Fewer reviewed transactions (or no split ones) and no split head is trained
+MIN_SPLIT_EXAMPLES = 50
+
+
+def build_estimator(params=None):
+	"""Multi-output RandomForest with DEFAULT_MODEL_PARAMS updated by `params`"""
+	return MultiOutputClassifier(RandomForestClassifier(**{**DEFAULT_MODEL_PARAMS, **(params or {})}))
+
+
+def load_training_data(path, columns=TRAINING_COLUMNS):
+	"""
+	Load training data
+	
+	Args:
+		path: Parquet dataset directory (hive partitioned by month, as written
+			by transform_netsuite_to_erpnext.py), a single Parquet file, or a
+			legacy training_data.json
+		columns: Columns to read; ones missing from the dataset are skipped
+	
+	Returns:
+		DataFrame: Training examples
+	"""
+	if path.endswith('.json'):
+		with open(path, 'r') as f:
+			return pd.DataFrame(json.load(f))
+	
+	dataset = ds.dataset(path, format='parquet', partitioning='hive')
+	available = set(dataset.schema.names)
+	
+	return dataset.to_table(columns=[c for c in columns if c in available]).to_pandas()
+
+
+def get_label_column(df, field):
+	"""Label values from flattened (Parquet) columns or nested `classification` dicts (JSON)"""
+	if field in df.columns:
+		return df[field].fillna('Unknown')
+	
+	if 'classification' in df.columns:
+		return df['classification'].apply(lambda x: x.get(field, 'Unknown') if isinstance(x, dict) else 'Unknown')
+	
+	return None
 
 
 class AMEXClassificationModel:
@@ -33,9 +121,39 @@ class AMEXClassificationModel:
 		self.description_vectorizer = TfidfVectorizer(max_features=1000, ngram_range=(1, 2))
 		self.category_vectorizer = TfidfVectorizer(max_features=100)
 		self.model = None
+		self.calibration = None
+		self.split_model = None
+		self.model_version = None
+		self.manifest = None
+	
+	@property
+	def model(self):
+		"""The fitted forest, loaded from the bundle on first access"""
+		if self._model is None and self._model_loader is not None:
+			self._model = self._model_loader.get()
+		return self._model
+	
+	@model.setter
+	def model(self, value):
+		self._model = value
+		self._model_loader = None
+	
+	def prefetch(self):
+		"""Start loading the forest in the background (bundle-loaded models only)"""
+		if self._model is None and self._model_loader is not None:
+			self._model_loader.prefetch()
+	
+	def get_feature_config(self):
+		"""Everything besides the data that determines prepare_features/prepare_labels output"""
+		return {
+			'description_vectorizer': self.description_vectorizer.get_params(),
+			'category_vectorizer': self.category_vectorizer.get_params(),
+			'amount_bins': AMOUNT_BINS,
+			'columns': TRAINING_COLUMNS
+		}
 	
 	def prepare_features(self, df, fit=False):
-		"""Extract and prepare features from transaction data"""
+		"""Extract and prepare features from transaction data (sparse CSR matrix)"""
 		features = []
 		
 		# Text features from description
@@ -44,21 +162,22 @@ class AMEXClassificationModel:
 		else:
 			desc_features = self.description_vectorizer.transform(df['vendor_description'].fillna(''))
 		
-		features.append(desc_features.toarray())
+		features.append(desc_features)
 		
-		# Text features from category
-		if 'amex_category' in df.columns:
+		# Text features from category (only if the training data had categories,
+		# so inference and split data produce the columns the forest was fit on)
+		if 'amex_category' in df.columns and (fit or hasattr(self.category_vectorizer, 'vocabulary_')):
 			if fit:
 				cat_features = self.category_vectorizer.fit_transform(df['amex_category'].fillna(''))
 			else:
 				cat_features = self.category_vectorizer.transform(df['amex_category'].fillna(''))
-			features.append(cat_features.toarray())
+			features.append(cat_features)
 		
 		# Numerical features
 		numerical_features = []
 		
 		# Amount buckets
-		amount_buckets = pd.cut(df['amount'], bins=[-np.inf, 50, 100, 500, 1000, 5000, np.inf], labels=False)
+		amount_buckets = pd.cut(df['amount'], bins=AMOUNT_BINS, labels=False)
 		numerical_features.append(amount_buckets.values.reshape(-1, 1))
 		
 		# Day of week and month (if date available)
@@ -72,18 +191,17 @@ class AMEXClassificationModel:
 		# Combine all features
 		if numerical_features:
 			numerical_array = np.hstack(numerical_features)
-			features.append(numerical_array)
+			features.append(sparse.csr_matrix(numerical_array))
 		
-		return np.hstack(features)
+		return sparse.hstack(features, format='csr')
 	
 	def prepare_labels(self, df, fit=False):
 		"""Prepare target labels"""
 		labels = {}
 		
 		# Vendor
-		if 'classification' in df.columns:
-			vendors = df['classification'].apply(lambda x: x.get('vendor', 'Unknown') if isinstance(x, dict) else 'Unknown')
-		else:
+		vendors = get_label_column(df, 'vendor')
+		if vendors is None:
 			vendors = df['original_vendor'].fillna('Unknown')
 		
 		if fit:
@@ -92,9 +210,8 @@ class AMEXClassificationModel:
 			labels['vendor'] = self.vendor_encoder.transform(vendors)
 		
 		# Expense Account
-		if 'classification' in df.columns:
-			accounts = df['classification'].apply(lambda x: x.get('expense_account', 'Unknown') if isinstance(x, dict) else 'Unknown')
-		else:
+		accounts = get_label_column(df, 'expense_account')
+		if accounts is None:
 			accounts = pd.Series(['Unknown'] * len(df))
 		
 		if fit:
@@ -103,9 +220,8 @@ class AMEXClassificationModel:
 			labels['account'] = self.account_encoder.transform(accounts)
 		
 		# Cost Center
-		if 'classification' in df.columns:
-			cost_centers = df['classification'].apply(lambda x: x.get('cost_center', 'Unknown') if isinstance(x, dict) else 'Unknown')
-		else:
+		cost_centers = get_label_column(df, 'cost_center')
+		if cost_centers is None:
 			cost_centers = pd.Series(['Unknown'] * len(df))
 		
 		if fit:
@@ -118,20 +234,12 @@ class AMEXClassificationModel:
 		
 		return y, labels
 	
-	def train(self, X, y, sample_weights=None):
-		"""Train the model"""
+	def train(self, X, y, sample_weights=None, params=None):
+		"""Train the model (`params` override DEFAULT_MODEL_PARAMS)"""
 		print("Training model...")
 		
 		# Use RandomForest for multi-output classification
-		base_estimator = RandomForestClassifier(
-			n_estimators=100,
-			max_depth=20,
-			min_samples_split=5,
-			random_state=42,
-			n_jobs=-1
-		)
-		
-		self.model = MultiOutputClassifier(base_estimator)
+		self.model = build_estimator(params)
 		
 		if sample_weights is not None:
 			self.model.fit(X, y, sample_weight=sample_weights)
@@ -140,24 +248,168 @@ class AMEXClassificationModel:
 		
 		print("Training complete!")
 	
-	def predict(self, X):
-		"""Make predictions"""
+	def predict_proba(self, X):
+		"""Class probabilities, one (n, classes) array per output"""
 		if self.model is None:
 			raise ValueError("Model has not been trained")
 		
-		predictions = self.model.predict(X)
-		probabilities = None
+		return self.model.predict_proba(X)
+	
+	def predict_top(self, X, output_probabilities=None):
+		"""
+		Predicted label and its raw probability for each output
+		
+		Args:
+			X: Features
+			output_probabilities: `predict_proba(X)`, if already computed
+		
+		Returns:
+			tuple: (predictions (n, outputs), top-class probabilities (n, outputs))
+		"""
+		if output_probabilities is None:
+			output_probabilities = self.predict_proba(X)
+		
+		predictions = []
+		top_probabilities = []
 		
-		# Get prediction probabilities for confidence scores
-		try:
-			# Get probabilities for each output
-			vendor_probs = np.max([est.predict_proba(X) for est in self.model.estimators_[0].estimators_], axis=0)
-			probabilities = {'confidence': np.mean(vendor_probs, axis=1)}
-		except:
-			probabilities = {'confidence': np.ones(len(X)) * 0.5}
+		# The prediction is the argmax, as in MultiOutputClassifier.predict
+		for estimator, proba in zip(self.model.estimators_, output_probabilities):
+			best = np.argmax(proba, axis=1)
+			predictions.append(estimator.classes_[best])
+			top_probabilities.append(proba[np.arange(len(best)), best])
+		
+		return np.column_stack(predictions), np.column_stack(top_probabilities)
+	
+	def calibrate(self, X, y):
+		"""Fit confidence calibrators on rows the forest was not trained on"""
+		predictions, top_probabilities = self.predict_top(X)
+		self.calibration = ModelCalibration().fit(top_probabilities, predictions == np.asarray(y))
+	
+	def calibrate_out_of_fold(self, X, y, folds, sample_weights=None, params=None):
+		"""
+		Fit confidence calibrators on time-ordered out-of-fold predictions
+		
+		For the model trained on every row, which leaves no unseen rows to
+		calibrate on. Per (fit, predict) fold a forest with the same
+		parameters is trained on the earlier rows and predicts the later
+		ones, so the calibrators learn from forests trained on most of the
+		history, predicting newer transactions.
+		
+		Args:
+			X, y: Features and labels of all rows
+			folds: (fit index, predict index) pairs, see `get_forward_folds`
+			sample_weights: Per-row weights for the fold forests
+			params: Forest parameters (as passed to `train`)
+		"""
+		predictions = []
+		top_probabilities = []
+		labels = []
+		
+		for i, (fit_index, predict_index) in enumerate(folds):
+			print(f"Calibration fold {i + 1}/{len(folds)}: {len(fit_index)} -> {len(predict_index)} rows")
+			fold_model = AMEXClassificationModel()
+			fold_model.model = build_estimator(params)
+			if sample_weights is not None:
+				fold_model.model.fit(X[fit_index], y[fit_index], sample_weight=sample_weights[fit_index])
+			else:
+				fold_model.model.fit(X[fit_index], y[fit_index])
+			
+			fold_predictions, fold_top_probabilities = fold_model.predict_top(X[predict_index])
+			predictions.append(fold_predictions)
+			top_probabilities.append(fold_top_probabilities)
+			labels.append(np.asarray(y[predict_index]))
+		
+		self.calibration = ModelCalibration().fit(
+			np.vstack(top_probabilities),
+			np.vstack(predictions) == np.vstack(labels)
+		)
+	
+	def predict(self, X, output_probabilities=None):
+		"""
+		Make predictions
+		
+		Args:
+			X: Features
+			output_probabilities: `predict_proba(X)`, if already computed
+		
+		Returns:
+			tuple: (predictions, probabilities) where probabilities has
+			`output_confidence` (n, outputs), `confidence` (joint: all outputs
+			correct) and `calibrated`. Without calibrators the raw top-class
+			probabilities (and their product) are returned.
+		"""
+		predictions, top_probabilities = self.predict_top(X, output_probabilities)
+		
+		if self.calibration is not None:
+			output_confidence = self.calibration.get_output_confidence(top_probabilities)
+			confidence = self.calibration.get_joint_confidence(output_confidence)
+		else:
+			output_confidence = top_probabilities
+			confidence = top_probabilities.prod(axis=1)
+		
+		probabilities = {
+			'confidence': confidence,
+			'output_confidence': output_confidence,
+			'calibrated': self.calibration is not None
+		}
 		
 		return predictions, probabilities
 	
+	def predict_candidates(self, output_probabilities, k):
+		"""
+		Top-k labels per output, best first
+		
+		Uses a partial sort (argpartition) of each probability matrix, so the
+		cost grows with k rather than with the number of classes.
+		
+		Args:
+			output_probabilities: `predict_proba(X)`
+			k: Candidates per output
+		
+		Returns:
+			dict: output -> (labels (n, k') decoded, probabilities (n, k')),
+			k' = min(k, number of classes)
+		"""
+		encoders = (self.vendor_encoder, self.account_encoder, self.cost_center_encoder)
+		candidates = {}
+		
+		for output, encoder, estimator, proba in zip(OUTPUTS, encoders, self.model.estimators_, output_probabilities):
+			top = min(k, proba.shape[1])
+			rows = np.arange(proba.shape[0])[:, None]
+			
+			if top < proba.shape[1]:
+				index = np.argpartition(-proba, top - 1, axis=1)[:, :top]
+			else:
+				index = np.broadcast_to(np.arange(top), (proba.shape[0], top))
+			
+			# Order the k candidates (ties keep class order)
+			index = np.take_along_axis(index, np.argsort(-proba[rows, index], axis=1, kind='stable'), axis=1)
+			
+			candidates[output] = (encoder.classes_[estimator.classes_[index]], proba[rows, index])
+		
+		return candidates
+	
+	def predict_splits(self, X):
+		"""
+		Split recommendation per transaction
+		
+		Returns:
+			tuple: (split probability (n,), recommended (n,) bool, proposed
+			splits per row as [{'cost_center', 'percentage'}]), or None
+			without a split head
+		"""
+		if self.split_model is None:
+			return None
+		
+		split_probability, proposed = self.split_model.predict(X)
+		recommended = split_probability >= self.split_model.threshold
+		splits = [
+			self.split_model.get_splits(index) if is_recommended else []
+			for index, is_recommended in zip(proposed, recommended)
+		]
+		
+		return split_probability, recommended, splits
+	
 	def decode_predictions(self, predictions):
 		"""Decode predictions to original labels"""
 		decoded = {
@@ -167,27 +419,80 @@ class AMEXClassificationModel:
 		}
 		return decoded
 	
-	def save_model(self, model_dir):
-		"""Save model and encoders"""
-		print(f"Saving model to {model_dir}")
+	def save_model(self, model_dir, compression=DEFAULT_COMPRESSION, metrics=None):
+		"""
+		Save the model as a versioned bundle (see model_bundle.py)
 		
-		os.makedirs(model_dir, exist_ok=True)
+		Components: `forest` (the fitted estimator), `transformers`
+		(vectorizers and label encoders), and `calibration` and `split`
+		(the split recommendation head) if fitted. The
+		manifest records the model version, feature config, label sets,
+		metrics and a sha256 per component.
 		
-		# Save model
-		joblib.dump(self.model, os.path.join(model_dir, 'model.joblib'))
+		Returns:
+			str: The new model version
+		"""
+		print(f"Saving model to {model_dir}")
 		
-		# Save encoders and vectorizers
-		joblib.dump(self.vendor_encoder, os.path.join(model_dir, 'vendor_encoder.joblib'))
-		joblib.dump(self.account_encoder, os.path.join(model_dir, 'account_encoder.joblib'))
-		joblib.dump(self.cost_center_encoder, os.path.join(model_dir, 'cost_center_encoder.joblib'))
-		joblib.dump(self.description_vectorizer, os.path.join(model_dir, 'description_vectorizer.joblib'))
-		joblib.dump(self.category_vectorizer, os.path.join(model_dir, 'category_vectorizer.joblib'))
+		components = {
+			'forest': self.model,
+			'transformers': {attribute: getattr(self, attribute) for attribute in TRANSFORMER_ATTRIBUTES}
+		}
+		if self.calibration is not None:
+			components['calibration'] = self.calibration
+		if self.split_model is not None:
+			components['split'] = self.split_model
+		
+		self.manifest = write_bundle(model_dir, components, metadata={
+			'feature_config': self.get_feature_config(),
+			'labels': {
+				'vendor': self.vendor_encoder.classes_.tolist(),
+				'account': self.account_encoder.classes_.tolist(),
+				'cost_center': self.cost_center_encoder.classes_.tolist()
+			},
+			'metrics': metrics or {}
+		}, compression=compression)
+		self.model_version = self.manifest['model_version']
 		
-		print("Model saved successfully!")
+		print(f"Model {self.model_version} saved successfully!")
+		return self.model_version
 	
 	@classmethod
 	def load_model(cls, model_dir):
-		"""Load model and encoders"""
+		"""
+		Load a model bundle
+		
+		The transformers, calibration and split head are loaded right away;
+		the forest on first use (or in the background after `prefetch()`).
+		Every component is checked against its manifest checksum. Directories
+		written before bundles (one joblib file per attribute) still load,
+		eagerly and without a version.
+		"""
+		if not is_bundle(model_dir):
+			return cls.load_legacy_model(model_dir)
+		
+		instance = cls()
+		instance.manifest = read_manifest(model_dir)
+		instance.model_version = instance.manifest['model_version']
+		
+		components = load_components(model_dir, instance.manifest)
+		
+		for attribute, value in components['transformers'].get().items():
+			setattr(instance, attribute, value)
+		
+		if 'calibration' in components:
+			instance.calibration = components['calibration'].get()
+		
+		if 'split' in components:
+			instance.split_model = components['split'].get()
+		
+		instance._model_loader = components['forest']
+		
+		return instance
+	
+	@classmethod
+	def load_legacy_model(cls, model_dir):
+		"""Load a model saved as separate joblib files"""
 		instance = cls()
 		
 		instance.model = joblib.load(os.path.join(model_dir, 'model.joblib'))
@@ -197,51 +502,163 @@ class AMEXClassificationModel:
 		instance.description_vectorizer = joblib.load(os.path.join(model_dir, 'description_vectorizer.joblib'))
 		instance.category_vectorizer = joblib.load(os.path.join(model_dir, 'category_vectorizer.joblib'))
 		
+		# Models trained before calibration was added have none
+		calibration_file = os.path.join(model_dir, 'calibration.joblib')
+		if os.path.exists(calibration_file):
+			instance.calibration = joblib.load(calibration_file)
+		
 		return instance
 
 
 def evaluate_model(model, X_test, y_test):
-	"""Evaluate model performance"""
+	"""
+	Evaluate model performance
+	
+	Besides accuracy, reports how well the confidence is calibrated and,
+	for each AUTO_ACCEPT_THRESHOLDS value, the share of transactions that
+	would be auto-accepted and how many of those are fully correct.
+	"""
 	predictions, probabilities = model.predict(X_test)
+	y_test = np.asarray(y_test)
+	correct = predictions == y_test
+	all_correct = correct.all(axis=1)
+	confidence = probabilities['confidence']
+	
+	metrics = {'test_examples': int(len(y_test)), 'calibrated': probabilities['calibrated']}
 	
 	# Calculate accuracy for each output
-	vendor_accuracy = np.mean(predictions[:, 0] == y_test[:, 0])
-	account_accuracy = np.mean(predictions[:, 1] == y_test[:, 1])
-	cost_center_accuracy = np.mean(predictions[:, 2] == y_test[:, 2])
-	
-	print(f"\nModel Evaluation:")
-	print(f"  Vendor Accuracy: {vendor_accuracy:.2%}")
-	print(f"  Account Accuracy: {account_accuracy:.2%}")
-	print(f"  Cost Center Accuracy: {cost_center_accuracy:.2%}")
-	print(f"  Average Accuracy: {np.mean([vendor_accuracy, account_accuracy, cost_center_accuracy]):.2%}")
-	
-	return {
-		'vendor_accuracy': vendor_accuracy,
-		'account_accuracy': account_accuracy,
-		'cost_center_accuracy': cost_center_accuracy,
-		'average_accuracy': np.mean([vendor_accuracy, account_accuracy, cost_center_accuracy])
-	}
+	for j, output in enumerate(OUTPUTS):
+		metrics[f'{output}_accuracy'] = float(np.mean(correct[:, j]))
+		metrics[f'{output}_calibration_error'] = expected_calibration_error(
+			probabilities['output_confidence'][:, j], correct[:, j]
+		)
+	
+	metrics['average_accuracy'] = float(np.mean([metrics[f'{output}_accuracy'] for output in OUTPUTS]))
+	metrics['joint_accuracy'] = float(np.mean(all_correct))
+	metrics['joint_calibration_error'] = expected_calibration_error(confidence, all_correct)
+	
+	metrics['auto_accept'] = []
+	for threshold in AUTO_ACCEPT_THRESHOLDS:
+		accepted = confidence >= threshold
+		metrics['auto_accept'].append({
+			'threshold': threshold,
+			'rate': float(np.mean(accepted)) if len(accepted) else 0.0,
+			'precision': float(np.mean(all_correct[accepted])) if accepted.any() else None
+		})
+	
+	print(f"\nModel Evaluation ({metrics['test_examples']} held-out transactions):")
+	print(f"  Vendor Accuracy: {metrics['vendor_accuracy']:.2%}")
+	print(f"  Account Accuracy: {metrics['account_accuracy']:.2%}")
+	print(f"  Cost Center Accuracy: {metrics['cost_center_accuracy']:.2%}")
+	print(f"  Average Accuracy: {metrics['average_accuracy']:.2%}")
+	print(f"  All Outputs Correct: {metrics['joint_accuracy']:.2%}")
+	print(f"  Joint Confidence Calibration Error: {metrics['joint_calibration_error']:.3f}")
+	for row in metrics['auto_accept']:
+		precision = f"{row['precision']:.2%}" if row['precision'] is not None else '-'
+		print(f"  Auto-accept >= {row['threshold']:.2f}: {row['rate']:.2%} of transactions, {precision} fully correct")
+	
+	return metrics
 
 
-def main():
-	parser = argparse.ArgumentParser()
-	parser.add_argument('--training-data', type=str, default=os.environ.get('SM_CHANNEL_TRAINING', 'training_data/training_data.json'))
-	parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', 'model'))
-	parser.add_argument('--output-data-dir', type=str, default=os.environ.get('SM_OUTPUT_DATA_DIR', 'output'))
+def get_time_split(dates, test_size, index=None):
+	"""
+	Split rows chronologically: the latest `test_size` of dated rows are held out
 	
-	args = parser.parse_args()
+	All rows of the cutoff date go to the held-out side, and rows without a
+	date stay on the training side. Falls back to a random split when the
+	rows span fewer than two dates.
 	
-	print("Loading training data...")
-	with open(args.training_data, 'r') as f:
-		data = json.load(f)
+	Args:
+		dates: datetime64 array (NaT for unknown) for all rows
+		test_size: Share of dated rows to hold out
+		index: Rows to split (defaults to all)
 	
-	df = pd.DataFrame(data)
-	print(f"Loaded {len(df)} training examples")
+	Returns:
+		tuple: (earlier index, later index)
+	"""
+	index = np.arange(len(dates)) if index is None else np.asarray(index)
+	row_dates = np.asarray(dates)[index]
+	dated = ~np.isnat(row_dates)
 	
-	# Initialize model
-	model = AMEXClassificationModel()
+	if len(np.unique(row_dates[dated])) < 2:
+		print("Warning: not enough dated rows for a time split, using a random split")
+		return train_test_split(index, test_size=test_size, random_state=42)
+	
+	ordered = np.sort(row_dates[dated])
+	cutoff = ordered[min(int(len(ordered) * (1 - test_size)), len(ordered) - 1)]
+	
+	# Keep at least the earliest date for training
+	cutoff = max(cutoff, ordered[ordered > ordered[0]][0])
+	later = dated & (row_dates >= cutoff)
+	
+	return index[~later], index[later]
+
+
+def get_forward_folds(dates, n_folds, index=None):
+	"""
+	Expanding-window folds over time
+	
+	The rows are cut into n_folds + 1 periods of about equal size; fold k
+	fits on everything before period k + 1 and predicts that period.
+	
+	Returns:
+		list: (fit index, predict index) pairs, oldest first
+	"""
+	remaining = np.arange(len(dates)) if index is None else np.asarray(index)
+	folds = []
+	
+	for i in range(n_folds):
+		earlier, later = get_time_split(dates, 1 / (n_folds + 1 - i), index=remaining)
+		if not len(earlier) or not len(later):
+			break
+		folds.append((earlier, later))
+		remaining = earlier
+	
+	return folds[::-1]
+
+
+def describe_dates(dates, index):
+	"""First and last date of the rows in `index` (ISO strings), for metrics"""
+	values = np.asarray(dates)[index]
+	values = values[~np.isnat(values)]
+	if not len(values):
+		return None
+	return {'from': str(values.min()), 'to': str(values.max()), 'rows': int(len(index))}
+
+
+def load_features(model, training_data, cache_dir=None):
+	"""
+	Extract training features, reusing a cached extraction when possible
+	
+	The cache key is a content hash of the training data plus the model's
+	feature config, so runs that only change hyperparameters skip reading
+	the data and refitting the vectorizers.
+	
+	Args:
+		model: AMEXClassificationModel; its vectorizers and encoders are
+			fitted (or restored from the cache)
+		training_data: Path accepted by `load_training_data`
+		cache_dir: Feature cache directory, or None to disable caching
+	
+	Returns:
+		tuple: (FeatureArrays, cache entry path or None)
+	"""
+	cache = key = None
+	
+	if cache_dir:
+		cache = FeatureCache(cache_dir)
+		data_hash = hash_training_data(training_data)
+		key = get_cache_key(data_hash, model.get_feature_config())
+		
+		cached = cache.load(key, model)
+		if cached is not None:
+			print(f"Using cached features {key} ({cached.X.shape[0]} examples)")
+			return cached, cache.get_path(key)
+	
+	print("Loading training data...")
+	df = load_training_data(training_data)
+	print(f"Loaded {len(df)} training examples")
 	
-	# Prepare features
 	print("Preparing features...")
 	X = model.prepare_features(df, fit=True)
 	y, _ = model.prepare_labels(df, fit=True)
@@ -249,31 +666,245 @@ def main():
 	# Get sample weights if available
 	sample_weights = df['weight'].values if 'weight' in df.columns else None
 	
-	# Split data
-	X_train, X_test, y_train, y_test, w_train, w_test = train_test_split(
-		X, y, sample_weights,
-		test_size=0.2,
-		random_state=42
-	)
+	# Dates for the chronological split
+	if 'date' in df.columns:
+		dates = pd.to_datetime(df['date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+	else:
+		dates = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+	
+	features = FeatureArrays(X, y, sample_weights, dates)
+	
+	path = None
+	if cache:
+		path = cache.save(key, model, features, key_inputs={
+			'training_data': training_data,
+			'data_hash': data_hash,
+			'feature_config': model.get_feature_config()
+		})
+		print(f"Cached features in {path}")
+	
+	return features, path
+
+
+def load_split_data(path):
+	"""
+	Load split training records (erpnext_amex.utils.split_training export)
+	
+	Args:
+		path: JSON file, or a channel directory containing SPLIT_DATA_FILE
+	
+	Returns:
+		DataFrame: or None if there is no split data
+	"""
+	if path and os.path.isdir(path):
+		path = os.path.join(path, SPLIT_DATA_FILE)
+	
+	if not path or not os.path.exists(path):
+		return None
+	
+	with open(path, 'r') as f:
+		return pd.DataFrame(json.load(f))
+
+
+def train_split_model(model, df):
+	"""
+	Train the split recommendation head on reviewed transactions
+	
+	Features come from the model's fitted vectorizers (as at inference).
+	The latest TEST_SIZE of transactions is held out for evaluation.
+	
+	Args:
+		model: AMEXClassificationModel with fitted transformers
+		df: Output of `load_split_data`
 	
-	# Train model
-	model.train(X_train, y_train, sample_weights=w_train)
+	Returns:
+		tuple: (SplitRecommender, metrics), or (None, reason) when there
+		is too little data
+	"""
+	patterns = [get_split_pattern(splits) for splits in df['splits']]
+	split_count = sum(1 for pattern in patterns if pattern)
 	
-	# Evaluate
-	metrics = evaluate_model(model, X_test, y_test)
+	if len(df) < MIN_SPLIT_EXAMPLES or not split_count:
+		return None, {'skipped': f"{len(df)} transactions, {split_count} split"}
 	
-	# Save metrics
-	metrics_file = os.path.join(args.output_data_dir, 'metrics.json')
-	os.makedirs(args.output_data_dir, exist_ok=True)
-	with open(metrics_file, 'w') as f:
-		json.dump(metrics, f, indent=2)
+	X = model.prepare_features(df, fit=False)
+	dates = pd.to_datetime(df['date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+	train_index, test_index = get_time_split(dates, TEST_SIZE)
 	
-	# Save model
-	model.save_model(args.model_dir)
+	recommender = SplitRecommender().fit(X[train_index], [patterns[i] for i in train_index])
 	
-	print("\nTraining complete!")
-	print(f"Model saved to: {args.model_dir}")
-	print(f"Metrics saved to: {metrics_file}")
+	metrics = evaluate_split_model(recommender, X[test_index], [patterns[i] for i in test_index])
+	metrics['split'] = {
+		'train': describe_dates(dates, train_index),
+		'test': describe_dates(dates, test_index)
+	}
+	
+	return recommender, metrics
+
+
+def parse_max_depth(value):
+	"""max_depth hyperparameter: an integer, or None/0 for unlimited"""
+	return None if str(value).lower() in ('none', '0', '') else int(value)
+
+
+def compression_choice(value):
+	"""--model-compression: a COMPRESSION_CHOICES key whose package is installed"""
+	try:
+		check_compression(value)
+	except ModelBundleError as e:
+		raise argparse.ArgumentTypeError(str(e))
+	return value
+
+
+def load_sweep_grid(value):
+	"""--sweep-grid: a JSON object of parameter -> values, or a path to one"""
+	if os.path.exists(value):
+		with open(value, 'r') as f:
+			return json.load(f)
+	return json.loads(value)
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--training-data', type=str, default=os.environ.get('SM_CHANNEL_TRAINING', 'training_data/transactions'))
+	parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', 'model'))
+	parser.add_argument('--output-data-dir', type=str, default=os.environ.get('SM_OUTPUT_DATA_DIR', 'output'))
+	parser.add_argument('--split-data', type=str, default=os.environ.get('SM_CHANNEL_SPLITS', 'training_data/splits.json'),
+		help='Reviewed transactions with splits (erpnext_amex.utils.split_training export)')
+	parser.add_argument('--feature-cache-dir', type=str, default=os.environ.get('AMEX_FEATURE_CACHE_DIR', 'feature_cache'),
+		help='Directory for cached features (e.g. under /opt/ml/checkpoints to persist across jobs)')
+	parser.add_argument('--no-feature-cache', action='store_true', help='Always extract features from the data')
+	parser.add_argument('--model-compression', '--model_compression', dest='model_compression',
+		type=compression_choice, default=DEFAULT_COMPRESSION,
+		help=f"Compression of the model bundle components ({', '.join(COMPRESSION_CHOICES)})")
+	
+	# Model hyperparameters (SageMaker passes them with underscores)
+	parser.add_argument('--n-estimators', '--n_estimators', dest='n_estimators', type=int,
+		default=DEFAULT_MODEL_PARAMS['n_estimators'])
+	parser.add_argument('--max-depth', '--max_depth', dest='max_depth', type=parse_max_depth,
+		default=DEFAULT_MODEL_PARAMS['max_depth'])
+	parser.add_argument('--min-samples-split', '--min_samples_split', dest='min_samples_split', type=int,
+		default=DEFAULT_MODEL_PARAMS['min_samples_split'])
+	
+	# Sweep mode
+	parser.add_argument('--sweep', action='store_true',
+		help='Cross-validate a grid of configurations and train the best one')
+	parser.add_argument('--sweep-grid', type=load_sweep_grid, default=None,
+		help='JSON grid (or path to one), e.g. {"n_estimators": [50, 100], "max_depth": [10, null]}')
+	parser.add_argument('--cv-folds', type=int, default=3)
+	parser.add_argument('--calibration-folds', type=int, default=CALIBRATION_FOLDS,
+		help='Expanding-window folds whose predictions calibrate the model trained on all rows')
+	parser.add_argument('--sweep-workers', type=int, default=None, help='Worker processes (default: CPU count)')
+	parser.add_argument('--sweep-tolerance', type=float, default=0.005,
+		help='Accuracy given up for a faster/smaller model')
+	
+	args = parser.parse_args()
+	
+	params = {
+		'n_estimators': args.n_estimators,
+		'max_depth': args.max_depth,
+		'min_samples_split': args.min_samples_split
+	}
+	
+	# Initialize model
+	model = AMEXClassificationModel()
+	
+	# The sweep's workers read features from the cache, so it always uses
+	# one; with --no-feature-cache it is a temporary one, removed at the end
+	cache_dir = args.feature_cache_dir
+	temp_cache_dir = None
+	if args.no_feature_cache:
+		cache_dir = temp_cache_dir = tempfile.mkdtemp(prefix='amex_features_') if args.sweep else None
+	
+	try:
+		features, cache_path = load_features(model, args.training_data, cache_dir=cache_dir)
+		X, y, sample_weights = features.X, features.y, features.weights
+		
+		# Split data chronologically (by position, so the sweep can share the
+		# cached arrays): evaluate on the latest transactions, fit the forest on
+		# the earlier ones and calibrate confidence on the period in between,
+		# so no later merchants leak into training
+		train_index, test_index = get_time_split(features.dates, TEST_SIZE)
+		fit_index, calibration_index = get_time_split(features.dates, CALIBRATION_SIZE, index=train_index)
+		
+		sweep_results = None
+		if args.sweep:
+			from sweep import format_results, run_sweep, write_results
+		
+			sweep_results = run_sweep(
+				cache_path,
+				train_index,
+				grid=args.sweep_grid,
+				n_folds=args.cv_folds,
+				max_workers=args.sweep_workers,
+				tolerance=args.sweep_tolerance
+			)
+			print(format_results(sweep_results))
+			results_file, _ = write_results(sweep_results, args.output_data_dir)
+			print(f"Sweep results saved to: {results_file}")
+		
+			params = next(row['params'] for row in sweep_results if row['best'])
+			print(f"Selected configuration: {json.dumps(params)}")
+		
+		w_fit = sample_weights[fit_index] if sample_weights is not None else None
+		
+		# Evaluation model: fitted on the oldest rows, calibrated on the
+		# next period and scored on the latest transactions
+		model.train(X[fit_index], y[fit_index], sample_weights=w_fit, params=params)
+		
+		print("Calibrating confidence...")
+		model.calibrate(X[calibration_index], y[calibration_index])
+		
+		# Evaluate
+		metrics = evaluate_model(model, X[test_index], y[test_index])
+		metrics['params'] = params
+		metrics['split'] = {
+			'fit': describe_dates(features.dates, fit_index),
+			'calibration': describe_dates(features.dates, calibration_index),
+			'test': describe_dates(features.dates, test_index)
+		}
+		
+		# Shipped model: the same parameters refitted on every row, so the
+		# newest (highest weighted) transactions are learned too
+		print("Training the shipped model on all rows...")
+		model.train(X, y, sample_weights=sample_weights, params=params)
+		
+		folds = get_forward_folds(features.dates, args.calibration_folds)
+		model.calibrate_out_of_fold(X, y, folds, sample_weights=sample_weights, params=params)
+		metrics['shipped_model'] = {
+			'fit': describe_dates(features.dates, np.arange(len(features.dates))),
+			'calibration': [
+				{'fit': describe_dates(features.dates, fit), 'predict': describe_dates(features.dates, predict)}
+				for fit, predict in folds
+			]
+		}
+		
+		if sweep_results:
+			metrics['sweep'] = next(row for row in sweep_results if row['best'])
+		
+		split_data = load_split_data(args.split_data)
+		if split_data is not None:
+			print(f"Training split recommendation on {len(split_data)} reviewed transactions...")
+			model.split_model, metrics['split_model'] = train_split_model(model, split_data)
+			print(f"Split recommendation: {json.dumps(metrics['split_model'])}")
+		else:
+			print(f"No split data at {args.split_data}; split recommendation disabled")
+		
+		# Save model
+		metrics['model_version'] = model.save_model(args.model_dir, compression=args.model_compression, metrics=metrics)
+		
+		# Save metrics
+		metrics_file = os.path.join(args.output_data_dir, 'metrics.json')
+		os.makedirs(args.output_data_dir, exist_ok=True)
+		with open(metrics_file, 'w') as f:
+			json.dump(metrics, f, indent=2)
+		
+		print("\nTraining complete!")
+		print(f"Model saved to: {args.model_dir}")
+		print(f"Metrics saved to: {metrics_file}")
+	finally:
+		if temp_cache_dir:
+			shutil.rmtree(temp_cache_dir, ignore_errors=True)
 
 
 if __name__ == '__main__':
@@ -3,28 +3,216 @@
 Transform NetSuite historical transaction data to ERPNext format for ML training
 
 This script:
-1. Reads historical NetSuite JSON transaction data from S3
+1. Streams historical NetSuite JSON transaction data from S3 (or a local directory)
 2. Maps NetSuite structure (Departments, Classes, Accounts) to ERPNext structure
 3. Creates clean training dataset for SageMaker
-4. Outputs JSON files ready for model training
+4. Outputs compressed Parquet shards, partitioned by month, for model training
+
+Files are downloaded by a bounded thread pool and parsed incrementally
+(with ijson when installed), so transactions flow through the transform
+step as they arrive instead of being collected into one list first.
 """
 
 import json
 import os
-import boto3
+import queue
+import shutil
+import threading
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 import re
 
+try:
+	import ijson
+except ImportError:
+	ijson = None
+
+
+# Records handed from a download worker to the transform step at a time
+RECORD_CHUNK_SIZE = 1000
+
+# Records transformed together by transform_frame
+FRAME_SIZE = 50000
+
+VENDOR_SUFFIXES = [' inc', ' llc', ' corp', ' corporation', ' ltd', ' limited']
+
+# Columns produced by transform_frame, in output order
+FRAME_COLUMNS = [
+	'vendor_description', 'original_vendor', 'memo', 'amount', 'date',
+	'netsuite_department', 'netsuite_class', 'netsuite_account',
+	'vendor', 'expense_account', 'cost_center', 'source', 'confidence', 'weight'
+]
+
+# Typed schema of the Parquet training data (FRAME_COLUMNS, flattened)
+PARQUET_SCHEMA = pa.schema([
+	('vendor_description', pa.string()),
+	('original_vendor', pa.string()),
+	('memo', pa.string()),
+	('amount', pa.float64()),
+	('date', pa.date32()),
+	('netsuite_department', pa.string()),
+	('netsuite_class', pa.string()),
+	('netsuite_account', pa.string()),
+	('vendor', pa.string()),
+	('expense_account', pa.string()),
+	('cost_center', pa.string()),
+	('source', pa.string()),
+	('confidence', pa.float32()),
+	('weight', pa.float32())
+])
+
+# Dataset directory (under output_dir) and hive partition column
+DATASET_DIR = 'transactions'
+PARTITION_COLUMN = 'month'
+UNKNOWN_PARTITION = 'unknown'
+
+PARQUET_COMPRESSION = 'zstd'
+
+# Rows buffered per partition before a row group is written
+ROW_GROUP_SIZE = 100000
+
+
+class S3Source:
+	"""NetSuite export files under an S3 prefix"""
+	
+	def __init__(self, bucket, prefix, client=None):
+		import boto3
+		
+		self.bucket = bucket
+		self.prefix = prefix
+		self.client = client or boto3.client('s3')
+	
+	def __str__(self):
+		return f"s3://{self.bucket}/{self.prefix}"
+	
+	def list_keys(self):
+		"""Yield the keys of all JSON files under the prefix"""
+		paginator = self.client.get_paginator('list_objects_v2')
+		
+		for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+			for obj in page.get('Contents', []):
+				if obj['Key'].endswith('.json'):
+					yield obj['Key']
+	
+	def open(self, key):
+		"""Open a file as a binary stream (read as it is parsed, not buffered whole)"""
+		return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+
+class LocalDirectorySource:
+	"""NetSuite export files in a local directory (e.g. a test fixture or a synced copy)"""
+	
+	def __init__(self, path):
+		self.path = path
+	
+	def __str__(self):
+		return self.path
+	
+	def list_keys(self):
+		for root, _dirs, files in os.walk(self.path):
+			for filename in sorted(files):
+				if filename.endswith('.json'):
+					yield os.path.join(root, filename)
+	
+	def open(self, key):
+		return open(key, 'rb')
+
+
+class _PeekableStream:
+	"""Binary stream wrapper that allows looking at the first bytes before parsing"""
+	
+	def __init__(self, stream):
+		self.stream = stream
+		self.buffer = b''
+	
+	def peek_first_char(self):
+		"""First non-whitespace byte of the stream, without consuming it"""
+		while True:
+			stripped = self.buffer.lstrip()
+			if stripped:
+				return stripped[:1]
+			chunk = self.stream.read(8192)
+			if not chunk:
+				return b''
+			self.buffer += chunk
+	
+	def read(self, size=-1):
+		if self.buffer:
+			if size is None or size < 0:
+				data, self.buffer = self.buffer + self.stream.read(), b''
+				return data
+			data, self.buffer = self.buffer[:size], self.buffer[size:]
+			return data
+		return self.stream.read(size)
+
+
+def iter_json_records(source, key):
+	"""
+	Yield the transactions in one NetSuite export file
+	
+	Supported layouts: a list of transactions, an object with a
+	`transactions` list, or a single transaction object. Lists are parsed
+	incrementally when ijson is available.
+	"""
+	stream = _PeekableStream(source.open(key))
+	
+	try:
+		first = stream.peek_first_char()
+		
+		if ijson is None or first not in (b'[', b'{'):
+			yield from _records_from_document(json.load(stream))
+			return
+		
+		if first == b'[':
+			yield from ijson.items(stream, 'item', use_float=True)
+			return
+		
+		# Object: stream its `transactions` list if it has one
+		found = False
+		for record in ijson.items(stream, 'transactions.item', use_float=True):
+			found = True
+			yield record
+	finally:
+		close = getattr(stream.stream, 'close', None)
+		if close:
+			close()
+	
+	if not found:
+		# A single transaction object (small), or an empty `transactions` list
+		with closing(source.open(key)) as fallback:
+			yield from _records_from_document(json.load(fallback))
+
+
+def _records_from_document(data):
+	# Handle different JSON structures
+	if isinstance(data, list):
+		return data
+	elif isinstance(data, dict) and 'transactions' in data:
+		return data['transactions']
+	return [data]
+
 
 class NetSuiteToERPNextTransformer:
 	"""Transform NetSuite transaction data to ERPNext format"""
 	
-	def __init__(self, s3_bucket, s3_prefix, output_dir='training_data'):
-		self.s3_bucket = s3_bucket
-		self.s3_prefix = s3_prefix
+	def __init__(self, s3_bucket=None, s3_prefix=None, output_dir='training_data', source=None, max_workers=8):
+		"""
+		Args:
+			s3_bucket: S3 bucket holding the NetSuite export
+			s3_prefix: Prefix of the export files
+			output_dir: Directory for the training data
+			source: S3Source/LocalDirectorySource to read from instead of s3_bucket/s3_prefix
+			max_workers: Files downloaded and parsed concurrently
+		"""
+		self.source = source or S3Source(s3_bucket, s3_prefix)
 		self.output_dir = output_dir
-		self.s3_client = boto3.client('s3')
+		self.max_workers = max_workers
 		
 		# Mapping tables (to be customized based on your specific mappings)
 		self.department_to_cost_center = {}
@@ -43,37 +231,72 @@ class NetSuiteToERPNextTransformer:
 		self.account_mapping = config.get('account_mapping', {})
 	
 	def fetch_netsuite_data(self):
-		"""Fetch NetSuite JSON files from S3"""
-		print(f"Fetching data from s3://{self.s3_bucket}/{self.s3_prefix}")
+		"""
+		Stream NetSuite transactions from the source
+		
+		Files are downloaded and parsed by up to `max_workers` threads. They
+		hand records over in chunks through a bounded queue, so a slow
+		consumer holds back the downloads instead of buffering the export in
+		memory. Records from different files may interleave.
+		
+		Yields:
+			dict: NetSuite transaction
+		"""
+		print(f"Fetching data from {self.source}")
+		
+		records = queue.Queue(maxsize=self.max_workers * 2)
+		stop = threading.Event()
+		done = object()
 		
-		transactions = []
+		def put(item):
+			while not stop.is_set():
+				try:
+					records.put(item, timeout=0.5)
+					return True
+				except queue.Full:
+					continue
+			return False
+		
+		def read_file(key):
+			try:
+				print(f"Processing {key}")
+				chunk = []
+				for record in iter_json_records(self.source, key):
+					chunk.append(record)
+					if len(chunk) >= RECORD_CHUNK_SIZE:
+						if not put(chunk):
+							return
+						chunk = []
+				if chunk:
+					put(chunk)
+			except Exception as e:
+				put(RuntimeError(f"Failed to read {key}: {e}"))
+			finally:
+				put(done)
 		
-		# List objects in S3
-		paginator = self.s3_client.get_paginator('list_objects_v2')
-		pages = paginator.paginate(Bucket=self.s3_bucket, Prefix=self.s3_prefix)
+		executor = ThreadPoolExecutor(max_workers=self.max_workers)
+		pending = 0
+		count = 0
 		
-		for page in pages:
-			if 'Contents' not in page:
-				continue
+		try:
+			for key in self.source.list_keys():
+				executor.submit(read_file, key)
+				pending += 1
 			
-			for obj in page['Contents']:
-				if obj['Key'].endswith('.json'):
-					print(f"Processing {obj['Key']}")
-					
-					# Download and parse JSON
-					response = self.s3_client.get_object(Bucket=self.s3_bucket, Key=obj['Key'])
-					data = json.loads(response['Body'].read())
-					
-					# Handle different JSON structures
-					if isinstance(data, list):
-						transactions.extend(data)
-					elif isinstance(data, dict) and 'transactions' in data:
-						transactions.extend(data['transactions'])
-					else:
-						transactions.append(data)
+			while pending:
+				item = records.get()
+				if item is done:
+					pending -= 1
+				elif isinstance(item, Exception):
+					raise item
+				else:
+					count += len(item)
+					yield from item
+		finally:
+			stop.set()
+			executor.shutdown(wait=True, cancel_futures=True)
 		
-		print(f"Fetched {len(transactions)} transactions from NetSuite")
-		return transactions
+		print(f"Fetched {count} transactions from NetSuite")
 	
 	def normalize_vendor_name(self, vendor):
 		"""Normalize vendor name for consistency"""
@@ -84,8 +307,7 @@ class NetSuiteToERPNextTransformer:
 		normalized = vendor.lower().strip()
 		
 		# Remove common suffixes
-		suffixes = [' inc', ' llc', ' corp', ' corporation', ' ltd', ' limited']
-		for suffix in suffixes:
+		for suffix in VENDOR_SUFFIXES:
 			if normalized.endswith(suffix):
 				normalized = normalized[:-len(suffix)].strip()
 		
@@ -190,52 +412,386 @@ class NetSuiteToERPNextTransformer:
 			print(f"Error transforming transaction: {str(e)}")
 			return None
 	
+	def transform_frame(self, df, now=None):
+		"""
+		Transform a DataFrame of NetSuite transactions in bulk
+		
+		Produces the same values as `transform_transaction`, flattened into
+		FRAME_COLUMNS (classification.* become vendor/expense_account/
+		cost_center). Text columns are factorized once; vendor normalization
+		then runs as vectorized `.str` ops over the distinct names only,
+		dates are parsed and weighted in one `pd.to_datetime` pass over the
+		distinct dates, and department/account mappings (including the
+		fuzzy fallbacks) are computed once per distinct value and taken
+		back by code. Rows whose amount is not numeric, or whose department
+		or account cannot be mapped, are dropped, as `transform_transaction`
+		drops them.
+		
+		Args:
+			df: Raw NetSuite records (e.g. `pd.DataFrame.from_records(list_of_dicts)`)
+			now: Reference time for recency weights (defaults to now)
+		
+		Returns:
+			DataFrame: Transformed rows with FRAME_COLUMNS
+		"""
+		def column(name):
+			return df[name] if name in df.columns else pd.Series('', index=df.index, dtype='object')
+		
+		def text(name, fallback=None):
+			values = column(name).fillna('')
+			if fallback:
+				values = values.where(values != '', text(fallback))
+			return values.to_numpy(dtype='object')
+		
+		# vendor, falling back to payee
+		vendor_codes, vendors = factorize_text(column('vendor'))
+		payee_codes, payees = factorize_text(column('payee'))
+		use_payee = (vendors == '')[vendor_codes]
+		
+		vendor_name = np.where(use_payee, payees[payee_codes], vendors[vendor_codes])
+		vendor_description = np.where(
+			use_payee,
+			self.normalize_vendor_names(payees)[payee_codes],
+			self.normalize_vendor_names(vendors)[vendor_codes]
+		)
+		
+		department_codes, departments = factorize_text(column('department'))
+		account_codes, accounts = factorize_text(column('account'))
+		date_codes, dates = factorize_text(column('date'))
+		
+		# float(amount or 0): empty values are 0, anything non-numeric drops the row
+		raw_amount = df['amount'] if 'amount' in df.columns else pd.Series(0, index=df.index)
+		amount = pd.to_numeric(raw_amount, errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+		missing = np.isnan(amount)
+		if missing.any():
+			raw_missing = raw_amount[missing]
+			amount[np.flatnonzero(missing)[(raw_missing.isna() | (raw_missing == '')).to_numpy()]] = 0.0
+		
+		expense_accounts, account_failed = map_distinct(accounts, self.map_account)
+		cost_centers, department_failed = map_distinct(departments, self.map_department_to_cost_center)
+		
+		out = pd.DataFrame({
+			'vendor_description': vendor_description,
+			'original_vendor': vendor_name,
+			'memo': text('memo', 'description'),
+			'amount': amount,
+			'date': dates[date_codes],
+			'netsuite_department': departments[department_codes],
+			'netsuite_class': text('class'),
+			'netsuite_account': accounts[account_codes],
+			'vendor': vendor_name,
+			# object dtype keeps unmapped values as None rather than NaN
+			'expense_account': pd.Series(expense_accounts[account_codes], dtype='object'),
+			'cost_center': pd.Series(cost_centers[department_codes], dtype='object'),
+			'source': 'netsuite',
+			'confidence': 0.7,  # Lower confidence for historical data
+			'weight': self.get_recency_weights(dates, now)[date_codes]
+		}, columns=FRAME_COLUMNS)
+		
+		keep = ~np.isnan(amount) & ~account_failed[account_codes] & ~department_failed[department_codes]
+		if not keep.all():
+			out = out[keep].reset_index(drop=True)
+		
+		return out
+	
+	def normalize_vendor_names(self, vendors):
+		"""
+		Vectorized `normalize_vendor_name`
+		
+		Args:
+			vendors: Array of (distinct) vendor names
+		
+		Returns:
+			ndarray: Normalized names, aligned with `vendors`
+		"""
+		normalized = pd.Series(vendors, dtype='object').str.lower().str.strip()
+		
+		# Remove common suffixes (in order, as the scalar version does)
+		for suffix in VENDOR_SUFFIXES:
+			has_suffix = normalized.str.endswith(suffix)
+			if has_suffix.any():
+				normalized = normalized.where(~has_suffix, normalized.str[:-len(suffix)].str.strip())
+		
+		normalized = (
+			normalized
+			.str.replace(r'[^a-z0-9\s]', '', regex=True)
+			.str.replace(r'\s+', ' ', regex=True)
+			.str.strip()
+		)
+		
+		return normalized.to_numpy(dtype='object')
+	
+	def get_recency_weights(self, dates, now=None):
+		"""
+		Weights by age: under 3 months 3.0, under 6 months 1.0, otherwise (or no date) 0.5
+		
+		Args:
+			dates: Array of (distinct) YYYY-MM-DD strings
+		
+		Returns:
+			ndarray: Weights aligned with `dates`
+		"""
+		parsed = pd.to_datetime(pd.Series(dates, dtype='object'), format='%Y-%m-%d', errors='coerce')
+		months_old = ((pd.Timestamp(now or datetime.now()) - parsed).dt.days / 30).to_numpy()
+		
+		weights = np.full(len(dates), 0.5)
+		weights[months_old < 6] = 1.0
+		weights[months_old < 3] = 3.0
+		
+		return weights
+	
+	def iter_frames(self, frame_size=FRAME_SIZE):
+		"""
+		Stream transformed DataFrames of up to `frame_size` rows
+		
+		Yields:
+			DataFrame: Output of `transform_frame` for each batch of records
+		"""
+		batch = []
+		
+		for ns_trans in self.fetch_netsuite_data():
+			batch.append(ns_trans)
+			if len(batch) >= frame_size:
+				yield self.transform_frame(pd.DataFrame.from_records(batch))
+				batch = []
+		
+		if batch:
+			yield self.transform_frame(pd.DataFrame.from_records(batch))
+	
 	def transform_all(self):
-		"""Transform all NetSuite transactions"""
-		ns_transactions = self.fetch_netsuite_data()
+		"""
+		Transform all NetSuite transactions
 		
+		Records are transformed in frames (see `transform_frame`) and
+		converted back to the nested training record format.
+		
+		Yields:
+			dict: Transformed transaction
+		"""
 		print("Transforming transactions...")
-		erp_transactions = []
-		
-		for ns_trans in ns_transactions:
-			erp_trans = self.transform_transaction(ns_trans)
-			if erp_trans:
-				erp_transactions.append(erp_trans)
-		
-		print(f"Successfully transformed {len(erp_transactions)} transactions")
-		return erp_transactions
-	
-	def save_training_data(self, transactions):
-		"""Save transformed data in format for SageMaker"""
-		# Save as JSON
-		output_file = os.path.join(self.output_dir, 'training_data.json')
-		with open(output_file, 'w') as f:
-			json.dump(transactions, f, indent=2)
-		print(f"Saved training data to {output_file}")
-		
-		# Also save as CSV for easy inspection
-		df = pd.DataFrame(transactions)
-		csv_file = os.path.join(self.output_dir, 'training_data.csv')
-		df.to_csv(csv_file, index=False)
-		print(f"Saved CSV to {csv_file}")
-		
-		# Save statistics
-		stats = {
-			'total_transactions': len(transactions),
-			'unique_vendors': len(set([t['vendor_description'] for t in transactions if t.get('vendor_description')])),
-			'date_range': {
-				'earliest': min([t['date'] for t in transactions if t.get('date')], default=None),
-				'latest': max([t['date'] for t in transactions if t.get('date')], default=None)
-			},
-			'avg_amount': sum([t['amount'] for t in transactions]) / len(transactions) if transactions else 0
-		}
+		count = 0
+		
+		for frame in self.iter_frames():
+			for row in frame.to_dict('records'):
+				count += 1
+				yield frame_row_to_transaction(row)
+		
+		print(f"Successfully transformed {count} transactions")
+	
+	def save_training_data(self, frames):
+		"""
+		Save transformed data as a Parquet dataset for SageMaker
+		
+		Frames (e.g. from `iter_frames`) are written as they arrive to
+		`<output_dir>/transactions/month=YYYY-MM/part-0.parquet`, with the
+		typed PARQUET_SCHEMA and zstd compression; rows without a valid
+		date go to `month=unknown`. Statistics are accumulated on the way,
+		so the dataset is never held in memory.
+		
+		Args:
+			frames: Iterable of DataFrames with FRAME_COLUMNS
+		
+		Returns:
+			tuple: (dataset directory, number of transactions written)
+		"""
+		dataset_dir = os.path.join(self.output_dir, DATASET_DIR)
+		
+		# Shards from an earlier run would be read back as part of this one
+		shutil.rmtree(dataset_dir, ignore_errors=True)
+		
+		stats = TrainingStats()
+		
+		with PartitionedParquetWriter(dataset_dir) as writer:
+			for frame in frames:
+				table = to_arrow_table(frame)
+				stats.update(table)
+				writer.write(table)
+		
+		print(f"Saved training data to {dataset_dir}")
 		
 		stats_file = os.path.join(self.output_dir, 'statistics.json')
 		with open(stats_file, 'w') as f:
-			json.dump(stats, f, indent=2)
+			json.dump(stats.as_dict(), f, indent=2)
 		print(f"Saved statistics to {stats_file}")
 		
-		return output_file
+		return dataset_dir, stats.total
+
+
+def to_arrow_table(frame):
+	"""
+	Convert a transformed frame to a PARQUET_SCHEMA table plus its month partition
+	
+	Returns:
+		pyarrow.Table: Typed columns and a `month` column (YYYY-MM or 'unknown')
+	"""
+	dates = pd.to_datetime(frame['date'], format='%Y-%m-%d', errors='coerce')
+	months = dates.dt.strftime('%Y-%m').fillna(UNKNOWN_PARTITION)
+	
+	table = pa.Table.from_pandas(
+		frame.assign(date=dates.dt.date)[PARQUET_SCHEMA.names],
+		schema=PARQUET_SCHEMA,
+		preserve_index=False
+	)
+	
+	return table.append_column(PARTITION_COLUMN, pa.array(months.to_numpy(dtype='object'), pa.string()))
+
+
+class PartitionedParquetWriter:
+	"""
+	Write tables to one Parquet file per month partition
+	
+	Rows are buffered per partition and written in row groups of
+	ROW_GROUP_SIZE, so small frames do not produce tiny row groups.
+	"""
+	
+	def __init__(self, dataset_dir, row_group_size=ROW_GROUP_SIZE):
+		self.dataset_dir = dataset_dir
+		self.row_group_size = row_group_size
+		self.writers = {}
+		self.buffers = {}
+	
+	def __enter__(self):
+		return self
+	
+	def __exit__(self, *exc_info):
+		self.close()
+	
+	def write(self, table):
+		"""Buffer a table with a `month` column, flushing full row groups"""
+		months = table.column(PARTITION_COLUMN)
+		data = table.drop_columns([PARTITION_COLUMN])
+		
+		for month in pc.unique(months).to_pylist():
+			rows = data.filter(pc.equal(months, month))
+			buffer = self.buffers.setdefault(month, [])
+			buffer.append(rows)
+			
+			if sum(len(t) for t in buffer) >= self.row_group_size:
+				self.flush(month)
+	
+	def flush(self, month):
+		buffer = self.buffers.pop(month, None)
+		if not buffer:
+			return
+		
+		writer = self.writers.get(month)
+		if writer is None:
+			partition_dir = os.path.join(self.dataset_dir, f"{PARTITION_COLUMN}={month}")
+			os.makedirs(partition_dir, exist_ok=True)
+			writer = self.writers[month] = pq.ParquetWriter(
+				os.path.join(partition_dir, 'part-0.parquet'),
+				PARQUET_SCHEMA,
+				compression=PARQUET_COMPRESSION
+			)
+		
+		writer.write_table(pa.concat_tables(buffer), row_group_size=self.row_group_size)
+	
+	def close(self):
+		for month in list(self.buffers):
+			self.flush(month)
+		
+		for writer in self.writers.values():
+			writer.close()
+		self.writers = {}
+
+
+class TrainingStats:
+	"""Dataset statistics accumulated one table at a time"""
+	
+	def __init__(self):
+		self.total = 0
+		self.amount_sum = 0.0
+		self.vendors = set()
+		self.earliest = None
+		self.latest = None
+		self.months = {}
+	
+	def update(self, table):
+		"""Fold in a table from `to_arrow_table`"""
+		if not len(table):
+			return
+		
+		self.total += len(table)
+		self.amount_sum += pc.sum(table.column('amount')).as_py() or 0.0
+		self.vendors.update(v for v in pc.unique(table.column('vendor_description')).to_pylist() if v)
+		
+		date_range = pc.min_max(table.column('date')).as_py()
+		if date_range['min'] is not None:
+			self.earliest = min(filter(None, (self.earliest, date_range['min'])))
+			self.latest = max(filter(None, (self.latest, date_range['max'])))
+		
+		for row in table.group_by(PARTITION_COLUMN).aggregate([(PARTITION_COLUMN, 'count')]).to_pylist():
+			month = row[PARTITION_COLUMN]
+			self.months[month] = self.months.get(month, 0) + row[f'{PARTITION_COLUMN}_count']
+	
+	def as_dict(self):
+		return {
+			'total_transactions': self.total,
+			'unique_vendors': len(self.vendors),
+			'date_range': {
+				'earliest': self.earliest.isoformat() if self.earliest else None,
+				'latest': self.latest.isoformat() if self.latest else None
+			},
+			'avg_amount': self.amount_sum / self.total if self.total else 0,
+			'transactions_by_month': dict(sorted(self.months.items()))
+		}
+
+
+def factorize_text(values):
+	"""
+	Factorize a text column, treating missing values as ''
+	
+	Returns:
+		tuple: (codes, distinct values); `distinct[codes]` rebuilds the column
+	"""
+	codes, uniques = pd.factorize(values, sort=False)
+	# Missing values get code -1, which indexes the trailing ''
+	return codes, np.append(np.asarray(uniques, dtype='object'), '')
+
+
+def map_distinct(values, mapper):
+	"""
+	Apply a scalar mapping to each distinct value
+	
+	A value the mapper raises on is reported and flagged, so only its rows
+	are dropped, as `transform_transaction` drops a row it cannot map.
+	
+	Returns:
+		tuple: (mapped values, boolean mask of values that failed)
+	"""
+	mapped = np.empty(len(values), dtype='object')
+	failed = np.zeros(len(values), dtype=bool)
+	
+	for i, value in enumerate(values):
+		try:
+			mapped[i] = mapper(value)
+		except Exception as e:
+			print(f"Error transforming transaction: {str(e)}")
+			failed[i] = True
+	
+	return mapped, failed
+
+
+def frame_row_to_transaction(row):
+	"""Convert a `transform_frame` row back to the `transform_transaction` format"""
+	return {
+		'vendor_description': row['vendor_description'],
+		'original_vendor': row['original_vendor'],
+		'memo': row['memo'],
+		'amount': row['amount'],
+		'date': row['date'],
+		'netsuite_department': row['netsuite_department'],
+		'netsuite_class': row['netsuite_class'],
+		'netsuite_account': row['netsuite_account'],
+		'classification': {
+			'vendor': row['vendor'],
+			'expense_account': row['expense_account'],
+			'cost_center': row['cost_center']
+		},
+		'source': row['source'],
+		'confidence': row['confidence'],
+		'weight': row['weight']
+	}
 
 
 def main():
@@ -243,18 +799,27 @@ def main():
 	import argparse
 	
 	parser = argparse.ArgumentParser(description='Transform NetSuite data to ERPNext format')
-	parser.add_argument('--s3-bucket', required=True, help='S3 bucket name')
-	parser.add_argument('--s3-prefix', required=True, help='S3 prefix/path to NetSuite JSON files')
+	parser.add_argument('--s3-bucket', help='S3 bucket name')
+	parser.add_argument('--s3-prefix', help='S3 prefix/path to NetSuite JSON files')
+	parser.add_argument('--source-dir', help='Local directory of NetSuite JSON files (instead of S3)')
+	parser.add_argument('--workers', type=int, default=8, help='Files downloaded and parsed in parallel')
 	parser.add_argument('--mapping-config', help='Path to mapping configuration JSON file')
 	parser.add_argument('--output-dir', default='training_data', help='Output directory for training data')
 	
 	args = parser.parse_args()
 	
+	if args.source_dir:
+		source = LocalDirectorySource(args.source_dir)
+	elif args.s3_bucket and args.s3_prefix:
+		source = S3Source(args.s3_bucket, args.s3_prefix)
+	else:
+		parser.error('either --source-dir or both --s3-bucket and --s3-prefix are required')
+	
 	# Initialize transformer
 	transformer = NetSuiteToERPNextTransformer(
-		s3_bucket=args.s3_bucket,
-		s3_prefix=args.s3_prefix,
-		output_dir=args.output_dir
+		source=source,
+		output_dir=args.output_dir,
+		max_workers=args.workers
 	)
 	
 	# Load mapping configuration if provided
@@ -262,14 +827,12 @@ def main():
 		print(f"Loading mapping configuration from {args.mapping_config}")
 		transformer.load_mapping_config(args.mapping_config)
 	
-	# Transform data
-	transactions = transformer.transform_all()
-	
-	# Save training data
-	output_file = transformer.save_training_data(transactions)
+	# Transform and save as the data streams in
+	print("Transforming transactions...")
+	dataset_dir, total = transformer.save_training_data(transformer.iter_frames())
 	
-	print(f"\n✓ Transformation complete! Training data saved to {output_file}")
-	print(f"  Total transactions: {len(transactions)}")
+	print(f"\n✓ Transformation complete! Training data saved to {dataset_dir}")
+	print(f"  Total transactions: {total}")
 	print(f"\nNext steps:")
 	print(f"  1. Review the mapping configuration and adjust if needed")
 	print(f"  2. Upload training data to S3 for SageMaker")
@@ -24,6 +24,7 @@ setup(
     python_requires=">=3.10",
     install_requires=[
         "pandas>=2.0.0",
+        "numpy>=1.24.0",
         "boto3>=1.26.0",
         "requests>=2.28.0",
         "beautifulsoup4>=4.12.0",